@@ -10,13 +10,17 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
 
-from modules.barcode_web import BarcodeWebGenerator
-from modules.zebra_web import ZebraWebPrinter
-from modules.excel_web import ExcelWebReader
-from modules.ordenes_nexlab import OrdenesNexlab
-from PIL import Image
+# Los módulos pesados (pandas/openpyxl, pyodbc, PIL, python-barcode, pywin32) se importan
+# con modulo() al primer uso y se precargan en segundo plano (ver warm_up)
+from modules.arranque import modulo, precalentar, estado_precarga, reporte_importaciones
+from modules.exportar_zip import escribir_zip, MANIFEST_NAME
+from modules.pipeline_zpl import iter_label_fields, iter_zpl_batches, print_stream, sample_indices
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import io
-from datetime import datetime
+import tempfile
+from datetime import datetime, timedelta
+import hashlib
 import json
 
 # Configuración de la página
@@ -65,6 +69,35 @@ st.markdown("""
 
 # Archivo de configuración
 CONFIG_FILE = os.path.join("web_app", "temp", "printer_config.json")
+# Mapeo de columnas usado por vigilar_carpeta.py
+MAPPING_FILE = os.path.join("web_app", "temp", "mapeo_carpeta.json")
+
+# Máximo de etiquetas renderizadas en la vista previa de Excel (se generan en segundo plano y se paginan)
+PREVIEW_SAMPLE_LIMIT = 2000
+# Etiquetas por página de la vista previa (múltiplo de las 3 columnas)
+PREVIEW_PAGE_SIZE = 30
+# Segundos entre actualizaciones de la vista previa mientras se genera
+PREVIEW_POLL_SECONDS = 0.5
+# Segundos máximos que "Vista Previa" espera la primera página antes de mostrar el avance
+PREVIEW_FIRST_PAGE_TIMEOUT = 2.0
+# Etiquetas por trabajo de impresión
+PRINT_BATCH_SIZE = 50
+# Órdenes por página en el listado de órdenes recientes
+RECENT_ORDERS_PAGE_SIZE = 25
+# Segundos que se reutiliza la lista de impresoras instaladas
+PRINTER_LIST_TTL = 60
+# Archivos subidos cuya lectura se conserva en memoria (compartida entre sesiones)
+SHARED_FILES_MAX = 8
+# Hilos del pool de generación de etiquetas (compartido por todas las sesiones)
+GENERATION_WORKERS = min(8, os.cpu_count() or 2)
+# Etiquetas por tarea enviada al pool de generación
+ZIP_TASK_SIZE = 8
+# Tamaño a partir del cual el ZIP en preparación pasa de memoria a un archivo temporal
+ZIP_SPOOL_BYTES = 16 * 1024 * 1024
+# Tamaño máximo de un ZIP o PDF descargable desde la app: la descarga se entrega completa desde memoria
+DESCARGA_MAX_BYTES = 64 * 1024 * 1024
+# Segundos tras la primera página antes de precargar los módulos pesados
+WARM_UP_DELAY = 1.0
 
 def save_printer_config(printer_name):
     """Guarda la configuración de la impresora seleccionada"""
@@ -88,15 +121,74 @@ def load_printer_config():
         pass
     return None
 
-# Inicializar session state
-if 'barcode_generator' not in st.session_state:
-    st.session_state.barcode_generator = BarcodeWebGenerator()
-if 'zebra_printer' not in st.session_state:
-    st.session_state.zebra_printer = ZebraWebPrinter()
-if 'excel_reader' not in st.session_state:
-    st.session_state.excel_reader = ExcelWebReader()
-if 'ordenes_nexlab' not in st.session_state:
-    st.session_state.ordenes_nexlab = OrdenesNexlab()
+# Recursos compartidos por todas las sesiones (una instancia por proceso)
+@st.cache_resource
+def get_barcode_generator():
+    """Generador de códigos compartido (no guarda estado entre llamadas)"""
+    return modulo('modules.barcode_web').BarcodeWebGenerator()
+
+@st.cache_resource
+def get_nexlab():
+    """Acceso a Nexlab compartido: pool de conexiones, caché y réplica únicos para todas las estaciones"""
+    nexlab = modulo('modules.ordenes_nexlab').OrdenesNexlab()
+    nexlab.iniciar_replica()
+    return nexlab
+
+@st.cache_data(ttl=PRINTER_LIST_TTL, show_spinner=False)
+def get_printer_list():
+    """Impresoras instaladas en el servidor (se consultan una vez cada PRINTER_LIST_TTL segundos)"""
+    return modulo('modules.zebra_web').ZebraWebPrinter().get_available_printers()
+
+@st.cache_data(max_entries=SHARED_FILES_MAX, show_spinner=False)
+def get_sheet_names(digest, temp_path):
+    """Hojas de un archivo subido, por contenido (digest)"""
+    reader = modulo('modules.excel_web').ExcelWebReader()
+    reader.file_path = temp_path
+    return reader.get_sheet_names()
+
+@st.cache_resource(max_entries=SHARED_FILES_MAX, show_spinner=False)
+def load_shared_table(digest, temp_path, header_row, sheet_name):
+    """
+    Lee un archivo subido una sola vez por contenido, hoja y encabezado
+    
+    Si varias estaciones suben el mismo archivo se reutiliza la lectura. El
+    lector retornado es de solo lectura (se comparte entre sesiones).
+    
+    Returns:
+        ExcelWebReader: Lector con los datos cargados, o None si falló la lectura
+    """
+    reader = modulo('modules.excel_web').ExcelWebReader()
+    if not reader.load_excel_with_header(temp_path, header_row, sheet_name):
+        return None
+    return reader
+
+@st.cache_resource
+def get_generation_pool():
+    """Pool de hilos compartido para generar y codificar etiquetas en lote (PIL libera el GIL al codificar)"""
+    return ThreadPoolExecutor(max_workers=GENERATION_WORKERS, thread_name_prefix='etiquetas')
+
+def get_session_printer():
+    """Impresora de la sesión: cada estación imprime en la suya"""
+    printer = modulo('modules.zebra_web').ZebraWebPrinter()
+    printer.set_printer(st.session_state.printer_name)
+    return printer
+
+def warm_up_labels():
+    """Compila el diseño de la etiqueta y carga sus fuentes (la primera vista previa y el primer ZIP no esperan)"""
+    get_barcode_generator().generate_barcode_with_text_svg('CODE128', '1000000.01', 'PRECARGA', '1')
+    get_barcode_generator().generate_barcode_with_text('CODE128', '1000000.01', 'PRECARGA', '1')
+    modulo('modules.diseno_etiqueta').plantilla_zpl('CODE128')
+
+@st.cache_resource
+def warm_up():
+    """Precarga una vez por proceso, en segundo plano, los módulos pesados, las fuentes y la réplica de Nexlab"""
+    return precalentar(tareas=(warm_up_labels, get_nexlab), espera=WARM_UP_DELAY)
+
+warm_up()
+
+# Inicializar session state (solo datos del usuario: selecciones y listas de entradas)
+if 'printer_name' not in st.session_state:
+    st.session_state.printer_name = None
 if 'current_barcodes' not in st.session_state:
     st.session_state.current_barcodes = []
 if 'excel_mode' not in st.session_state:
@@ -108,13 +200,20 @@ if 'selected_rows' not in st.session_state:
 if 'print_double' not in st.session_state:
     st.session_state.print_double = False
 if 'selected_barcodes' not in st.session_state:
+    # Claves estables ('key') de las etiquetas seleccionadas en la vista previa
     st.session_state.selected_barcodes = set()
+if 'next_entry_id' not in st.session_state:
+    st.session_state.next_entry_id = 0
 if 'search_filter' not in st.session_state:
     st.session_state.search_filter = ""
 if 'current_page' not in st.session_state:
     st.session_state.current_page = 1
 if 'items_per_page' not in st.session_state:
-    st.session_state.items_per_page = 12
+    st.session_state.items_per_page = PREVIEW_PAGE_SIZE
+if 'preview_job' not in st.session_state:
+    # Generación de la vista previa en curso (TrabajoVistaPrevia) y su resultado al terminar
+    st.session_state.preview_job = None
+    st.session_state.preview_message = None
 if 'saved_printer' not in st.session_state:
     st.session_state.saved_printer = load_printer_config()
 
@@ -151,7 +250,7 @@ def main():
         
         barcode_format = st.selectbox(
             "Formato de Código:",
-            st.session_state.barcode_generator.get_supported_formats(),
+            get_barcode_generator().get_supported_formats(),
             index=0
         )
         
@@ -174,7 +273,7 @@ def main():
         # Configuración de impresora
         st.subheader("Impresora Zebra")
         
-        printers = st.session_state.zebra_printer.get_available_printers()
+        printers = get_printer_list()
         
         if printers:
             # Intentar seleccionar la impresora guardada si está disponible
@@ -189,7 +288,7 @@ def main():
                 key="printer_select",
                 help="Selecciona la impresora Zebra donde deseas imprimir"
             )
-            st.session_state.zebra_printer.set_printer(selected_printer)
+            st.session_state.printer_name = selected_printer
             
             # Botón para guardar la impresora seleccionada
             if st.button("Guardar impresora"):
@@ -210,9 +309,37 @@ def main():
             st.error("No se encontraron impresoras")
             st.info("Verifica que la impresora Zebra esté instalada y encendida")
             selected_printer = None
+            st.session_state.printer_name = None
         
         if st.button("Actualizar lista de impresoras"):
+            get_printer_list.clear()
             st.rerun()
+        
+        st.markdown("---")
+        
+        # Conexión a Nexlab: relee la configuración guardada sin reiniciar el servidor
+        st.subheader("Base de Datos Nexlab")
+        if st.button("🔌 Probar Conexión a Base de Datos", key="nexlab_test_btn"):
+            nexlab = get_nexlab()
+            nexlab.recargar_configuracion()
+            with st.spinner("Conectando..."):
+                exito, mensaje = nexlab.test_conexion()
+            if exito:
+                st.success(mensaje)
+            else:
+                st.error(mensaje)
+        
+        # Tiempos de importación de los módulos pesados (primer uso o precarga)
+        with st.expander("Diagnóstico de arranque"):
+            precarga = estado_precarga()
+            duracion = f" en {precarga['segundos']} s" if precarga['estado'] == 'terminada' else ""
+            st.caption(f"Precarga en segundo plano: {precarga['estado']}{duracion}")
+            for error in precarga['errores']:
+                st.caption(f"⚠️ {error}")
+            # Tabla en markdown: st.dataframe importaría pandas solo para mostrarla
+            filas = [f"| `{fila['modulo']}` | {fila['ms']} | {fila['origen']} |" for fila in reporte_importaciones()]
+            if filas:
+                st.markdown("| Módulo | ms | Origen |\n|---|---:|---|\n" + "\n".join(filas))
     
     # Contenido principal - Selector de modo
     st.header("Modo de Ingreso")
@@ -266,6 +393,7 @@ def render_manual_mode(barcode_format, format_template):
         if grau_input.strip() and nombre_input.strip():
             # Agregar a la lista
             st.session_state.manual_entries.append({
+                'entry_id': new_entry_id(),
                 'grau': grau_input.strip(),
                 'nombre': nombre_input.strip().upper()
             })
@@ -292,8 +420,11 @@ def render_manual_mode(barcode_format, format_template):
                 st.markdown(f"**GRAU:** {entry['grau']} | **Nombre:** {entry['nombre']}")
             
             with col3:
-                if st.button("Eliminar", key=f"delete_manual_{idx}", help="Eliminar"):
-                    st.session_state.manual_entries.pop(idx)
+                if st.button("Eliminar", key=f"delete_manual_{entry['entry_id']}", help="Eliminar"):
+                    # Por id: las demás entradas (y sus etiquetas seleccionadas) no cambian
+                    st.session_state.manual_entries = [
+                        e for e in st.session_state.manual_entries if e['entry_id'] != entry['entry_id']
+                    ]
                     st.rerun()
         
         st.markdown("---")
@@ -308,6 +439,7 @@ def render_manual_mode(barcode_format, format_template):
         with col2:
             if st.button("Limpiar Lista", key="clear_manual_btn"):
                 st.session_state.manual_entries = []
+                cancel_preview()
                 st.session_state.current_barcodes = []
                 st.session_state.selected_barcodes = set()
                 st.rerun()
@@ -326,73 +458,129 @@ def render_manual_mode(barcode_format, format_template):
             st.markdown("---")
             st.subheader("Acciones con Seleccionadas")
             
-            if st.button("Imprimir Seleccionadas", key="print_selected_manual_btn"):
-                print_selected_barcodes(barcode_format)
+            col_print, col_download = st.columns(2)
+            
+            with col_print:
+                if st.button("Imprimir Seleccionadas", key="print_selected_manual_btn"):
+                    print_selected_barcodes(barcode_format)
+            
+            with col_download:
+                if st.button("Preparar ZIP de Seleccionadas", key="zip_selected_manual_btn"):
+                    download_selected_barcodes(barcode_format)
+            
+            render_pdf_export(barcode_format, "manual")
+
+def new_entry_id():
+    """Id estable para una entrada nueva de la lista (no cambia al eliminar otras)"""
+    st.session_state.next_entry_id += 1
+    return st.session_state.next_entry_id
+
+def start_preview(labels, barcode_format):
+    """
+    Reemplaza la vista previa por las etiquetas indicadas y las genera en segundo plano
+    
+    Las etiquetas se identifican por 'key': si una etiqueta con la misma clave y los
+    mismos datos ya estaba en la vista previa se reutiliza su SVG y solo se generan
+    las nuevas o modificadas. La selección se conserva para las claves que siguen en
+    la lista. Espera como máximo PREVIEW_FIRST_PAGE_TIMEOUT a que esté lista la
+    primera página; el resto se muestra a medida que se genera.
+    
+    Args:
+        labels (list): Dicts con 'key', 'id', 'code', 'nombre' y 'grau' o 'sexo'
+        barcode_format (str): Formato de código de barras
+    """
+    cancel_preview()
+    generator = get_barcode_generator()
+    previas = {barcode['key']: barcode for barcode in st.session_state.current_barcodes}
+    for label in labels:
+        grau = label.get('grau')
+        firma = (barcode_format, label['code'], label.get('nombre') or None, str(grau) if grau else None,
+                 label.get('sexo') or None)
+        previa = previas.get(label['key'])
+        if previa is not None and previa['firma'] == firma:
+            label['svg'] = previa['svg']
+        label['firma'] = firma
+    
+    claves = {label['key'] for label in labels}
+    st.session_state.selected_barcodes &= claves
+    st.session_state.current_page = 1
+    
+    # SVG compacto con el diseño de la Zebra: la firma son los argumentos de generate_barcode_with_text_svg
+    job = modulo('modules.vista_previa').TrabajoVistaPrevia(
+        labels, lambda label: generator.generate_barcode_with_text_svg(*label['firma']),
+        executor=get_generation_pool()
+    )
+    st.session_state.preview_job = job
+    job.esperar(st.session_state.items_per_page, PREVIEW_FIRST_PAGE_TIMEOUT)
+    st.session_state.current_barcodes = job.etiquetas()
+    if job.terminado:
+        finish_preview()
+
+def finish_preview():
+    """Guarda lo generado por el trabajo de vista previa y el mensaje con su resultado"""
+    job = st.session_state.preview_job
+    st.session_state.preview_job = None
+    barcodes = job.etiquetas()
+    st.session_state.current_barcodes = barcodes
+    st.session_state.selected_barcodes &= {barcode['key'] for barcode in barcodes}
+    
+    if job.error:
+        st.session_state.preview_message = ('error', f"Error generando códigos: {job.error}")
+    elif job.cancelado:
+        st.session_state.preview_message = ('warning', f"Vista previa cancelada: {len(barcodes)} de {job.total} etiquetas")
+    else:
+        st.session_state.preview_message = ('success', f"{job.total} códigos en la vista previa "
+                                                       f"({job.generadas} generados, {job.total - job.generadas} sin cambios)")
+
+def cancel_preview():
+    """Detiene la generación de la vista previa en curso, si hay una"""
+    job = st.session_state.preview_job
+    if job is not None:
+        job.cancelar()
+        st.session_state.preview_job = None
+
+def get_selected_barcodes():
+    """Etiquetas seleccionadas, en el orden de la vista previa"""
+    selected = st.session_state.selected_barcodes
+    return [barcode for barcode in st.session_state.current_barcodes if barcode['key'] in selected]
 
 def generate_manual_preview(entries, barcode_format, format_template):
-    """Genera vista previa desde entradas manuales"""
+    """Genera vista previa desde entradas manuales (solo las etiquetas nuevas o modificadas)"""
     try:
-        with st.spinner("Generando vista previa..."):
-            barcodes = []
-            for idx, entry in enumerate(entries):
-                grau = entry.get('grau', '')
-                nombre = entry.get('nombre', '').upper()
-                
-                # Generar código usando el formato template
-                code = format_template.replace('{}', str(grau))
-                
-                img = st.session_state.barcode_generator.generate_barcode_with_text(
-                    barcode_format,
-                    code,
-                    nombre,
-                    str(grau)
-                )
-                
-                barcodes.append({
-                    'id': idx + 1,
-                    'number': idx + 1,
-                    'code': code,
-                    'nombre': nombre,
-                    'grau': grau,
-                    'image': img
-                })
+        labels = []
+        for idx, entry in enumerate(entries):
+            grau = entry.get('grau', '')
             
-            st.session_state.current_barcodes = barcodes
-            st.success(f"{len(barcodes)} códigos generados correctamente")
+            labels.append({
+                'key': entry['entry_id'],
+                'id': idx + 1,
+                'number': idx + 1,
+                # Generar código usando el formato template
+                'code': format_template.replace('{}', str(grau)),
+                'nombre': entry.get('nombre', '').upper(),
+                'grau': grau,
+            })
+        
+        start_preview(labels, barcode_format)
     except Exception as e:
         st.error(f"Error generando códigos: {str(e)}")
 
 def generate_nexlab_preview(entries, barcode_format):
-    """Genera vista previa desde órdenes Nexlab"""
+    """Genera vista previa desde órdenes Nexlab (solo las etiquetas nuevas o modificadas)"""
     try:
-        with st.spinner("Generando vista previa..."):
-            barcodes = []
-            for idx, entry in enumerate(entries):
-                codigo = entry.get('codigo', '')
-                nombre = entry.get('nombre', '').upper()
-                sexo = entry.get('sexo', '')
-                orden_numero = entry.get('orden_numero', '')
-                
-                # Generar código de barras
-                img = st.session_state.barcode_generator.generate_barcode(
-                    barcode_format,
-                    codigo,
-                    width=2,
-                    height=15
-                )
-                
-                barcodes.append({
-                    'id': idx + 1,
-                    'number': idx + 1,
-                    'code': codigo,
-                    'nombre': nombre,
-                    'sexo': sexo,
-                    'orden_numero': orden_numero,
-                    'image': img
-                })
-            
-            st.session_state.current_barcodes = barcodes
-            st.success(f"{len(barcodes)} códigos generados correctamente")
+        labels = []
+        for idx, entry in enumerate(entries):
+            labels.append({
+                'key': entry['entry_id'],
+                'id': idx + 1,
+                'number': idx + 1,
+                'code': entry.get('codigo', ''),
+                'nombre': entry.get('nombre', '').upper(),
+                'sexo': entry.get('sexo', ''),
+                'orden_numero': entry.get('orden_numero', ''),
+            })
+        
+        start_preview(labels, barcode_format)
     except Exception as e:
         st.error(f"Error generando códigos: {str(e)}")
 
@@ -403,21 +591,23 @@ def render_excel_mode(barcode_format, format_template):
     
     # Upload de archivo
     uploaded_file = st.file_uploader(
-        "Cargar archivo Excel",
-        type=['xlsx', 'xls'],
-        help="Sube un archivo Excel con los datos"
+        "Cargar archivo (Excel, CSV o Parquet)",
+        type=['xlsx', 'xls', 'csv', 'tsv', 'txt', 'parquet'],
+        help="Sube un archivo Excel, CSV/TSV o Parquet con los datos"
     )
     
     if uploaded_file is not None:
         try:
-            # Guardar temporalmente el archivo
-            temp_path = os.path.join("web_app", "temp", uploaded_file.name)
+            # Guardar temporalmente el archivo; el prefijo por contenido evita que dos
+            # estaciones que suben archivos con el mismo nombre se pisen
+            file_bytes = uploaded_file.getvalue()
+            digest = hashlib.sha1(file_bytes).hexdigest()
+            temp_path = os.path.join("web_app", "temp", f"{digest[:12]}_{uploaded_file.name}")
             os.makedirs(os.path.dirname(temp_path), exist_ok=True)
             
             # Asegurar que el archivo se escriba completamente
-            uploaded_file.seek(0)  # Resetear el puntero al inicio
             with open(temp_path, "wb") as f:
-                f.write(uploaded_file.read())
+                f.write(file_bytes)
             
             # Verificar que el archivo se guardó correctamente
             if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
@@ -425,12 +615,10 @@ def render_excel_mode(barcode_format, format_template):
                 return
             
             # Obtener hojas disponibles
-            temp_reader = ExcelWebReader()
-            temp_reader.file_path = temp_path
-            sheet_names = temp_reader.get_sheet_names()
+            sheet_names = get_sheet_names(digest, temp_path)
         except Exception as e:
             st.error(f"Error cargando Excel: {str(e)}")
-            st.info("Verifica que el archivo sea un Excel válido (.xlsx o .xls)")
+            st.info("Verifica que el archivo sea válido (.xlsx, .xls, .csv, .tsv o .parquet)")
             return
         
         # Selector de hoja de Excel
@@ -457,11 +645,15 @@ def render_excel_mode(barcode_format, format_template):
         )
         
         # Cargar Excel con fila de encabezado personalizada
-        if st.session_state.excel_reader.load_excel_with_header(temp_path, header_row - 1, selected_sheet):
-            st.success(f"Archivo Excel cargado correctamente - Hoja: {selected_sheet}")
+        reader = load_shared_table(digest, temp_path, header_row - 1, selected_sheet)
+        if reader is not None:
+            if selected_sheet:
+                st.success(f"Archivo Excel cargado correctamente - Hoja: {selected_sheet}")
+            else:
+                st.success(f"Archivo cargado correctamente: {uploaded_file.name}")
             
             # Obtener columnas disponibles
-            columns = st.session_state.excel_reader.get_available_columns()
+            columns = reader.get_available_columns()
             
             st.subheader("Selecciona las columnas")
             
@@ -491,15 +683,47 @@ def render_excel_mode(barcode_format, format_template):
                     'grau': grau_col
                 }
                 
-                data = st.session_state.excel_reader.get_data_with_config(config)
+                # Reutilizar los registros mientras no cambie el archivo ni la configuración
+                data_key = (digest, selected_sheet, header_row,
+                            nombre_col, grau_col, barcode_format)
+                cached = st.session_state.excel_data
+                if cached and cached['key'] == data_key:
+                    report = cached['report']
+                else:
+                    # Validar y normalizar GRAU antes de generar cualquier imagen
+                    records = reader.get_data_with_config(config)
+                    validador = modulo('modules.validacion_web').ValidadorCodigos()
+                    report = validador.validate_records(records, grau_col, barcode_format,
+                                                        header_row=header_row - 1)
+                    st.session_state.excel_data = {'key': data_key, 'report': report}
+                data = report.records
+                
+                if report.rejected:
+                    st.warning(
+                        f"{report.rejected_count} de {report.total} registros rechazados "
+                        f"(GRAU inválido, vacío o duplicado). No se generarán."
+                    )
+                    with st.expander("Ver registros rechazados"):
+                        st.dataframe(report.to_dataframe(), hide_index=True)
                 
                 if data:
                     # Mostrar preview visual de cada orden
                     st.info(f"Total de registros encontrados: **{len(data)}**")
                     
+                    if st.button("Guardar mapeo para carpeta vigilada", key="save_mapping_btn"):
+                        modulo('modules.carpeta_vigilada').save_mapping(MAPPING_FILE, {
+                            'nombre': nombre_col,
+                            'grau': grau_col,
+                            'header_row': header_row - 1,
+                            'sheet_name': selected_sheet,
+                            'barcode_format': barcode_format,
+                            'copies': 2 if st.session_state.print_double else 1
+                        })
+                        st.success(f"Mapeo guardado en {MAPPING_FILE}")
+                    
                     # Tabla completa expandible
                     with st.expander("Ver tabla completa"):
-                        st.dataframe(data)
+                        st.dataframe(data.to_dataframe())
                     
                     # Selección de filas
                     st.subheader("Seleccionar Registros")
@@ -527,9 +751,18 @@ def render_excel_mode(barcode_format, format_template):
                     if selected_indices:
                         st.info(f"Seleccionados: **{len(selected_indices)}** registros")
                         
-                        # Botón de vista previa
-                        if st.button("Vista Previa", key="excel_preview_btn"):
-                            generate_excel_preview(data, selected_indices, config, barcode_format)
+                        col_preview, col_print = st.columns(2)
+                        
+                        with col_preview:
+                            # Botón de vista previa (muestra si la selección es grande)
+                            if st.button("Vista Previa", key="excel_preview_btn"):
+                                generate_excel_preview(data, selected_indices, config, barcode_format,
+                                                       f"{digest[:12]}-{selected_sheet}-{header_row}")
+                        
+                        with col_print:
+                            # Impresión directa a ZPL, sin generar imágenes
+                            if st.button("Imprimir sin Vista Previa", key="excel_direct_print_btn"):
+                                print_excel_barcodes(data, selected_indices, config, barcode_format)
         
         # Limpiar archivo temporal
         try:
@@ -549,47 +782,112 @@ def render_excel_mode(barcode_format, format_template):
             st.markdown("---")
             st.subheader("Acciones con Seleccionadas")
             
-            if st.button("Imprimir Seleccionadas", key="print_selected_btn"):
-                print_selected_barcodes(barcode_format)
+            col_print, col_download = st.columns(2)
+            
+            with col_print:
+                if st.button("Imprimir Seleccionadas", key="print_selected_btn"):
+                    print_selected_barcodes(barcode_format)
+            
+            with col_download:
+                if st.button("Preparar ZIP de Seleccionadas", key="zip_selected_excel_btn"):
+                    download_selected_barcodes(barcode_format)
+            
+            render_pdf_export(barcode_format, "excel")
 
-def generate_excel_preview(data, selected_indices, config, barcode_format):
-    """Genera vista previa desde datos Excel"""
+def generate_excel_preview(data, selected_indices, config, barcode_format, origen):
+    """
+    Genera vista previa desde datos Excel
+    
+    Args:
+        data: Registros validados del Excel
+        selected_indices (list): Filas seleccionadas
+        config (dict): Columnas de nombre y GRAU
+        barcode_format (str): Formato de código de barras
+        origen (str): Archivo, hoja y fila de encabezado; junto con la fila original, el mapeo y el
+                      formato forma la clave de cada etiqueta, para que la selección no pase a otra fila
+    """
     try:
-        with st.spinner("Generando vista previa desde Excel..."):
-            barcodes = []
-            for idx in selected_indices:
-                row = data[idx]
-                
-                # Obtener valores
-                nombre = row.get(config.get('nombre'), '') if config.get('nombre') else ''
-                grau = row.get(config.get('grau'), '') if config.get('grau') else ''
-                
-                # Generar código con formato grau.01
-                code = f"{grau}.01" if grau else f"{idx+1}.01"
-                
-                img = st.session_state.barcode_generator.generate_barcode_with_text(
-                    barcode_format,
-                    code,
-                    nombre,
-                    str(grau)
-                )
-                
-                barcodes.append({
-                    'id': idx + 1,
-                    'number': idx + 1,
-                    'code': code,
-                    'nombre': nombre,
-                    'grau': grau,
-                    'image': img
-                })
+        # En selecciones grandes solo se muestran las primeras y últimas filas
+        preview_indices = sample_indices(selected_indices, PREVIEW_SAMPLE_LIMIT)
+        if len(preview_indices) < len(selected_indices):
+            st.info(
+                f"Vista previa de {len(preview_indices)} de {len(selected_indices)} registros "
+                f"(primeros y últimos). Usa \"Imprimir sin Vista Previa\" para imprimir todos."
+            )
+        
+        clave_etiqueta = modulo('modules.validacion_web').clave_etiqueta
+        labels = []
+        nombres = data.column(config.get('nombre'))
+        graus = data.column(config.get('grau'))
+        for idx in preview_indices:
+            # Obtener valores
+            nombre = nombres[idx]
+            grau = graus[idx]
             
-            st.session_state.current_barcodes = barcodes
-            st.success(f"{len(barcodes)} códigos generados desde Excel")
+            labels.append({
+                # Fila original de la planilla (no la posición entre los válidos) + origen, mapeo y formato:
+                # al cambiar la selección solo se generan las filas nuevas
+                'key': clave_etiqueta(origen, data.index[idx], config, barcode_format),
+                'id': idx + 1,
+                'number': idx + 1,
+                # Generar código con formato grau.01
+                'code': f"{grau}.01" if grau else f"{idx+1}.01",
+                'nombre': nombre,
+                'grau': grau,
+            })
+        
+        start_preview(labels, barcode_format)
     except Exception as e:
         st.error(f"Error generando códigos: {str(e)}")
 
+def change_preview_page():
+    """Cambia la página de la vista previa al mover el selector de página"""
+    st.session_state.current_page = st.session_state.preview_page
+
+def toggle_selection(key, select_key):
+    """Agrega o quita una etiqueta de selected_barcodes al cambiar su selector"""
+    if st.session_state[select_key] == 1:
+        st.session_state.selected_barcodes.add(key)
+    else:
+        st.session_state.selected_barcodes.discard(key)
+
 def display_preview(filter_range=None):
-    """Muestra la vista previa de códigos con búsqueda y selección"""
+    """Muestra la vista previa; mientras se genera en segundo plano se actualiza sola"""
+    if st.session_state.preview_job is not None:
+        display_preview_progress()
+        return
+    
+    message = st.session_state.preview_message
+    if message:
+        kind, text = message
+        getattr(st, kind)(text)
+        st.session_state.preview_message = None
+    display_preview_grid()
+
+@st.fragment(run_every=PREVIEW_POLL_SECONDS)
+def display_preview_progress():
+    """Avance de la generación con opción de cancelar, y las etiquetas ya listas"""
+    job = st.session_state.preview_job
+    if job is None:
+        return
+    if job.terminado:
+        # Recargar la página completa: muestra las acciones y deja de consultar el avance
+        finish_preview()
+        st.rerun()
+    
+    st.session_state.current_barcodes = job.etiquetas()
+    col_progress, col_cancel = st.columns([4, 1])
+    with col_progress:
+        st.progress(job.listas / job.total, text=f"Generando vista previa... {job.listas}/{job.total}")
+    with col_cancel:
+        if st.button("Cancelar", key="cancel_preview_btn"):
+            job.cancelar()
+            finish_preview()
+            st.rerun()
+    display_preview_grid()
+
+def display_preview_grid():
+    """Muestra la vista previa de códigos con búsqueda, selección y páginas"""
     barcodes = st.session_state.current_barcodes
     
     if not barcodes:
@@ -611,18 +909,18 @@ def display_preview(filter_range=None):
     
     with col2:
         if st.button("Seleccionar Todo"):
-            # Seleccionar todos los índices filtrados
+            # Seleccionar todas las etiquetas filtradas
             barcodes_to_select = []
             if search_text.strip():
                 search_lower = search_text.lower().strip()
-                for idx, barcode in enumerate(barcodes):
+                for barcode in barcodes:
                     if (search_lower in str(barcode.get('id', '')).lower() or
                         search_lower in str(barcode.get('code', '')).lower() or
                         search_lower in str(barcode.get('nombre', '')).lower() or
                         search_lower in str(barcode.get('grau', '')).lower()):
-                        barcodes_to_select.append(idx)
+                        barcodes_to_select.append(barcode['key'])
             else:
-                barcodes_to_select = list(range(len(barcodes)))
+                barcodes_to_select = [barcode['key'] for barcode in barcodes]
             st.session_state.selected_barcodes = set(barcodes_to_select)
             st.rerun()
     
@@ -633,6 +931,7 @@ def display_preview(filter_range=None):
     
     with col4:
         if st.button("Limpiar Vista"):
+            cancel_preview()
             st.session_state.current_barcodes = []
             st.session_state.selected_barcodes = set()
             st.session_state.search_filter = ""
@@ -654,8 +953,17 @@ def display_preview(filter_range=None):
     
     total_filtered = len(barcodes_to_show)
     
-    # Mostrar todas las etiquetas sin paginación
-    current_page_items = barcodes_to_show
+    # Paginar: solo se dibujan las etiquetas de la página actual
+    page_size = st.session_state.items_per_page
+    total_pages = max(1, -(-total_filtered // page_size))
+    if st.session_state.current_page > total_pages:
+        st.session_state.current_page = total_pages
+    if total_pages > 1:
+        st.session_state.preview_page = st.session_state.current_page
+        st.number_input(f"Página (de {total_pages}):", min_value=1, max_value=total_pages, step=1,
+                        key="preview_page", on_change=change_preview_page)
+    start = (st.session_state.current_page - 1) * page_size
+    current_page_items = barcodes_to_show[start:start + page_size]
     
     # Mostrar contador
     if search_text.strip():
@@ -678,34 +986,25 @@ def display_preview(filter_range=None):
                     # ID y selector
                     st.markdown(f"**ID: {barcode.get('id', idx+1)}**")
                     
-                    # Input simple de selección (0 o 1)
-                    select_key = f"select_{idx}"
-                    
-                    # Si el valor no está en session_state para esta key, inicializarlo
-                    if select_key not in st.session_state:
-                        st.session_state[select_key] = 1 if idx in st.session_state.selected_barcodes else 0
+                    # Input simple de selección (0 o 1), atado a la clave estable de la etiqueta
+                    select_key = f"select_{barcode['key']}"
                     
                     # Sincronizar el valor del widget con selected_barcodes
-                    st.session_state[select_key] = 1 if idx in st.session_state.selected_barcodes else 0
+                    st.session_state[select_key] = 1 if barcode['key'] in st.session_state.selected_barcodes else 0
                     
-                    selected = st.number_input(
+                    st.number_input(
                         "Seleccionar:",
                         min_value=0,
                         max_value=1,
-                        value=st.session_state[select_key],
                         step=1,
                         key=select_key,
-                        help="0 = No seleccionar, 1 = Seleccionar"
+                        help="0 = No seleccionar, 1 = Seleccionar",
+                        on_change=toggle_selection,
+                        args=(barcode['key'], select_key)
                     )
                     
-                    # Agregar/quitar de selected_barcodes según el valor
-                    if selected == 1:
-                        st.session_state.selected_barcodes.add(idx)
-                    else:
-                        st.session_state.selected_barcodes.discard(idx)
-                    
                     # Imagen de la etiqueta
-                    st.image(barcode['image'], use_container_width=True)
+                    st.image(barcode['svg'], use_container_width=True)
                     
                     # Información de la etiqueta
                     st.caption(f"Código: {barcode['code']}")
@@ -714,10 +1013,17 @@ def display_preview(filter_range=None):
                     if 'grau' in barcode and barcode['grau']:
                         st.caption(f"GRAU: {barcode['grau']}")
 
-def print_excel_barcodes(data, selected_indices, config, barcode_format):
-    """Imprime códigos desde Excel"""
+def print_label_stream(labels, total, barcode_format):
+    """
+    Imprime un flujo de etiquetas en lotes ZPL mostrando el avance
+    
+    Args:
+        labels: Iterable de dicts con 'code', 'nombre' y opcionalmente 'grau'/'sexo'
+        total (int): Número de etiquetas distintas
+        barcode_format (str): Formato de código de barras
+    """
     try:
-        printer = st.session_state.zebra_printer
+        printer = get_session_printer()
         
         if not printer.printer_name:
             st.error("No hay impresora seleccionada")
@@ -725,162 +1031,146 @@ def print_excel_barcodes(data, selected_indices, config, barcode_format):
         
         # Determinar cuántas veces imprimir cada código
         copies = 2 if st.session_state.print_double else 1
-        total_prints = len(selected_indices) * copies
+        total_prints = total * copies
         
-        with st.spinner(f"Imprimiendo {total_prints} etiquetas ({len(selected_indices)} códigos x {copies})..."):
-            success_count = 0
-            for idx in selected_indices:
-                row = data[idx]
-                
-                nombre = row.get(config.get('nombre'), '') if config.get('nombre') else ''
-                grau = row.get(config.get('grau'), '') if config.get('grau') else ''
-                
-                code = f"{grau}.01" if grau else f"{idx+1}.01"
-                
-                # Imprimir las copias necesarias
-                for copy in range(copies):
-                    if printer.print_barcode_with_text(code, barcode_format, nombre, str(grau)):
-                        success_count += 1
-            
-            if success_count == total_prints:
-                st.success(f"{success_count} etiquetas impresas correctamente ({len(selected_indices)} códigos x {copies})")
-            else:
-                st.warning(f"Se imprimieron {success_count} de {total_prints} etiquetas")
+        progress = st.progress(0.0, text=f"Imprimiendo {total_prints} etiquetas ({total} códigos x {copies})...")
+        
+        def on_progress(printed, failed):
+            done = printed + failed
+            progress.progress(done / total if total else 1.0, text=f"Enviadas {done} de {total} etiquetas")
+        
+        batches = iter_zpl_batches(printer, labels, barcode_format, copies, PRINT_BATCH_SIZE)
+        printed, failed = print_stream(printer, batches, on_progress)
+        progress.empty()
+        
+        success_count = printed * copies
+        if not failed:
+            st.success(f"{success_count} etiquetas impresas correctamente ({total} códigos x {copies})")
+        else:
+            st.warning(f"Se imprimieron {success_count} de {total_prints} etiquetas")
     except Exception as e:
         st.error(f"Error imprimiendo: {str(e)}")
 
+def print_excel_barcodes(data, selected_indices, config, barcode_format):
+    """Imprime códigos desde Excel directamente en ZPL, sin vista previa"""
+    labels = iter_label_fields(data, config, selected_indices)
+    print_label_stream(labels, len(selected_indices), barcode_format)
+
 def print_selected_barcodes(barcode_format):
     """Imprime solo las etiquetas seleccionadas"""
+    selected = get_selected_barcodes()
+    
+    if not selected:
+        st.warning("No hay etiquetas seleccionadas")
+        return
+    
+    print_label_stream(selected, len(selected), barcode_format)
+
+def print_selected_nexlab_barcodes(barcode_format):
+    """Imprime solo las etiquetas seleccionadas de Nexlab (incluye sexo)"""
+    print_selected_barcodes(barcode_format)
+
+def _png_bytes(barcode_format, barcode):
+    """Genera el PNG de una etiqueta de la vista previa (la vista previa solo guarda el SVG)"""
+    img = get_barcode_generator().generate_barcode_with_text(
+        barcode_format, barcode['code'], barcode.get('nombre') or None, barcode.get('grau') or None,
+        barcode.get('sexo') or None
+    )
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def download_selected_barcodes(barcode_format):
+    """Prepara un ZIP con las etiquetas seleccionadas y muestra el botón de descarga"""
     try:
-        printer = st.session_state.zebra_printer
+        selected = get_selected_barcodes()
         
-        if not printer.printer_name:
-            st.error("No hay impresora seleccionada")
-            return
-        
-        selected_indices = sorted(list(st.session_state.selected_barcodes))
-        barcodes = st.session_state.current_barcodes
-        
-        if not selected_indices:
+        if not selected:
             st.warning("No hay etiquetas seleccionadas")
             return
         
-        # Determinar cuántas veces imprimir cada código
         copies = 2 if st.session_state.print_double else 1
-        total_prints = len(selected_indices) * copies
+        total = len(selected)
+        progress_bar = st.progress(0.0, text="Preparando ZIP...")
         
-        with st.spinner(f"Imprimiendo {total_prints} etiquetas ({len(selected_indices)} códigos x {copies})..."):
-            success_count = 0
-            for idx in selected_indices:
-                barcode = barcodes[idx]
-                
-                code = barcode.get('code', '')
-                nombre = barcode.get('nombre', '')
-                grau = str(barcode.get('grau', ''))
-                
-                # Imprimir las copias necesarias
-                for copy in range(copies):
-                    if printer.print_barcode_with_text(code, barcode_format, nombre, grau):
-                        success_count += 1
-            
-            if success_count == total_prints:
-                st.success(f"{success_count} etiquetas impresas correctamente ({len(selected_indices)} códigos x {copies})")
-            else:
-                st.warning(f"Se imprimieron {success_count} de {total_prints} etiquetas")
-    except Exception as e:
-        st.error(f"Error imprimiendo: {str(e)}")
-
-def print_selected_nexlab_barcodes(barcode_format):
-    """Imprime solo las etiquetas seleccionadas de Nexlab"""
-    try:
-        printer = st.session_state.zebra_printer
+        def on_progress(hechas):
+            progress_bar.progress(min(1.0, hechas / total), text=f"Preparando ZIP... {hechas}/{total}")
         
-        if not printer.printer_name:
-            st.error("No hay impresora seleccionada")
-            return
+        # Cada PNG se escribe en el ZIP apenas se genera; si el ZIP crece pasa de memoria a disco
+        with tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_BYTES) as spool:
+            escribir_zip(spool, selected, partial(_png_bytes, barcode_format), copies, 'png', get_generation_pool(),
+                         lote=ZIP_TASK_SIZE, on_progress=on_progress)
+            size = spool.tell()
+            if size > DESCARGA_MAX_BYTES:
+                progress_bar.empty()
+                st.error(f"El ZIP ocupa {size / 1024 / 1024:.0f} MB y supera el límite de "
+                         f"{DESCARGA_MAX_BYTES // 1024 // 1024} MB de la app. "
+                         "Selecciona menos etiquetas o usa imprimir_lote.py --zip")
+                return
+            spool.seek(0)
+            data = spool.read()
+        progress_bar.empty()
         
-        selected_indices = sorted(list(st.session_state.selected_barcodes))
-        barcodes = st.session_state.current_barcodes
+        st.download_button(
+            label="Descargar ZIP de Seleccionadas",
+            data=data,
+            file_name=f"barcodes_seleccionadas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+            mime="application/zip",
+            key="download_selected_zip"
+        )
         
-        if not selected_indices:
-            st.warning("No hay etiquetas seleccionadas")
+        copias = f" (x{copies} copias c/u en {MANIFEST_NAME})" if copies > 1 else ""
+        st.success(f"ZIP preparado con {total} etiquetas{copias}")
+    except Exception as e:
+        st.error(f"Error preparando descarga: {str(e)}")
+
+def render_pdf_export(barcode_format, key_prefix):
+    """Exporta las etiquetas seleccionadas a un PDF de hojas con varias etiquetas (impresora láser)"""
+    exportar_pdf = modulo('modules.exportar_pdf')
+    with st.expander("📄 Exportar PDF para impresora láser (si la Zebra no está disponible)"):
+        plantilla = st.selectbox(
+            "Hoja de etiquetas:",
+            list(exportar_pdf.PLANTILLAS_HOJA),
+            key=f"{key_prefix}_pdf_plantilla"
+        )
+        if not st.button("Generar PDF de Seleccionadas", key=f"{key_prefix}_pdf_btn"):
             return
         
-        # Determinar cuántas veces imprimir cada código
+        selected = get_selected_barcodes()
         copies = 2 if st.session_state.print_double else 1
-        total_prints = len(selected_indices) * copies
+        total = len(selected) * copies
+        progress_bar = st.progress(0.0, text="Generando PDF...")
         
-        with st.spinner(f"Imprimiendo {total_prints} etiquetas ({len(selected_indices)} códigos x {copies})..."):
-            success_count = 0
-            for idx in selected_indices:
-                barcode = barcodes[idx]
-                
-                code = barcode.get('code', '')
-                nombre = barcode.get('nombre', '')
-                sexo = barcode.get('sexo', '')
-                
-                # Imprimir las copias necesarias
-                for copy in range(copies):
-                    # Generar ZPL con sexo incluido
-                    zpl = printer.generate_zpl(code, barcode_format, nombre=nombre, grau=None, sexo=sexo)
-                    if printer.send_to_printer(zpl):
-                        success_count += 1
-            
-            if success_count == total_prints:
-                st.success(f"✅ {success_count} etiquetas impresas correctamente ({len(selected_indices)} códigos x {copies})")
-            else:
-                st.warning(f"⚠️ Se imprimieron {success_count} de {total_prints} etiquetas")
-    except Exception as e:
-        st.error(f"❌ Error imprimiendo: {str(e)}")
-
-def download_selected_barcodes(barcode_format):
-    """Descarga solo las etiquetas seleccionadas como ZIP"""
-    try:
-        selected_indices = sorted(list(st.session_state.selected_barcodes))
-        barcodes = st.session_state.current_barcodes
+        def on_progress(colocadas):
+            progress_bar.progress(min(1.0, colocadas / total), text=f"Generando PDF... {colocadas}/{total}")
         
-        if not selected_indices:
-            st.warning("No hay etiquetas seleccionadas")
+        try:
+            bar_runs = partial(get_barcode_generator().get_bar_runs, barcode_format)
+            with tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_BYTES) as spool:
+                colocadas, paginas = exportar_pdf.escribir_pdf(spool, selected, bar_runs, plantilla, copies, on_progress)
+                size = spool.tell()
+                if size > DESCARGA_MAX_BYTES:
+                    progress_bar.empty()
+                    st.error(f"El PDF ocupa {size / 1024 / 1024:.0f} MB y supera el límite de "
+                             f"{DESCARGA_MAX_BYTES // 1024 // 1024} MB de la app. "
+                             "Selecciona menos etiquetas o usa imprimir_lote.py --pdf")
+                    return
+                spool.seek(0)
+                data = spool.read()
+        except Exception as e:
+            progress_bar.empty()
+            st.error(f"Error generando PDF: {str(e)}")
             return
+        progress_bar.empty()
         
-        with st.spinner("Preparando descarga..."):
-            zip_buffer = io.BytesIO()
-            copies = 2 if st.session_state.print_double else 1
-            
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for idx in selected_indices:
-                    barcode = barcodes[idx]
-                    
-                    code = barcode.get('code', '')
-                    nombre = barcode.get('nombre', '')
-                    img = barcode.get('image')
-                    
-                    if img:
-                        # Convertir imagen a bytes
-                        img_buffer = io.BytesIO()
-                        img.save(img_buffer, format='PNG')
-                        img_bytes = img_buffer.getvalue()
-                        
-                        # Agregar al ZIP (duplicado si es necesario)
-                        safe_name = nombre.replace(' ', '_').replace('/', '_')[:50] if nombre else f"etiqueta_{idx+1}"
-                        for copy in range(copies):
-                            suffix = f"_copia{copy+1}" if copies > 1 else ""
-                            zip_file.writestr(f"barcode_ID{barcode.get('id', idx+1)}_{safe_name}_{code}{suffix}.png", img_bytes)
-            
-            zip_buffer.seek(0)
-            
-            # Descargar
-            st.download_button(
-                label="Descargar ZIP de Seleccionadas",
-                data=zip_buffer,
-                file_name=f"barcodes_seleccionadas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
-                mime="application/zip",
-                key="download_selected_zip"
-            )
-            
-            st.success(f"ZIP preparado con {len(selected_indices)} etiquetas (x{copies} copias c/u)")
-    except Exception as e:
-        st.error(f"Error preparando descarga: {str(e)}")
+        st.download_button(
+            label=f"Descargar PDF ({paginas} hojas)",
+            data=data,
+            file_name=f"etiquetas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+            mime="application/pdf",
+            key=f"{key_prefix}_pdf_download"
+        )
+        st.success(f"PDF con {colocadas} etiquetas en {paginas} hojas ({len(data) / 1024:.0f} KB)")
 
 def parse_range_string(range_str, max_value):
     """
@@ -912,17 +1202,111 @@ def parse_range_string(range_str, max_value):
     
     return sorted(list(indices))
 
+def add_nexlab_entry(orden_data):
+    """
+    Agrega una orden Nexlab a la lista si aún no está
+    
+    Args:
+        orden_data (dict): Datos de la orden (de buscar_orden/buscar_ordenes)
+        
+    Returns:
+        bool: True si se agregó, False si ya estaba en la lista
+    """
+    # Verificar si ya está en la lista
+    # Comparar como texto: la réplica local guarda el número como texto
+    ya_existe = any(str(entry['orden_numero']) == str(orden_data['numero_orden'])
+                   for entry in st.session_state.nexlab_entries)
+    if ya_existe:
+        return False
+    
+    # Generar datos de la etiqueta
+    etiqueta_data = get_nexlab().generar_etiqueta_texto(orden_data)
+    
+    st.session_state.nexlab_entries.append({
+        'entry_id': new_entry_id(),
+        'orden_numero': orden_data['numero_orden'],
+        'codigo': etiqueta_data['codigo'],
+        'nombre': etiqueta_data['nombre'],
+        'sexo': etiqueta_data['sexo'],
+        'fecha': etiqueta_data['fecha'],
+        'estado': orden_data['estado']
+    })
+    return True
+
+@st.fragment(run_every=PREVIEW_POLL_SECONDS)
+def display_nexlab_consulta():
+    """Espera de la búsqueda de orden en curso, sin bloquear la página, con opción de cancelar"""
+    consulta = st.session_state.nexlab_consulta
+    if consulta is None:
+        return
+    ordenes_nexlab = modulo('modules.ordenes_nexlab')
+    if not consulta.listo() and consulta.transcurrido() < ordenes_nexlab.RESPUESTA_TIMEOUT:
+        col_estado, col_cancel = st.columns([4, 1])
+        with col_estado:
+            st.info(f"🔍 Buscando orden {consulta.numero_orden}... ({consulta.transcurrido():.0f} s)")
+        with col_cancel:
+            if st.button("Cancelar", key="cancel_nexlab_btn"):
+                consulta.cancelar()
+                st.session_state.nexlab_consulta = None
+                st.session_state.nexlab_mensajes = [('info', f"Búsqueda de la orden {consulta.numero_orden} cancelada")]
+                st.rerun()
+        return
+    
+    # Terminó o venció la espera: el resultado se muestra con la página completa (lista actualizada)
+    st.session_state.nexlab_consulta = None
+    resultado = consulta.resultado(timeout=0)
+    mensajes = []
+    if resultado['estado'] == ordenes_nexlab.ESTADO_ENCONTRADA:
+        orden = resultado['orden']
+        if add_nexlab_entry(orden):
+            mensajes.append(('success', f"✅ Orden {orden['numero_orden']} agregada a la lista"))
+        else:
+            mensajes.append(('warning', f"⚠️ La orden {orden['numero_orden']} ya está en la lista"))
+    elif resultado['estado'] == ordenes_nexlab.ESTADO_NO_ENCONTRADA:
+        mensajes.append(('error', f"❌ {resultado['mensaje']}"))
+        mensajes.append(('info', "Verifica que el número de orden sea correcto"))
+    elif resultado['estado'] == ordenes_nexlab.ESTADO_TIMEOUT:
+        mensajes.append(('error', f"⏱️ {resultado['mensaje']}"))
+        mensajes.append(('info', "La base de datos está lenta o no disponible. Intenta nuevamente en unos segundos."))
+    elif resultado['estado'] == ordenes_nexlab.ESTADO_ERROR:
+        mensajes.append(('error', f"❌ {resultado['mensaje']}"))
+    elif resultado['estado'] == ordenes_nexlab.ESTADO_CANCELADA:
+        mensajes.append(('info', f"Búsqueda de la orden {consulta.numero_orden} cancelada"))
+    st.session_state.nexlab_mensajes = mensajes
+    st.rerun()
+
 def render_nexlab_mode(barcode_format):
     """Renderiza el modo de búsqueda de órdenes Nexlab"""
     
+    # Importación diferida: pyodbc solo se carga al usar este modo
+    ordenes_nexlab = modulo('modules.ordenes_nexlab')
+    
     st.header("Búsqueda de Órdenes - Nexlab")
     
     # Inicializar lista de órdenes Nexlab en session_state
     if 'nexlab_entries' not in st.session_state:
         st.session_state.nexlab_entries = []
+    if 'nexlab_consulta' not in st.session_state:
+        # Búsqueda de orden en curso (ConsultaOrden) y mensajes de la última que terminó
+        st.session_state.nexlab_consulta = None
+        st.session_state.nexlab_mensajes = []
+    if 'nexlab_recientes' not in st.session_state:
+        st.session_state.nexlab_recientes = []
+        st.session_state.nexlab_recientes_cursor = None
+        st.session_state.nexlab_recientes_fin = False
     
     st.subheader("Buscar y Agregar Órdenes")
     
+    # Retraso de la réplica local de órdenes
+    replica = get_nexlab().estado_replica()
+    if replica.get('retraso_s') is not None:
+        st.caption(
+            f"Réplica local: {replica['ordenes']} órdenes, actualizada hace {replica['retraso_s']:.0f} s "
+            f"(hasta {replica['marca_agua']})"
+        )
+    elif replica.get('ultimo_error'):
+        st.caption("Réplica local sin sincronizar: las búsquedas se hacen directo en la base de datos")
+    
     col1, col2 = st.columns([3, 1])
     
     with col1:
@@ -938,41 +1322,118 @@ def render_nexlab_mode(barcode_format):
         st.write("")  # Espaciador
         buscar_btn = st.button("🔍 Buscar y Agregar", type="primary", use_container_width=True)
     
-    # Procesar búsqueda
-    if buscar_btn and numero_orden:
-        with st.spinner(f"Buscando orden {numero_orden}..."):
-            exito, resultado = st.session_state.ordenes_nexlab.buscar_orden(numero_orden)
-            
-            if exito:
-                # Generar datos de la etiqueta
-                etiqueta_data = st.session_state.ordenes_nexlab.generar_etiqueta_texto(resultado)
-                
-                # Verificar si ya está en la lista
-                ya_existe = any(entry['orden_numero'] == resultado['numero_orden'] 
-                               for entry in st.session_state.nexlab_entries)
-                
-                if not ya_existe:
-                    # Agregar a la lista
-                    st.session_state.nexlab_entries.append({
-                        'orden_numero': resultado['numero_orden'],
-                        'codigo': etiqueta_data['codigo'],
-                        'nombre': etiqueta_data['nombre'],
-                        'sexo': etiqueta_data['sexo'],
-                        'fecha': etiqueta_data['fecha'],
-                        'estado': resultado['estado']
-                    })
-                    st.success(f"✅ Orden {resultado['numero_orden']} agregada a la lista")
-                    st.rerun()
-                else:
-                    st.warning(f"⚠️ La orden {resultado['numero_orden']} ya está en la lista")
-            
-            else:
-                st.error(f"❌ {resultado}")
-                st.info("Verifica que el número de orden sea correcto")
+    forzar = st.checkbox(
+        "Forzar actualización desde la base de datos",
+        key="nexlab_forzar",
+        help="Ignora los datos guardados en caché de búsquedas anteriores"
+    )
     
+    # Procesar búsqueda: corre en el pool de trabajo y la página sigue respondiendo mientras tanto
+    if buscar_btn and numero_orden:
+        # Una búsqueda nueva reemplaza a la anterior que siga en curso
+        consulta_previa = st.session_state.nexlab_consulta
+        if consulta_previa is not None and not consulta_previa.listo():
+            consulta_previa.cancelar()
+        st.session_state.nexlab_consulta = get_nexlab().buscar_orden_async(numero_orden, forzar=forzar)
     elif buscar_btn and not numero_orden:
         st.warning("⚠️ Por favor ingresa un número de orden")
     
+    # El fragmento que consulta el avance solo se monta mientras hay una búsqueda en curso
+    if st.session_state.nexlab_consulta is not None:
+        display_nexlab_consulta()
+    for kind, text in st.session_state.nexlab_mensajes:
+        getattr(st, kind)(text)
+    st.session_state.nexlab_mensajes = []
+    
+    # Búsqueda de varias órdenes en una sola consulta
+    with st.expander("Agregar varias órdenes (pegar lista o rango)"):
+        bulk_text = st.text_area(
+            "Órdenes:",
+            key="nexlab_bulk_input",
+            placeholder="Ejemplo: 1622485-1622520, 1622600",
+            help="Separa con comas, espacios o saltos de línea. Usa guion para rangos."
+        )
+        if st.button("🔍 Buscar y Agregar Todas", key="nexlab_bulk_btn"):
+            if not bulk_text.strip():
+                st.warning("⚠️ Por favor ingresa al menos un número de orden")
+            else:
+                with st.spinner("Buscando órdenes..."):
+                    exito, resultado = get_nexlab().buscar_ordenes(bulk_text, forzar=forzar)
+                
+                if exito:
+                    agregadas = sum(1 for orden in resultado.values() if orden and add_nexlab_entry(orden))
+                    no_encontradas = [numero for numero, orden in resultado.items() if orden is None]
+                    
+                    if no_encontradas:
+                        listado = ', '.join(no_encontradas[:50]) + (' ...' if len(no_encontradas) > 50 else '')
+                        st.warning(f"⚠️ No se encontraron {len(no_encontradas)} órdenes: {listado}")
+                    if agregadas:
+                        st.success(f"✅ {agregadas} órdenes agregadas a la lista")
+                        if not no_encontradas:
+                            st.rerun()
+                    elif not no_encontradas:
+                        st.info("Las órdenes ya estaban en la lista")
+                else:
+                    st.error(f"❌ {resultado}")
+
+    # Listado paginado de órdenes recientes
+    with st.expander("Órdenes recientes"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            fecha_desde = st.date_input("Desde:", value=None, key="nexlab_recientes_desde")
+        with col2:
+            fecha_hasta = st.date_input("Hasta:", value=None, key="nexlab_recientes_hasta")
+        with col3:
+            estado_filtro = st.text_input("Estado:", key="nexlab_recientes_estado")
+
+        filtros = {
+            'desde': datetime.combine(fecha_desde, datetime.min.time()) if fecha_desde else None,
+            'hasta': datetime.combine(fecha_hasta + timedelta(days=1), datetime.min.time()) if fecha_hasta else None,
+            'estado': estado_filtro.strip() or None,
+        }
+        # Al cambiar los filtros se vuelve a la primera página
+        if st.session_state.get('nexlab_recientes_filtros') != filtros:
+            st.session_state.nexlab_recientes_filtros = filtros
+            st.session_state.nexlab_recientes = []
+            st.session_state.nexlab_recientes_cursor = None
+            st.session_state.nexlab_recientes_fin = False
+
+        cargar = st.button(
+            "Cargar más" if st.session_state.nexlab_recientes else "Cargar órdenes",
+            key="nexlab_recientes_btn",
+            disabled=st.session_state.nexlab_recientes_fin
+        )
+        if cargar:
+            with st.spinner("Cargando órdenes..."):
+                exito, pagina = get_nexlab().listar_ordenes_pagina(
+                    tamano=RECENT_ORDERS_PAGE_SIZE,
+                    despues_de=st.session_state.nexlab_recientes_cursor,
+                    **filtros
+                )
+            if exito:
+                st.session_state.nexlab_recientes.extend(pagina['ordenes'])
+                st.session_state.nexlab_recientes_cursor = pagina['siguiente']
+                st.session_state.nexlab_recientes_fin = pagina['siguiente'] is None
+                st.rerun()
+            else:
+                st.error(f"❌ {pagina}")
+
+        for idx, orden in enumerate(st.session_state.nexlab_recientes):
+            col1, col2 = st.columns([5, 1])
+            with col1:
+                nombre = f"{orden['nombres']} {orden['apellido1']} {orden['apellido2']}".strip()
+                st.markdown(
+                    f"**{orden['numero_orden']}** | {orden['fecha_creacion']:%d/%m/%Y %H:%M} | {nombre}"
+                )
+            with col2:
+                if st.button("➕", key=f"nexlab_reciente_{idx}", help="Agregar a la lista"):
+                    if add_nexlab_entry(orden):
+                        st.rerun()
+                    else:
+                        st.warning(f"⚠️ La orden {orden['numero_orden']} ya está en la lista")
+        if st.session_state.nexlab_recientes_fin and st.session_state.nexlab_recientes:
+            st.caption("No hay más órdenes")
+
     # Mostrar lista de órdenes agregadas
     if st.session_state.nexlab_entries:
         st.markdown("---")
@@ -991,8 +1452,10 @@ def render_nexlab_mode(barcode_format):
                 st.markdown(f"**Orden:** {entry['codigo']} | **Nombre:** {entry['nombre']} | **Sexo:** {entry['sexo']}")
             
             with col3:
-                if st.button("🗑️", key=f"delete_nexlab_{idx}", help="Eliminar"):
-                    st.session_state.nexlab_entries.pop(idx)
+                if st.button("🗑️", key=f"delete_nexlab_{entry['entry_id']}", help="Eliminar"):
+                    st.session_state.nexlab_entries = [
+                        e for e in st.session_state.nexlab_entries if e['entry_id'] != entry['entry_id']
+                    ]
                     st.rerun()
         
         st.markdown("---")
@@ -1007,6 +1470,7 @@ def render_nexlab_mode(barcode_format):
         with col2:
             if st.button("🗑️ Limpiar Lista", key="clear_nexlab_btn", use_container_width=True):
                 st.session_state.nexlab_entries = []
+                cancel_preview()
                 st.session_state.current_barcodes = []
                 st.session_state.selected_barcodes = set()
                 st.rerun()
@@ -1029,7 +1493,62 @@ def render_nexlab_mode(barcode_format):
                     print_selected_nexlab_barcodes(barcode_format)
             
             with col_download:
-                st.write("")  # Espaciador para compatibilidad
+                if st.button("📦 Preparar ZIP de Seleccionadas", key="zip_selected_nexlab_btn", use_container_width=True):
+                    download_selected_barcodes(barcode_format)
+            
+            render_pdf_export(barcode_format, "nexlab")
+    
+    # Métricas del pool de conexiones compartido
+    with st.expander("Estado de conexiones a la base de datos"):
+        stats = get_nexlab().estadisticas_pool()
+        if stats:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("En uso / Máximo", f"{stats['en_uso']} / {stats['max_conexiones']}")
+            col2.metric("Espera p95", f"{stats['espera_p95_ms']} ms")
+            col3.metric("Espera máxima", f"{stats['espera_max_ms']} ms")
+            st.json(stats)
+        else:
+            st.info("Sin configuración de conexión válida")
+        
+        st.markdown("**Caché de búsquedas**")
+        cache_stats = get_nexlab().estadisticas_cache()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Tasa de aciertos", f"{cache_stats['tasa_aciertos']:.0%}")
+        col2.metric("Entradas", cache_stats['entradas'])
+        col3.metric("Latencia ahorrada", f"{cache_stats['latencia_ahorrada_s']} s")
+        if st.button("Vaciar caché", key="nexlab_clear_cache_btn"):
+            get_nexlab().limpiar_cache()
+            st.rerun()
+    
+    # Panel de administración: tiempos de las consultas a la base de datos
+    with st.expander("Administración: tiempos de consultas"):
+        nexlab = get_nexlab()
+        umbral = st.number_input(
+            "Umbral de consulta lenta (segundos):",
+            min_value=0.05,
+            value=float(nexlab.umbral_consulta_lenta()),
+            step=0.25,
+            key="nexlab_umbral_lento",
+            help="Las operaciones que tarden más se guardan en el log de consultas lentas"
+        )
+        if umbral != nexlab.umbral_consulta_lenta():
+            nexlab.umbral_consulta_lenta(umbral)
+        
+        tiempos = nexlab.estadisticas_consultas()
+        if tiempos:
+            st.markdown("**Tiempos por operación y fase (ms)**")
+            st.dataframe(tiempos, use_container_width=True, hide_index=True)
+        else:
+            st.info("Aún no hay consultas registradas")
+        
+        lentas = nexlab.consultas_lentas()
+        if lentas:
+            st.markdown(f"**Últimas consultas lentas** (log: `{ordenes_nexlab.SLOW_QUERY_LOG}`)")
+            st.dataframe(lentas, use_container_width=True, hide_index=True)
+        
+        if st.button("Reiniciar métricas", key="nexlab_reset_metricas_btn"):
+            nexlab.reiniciar_metricas()
+            st.rerun()
 
 if __name__ == "__main__":
     main()
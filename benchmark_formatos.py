@@ -0,0 +1,88 @@
+"""
+Benchmark de lectura de archivos: Excel vs CSV/TSV vs Parquet
+Ejecutar: python benchmark_formatos.py [filas]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from modules.excel_web import ExcelWebReader
+
+
+def generar_datos(filas):
+    """Genera un DataFrame con la forma típica de una hoja de Emergencias"""
+    return pd.DataFrame({
+        'GRAU': [str(1600000 + i) for i in range(filas)],
+        'APELLIDOS Y NOMBRES': [f"PACIENTE APELLIDO{i % 97} NOMBRE{i % 13}" for i in range(filas)],
+        'SERVICIO': ['EMERGENCIA' if i % 3 else 'TOPICO' for i in range(filas)],
+    })
+
+
+def escribir_formatos(df, carpeta):
+    """Escribe el mismo DataFrame en cada formato soportado"""
+    rutas = {}
+
+    rutas['xlsx'] = os.path.join(carpeta, 'datos.xlsx')
+    df.to_excel(rutas['xlsx'], index=False, engine='openpyxl')
+
+    rutas['csv'] = os.path.join(carpeta, 'datos.csv')
+    df.to_csv(rutas['csv'], index=False, sep=';', encoding='utf-8-sig')
+
+    rutas['tsv'] = os.path.join(carpeta, 'datos.tsv')
+    df.to_csv(rutas['tsv'], index=False, sep='\t')
+
+    try:
+        rutas['parquet'] = os.path.join(carpeta, 'datos.parquet')
+        df.to_parquet(rutas['parquet'], index=False)
+    except ImportError:
+        print("⚠️  pyarrow/fastparquet no instalado, se omite Parquet")
+        del rutas['parquet']
+
+    return rutas
+
+
+def medir(ruta, config, repeticiones=3):
+    """Mide el mejor tiempo de carga + extracción de registros"""
+    mejor = None
+    registros = 0
+    for _ in range(repeticiones):
+        reader = ExcelWebReader()
+        inicio = time.perf_counter()
+        if not reader.load_excel_with_header(ruta, 0):
+            raise RuntimeError(f"No se pudo cargar {ruta}")
+        registros = len(reader.get_data_with_config(config))
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor, registros
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    config = {'nombre': 'APELLIDOS Y NOMBRES', 'grau': 'GRAU'}
+
+    print("=" * 60)
+    print(f"BENCHMARK DE FORMATOS - {filas} filas")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = escribir_formatos(generar_datos(filas), carpeta)
+
+        resultados = {}
+        for formato, ruta in rutas.items():
+            resultados[formato] = medir(ruta, config)
+
+        base = resultados['xlsx'][0]
+        print(f"{'Formato':<10}{'Tamaño':>12}{'Tiempo':>12}{'vs XLSX':>10}{'Registros':>12}")
+        for formato, (tiempo, registros) in resultados.items():
+            tamano_kb = os.path.getsize(rutas[formato]) / 1024
+            print(f"{formato:<10}{tamano_kb:>10.0f}KB{tiempo * 1000:>10.1f}ms"
+                  f"{base / tiempo:>9.1f}x{registros:>12}")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
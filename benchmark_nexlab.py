@@ -0,0 +1,100 @@
+"""
+Prueba de carga de búsquedas Nexlab contra la base SQLite simulada
+Ejecutar: python benchmark_nexlab.py --ordenes 1000000 --hilos 12 --latencia 0.02
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.nexlab_sqlite import BackendSQLite, PRIMERA_ORDEN, generar_base
+from modules.ordenes_nexlab import OrdenesNexlab, ESTADO_ENCONTRADA, ESTADO_NO_ENCONTRADA
+
+DEFAULT_DB = os.path.join("web_app", "temp", "nexlab_simulado.db")
+
+
+def percentil(valores, p):
+    """Percentil p (0-1) de una lista ordenada"""
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, int(p * len(valores)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de búsquedas de órdenes")
+    parser.add_argument('--db', default=DEFAULT_DB, help="Base SQLite simulada (se crea si no existe)")
+    parser.add_argument('--ordenes', type=int, default=100000, help="Órdenes a generar si la base no existe")
+    parser.add_argument('--hilos', type=int, default=12, help="Búsquedas concurrentes")
+    parser.add_argument('--consultas', type=int, default=2000, help="Total de búsquedas")
+    parser.add_argument('--latencia', type=float, default=0.02, help="Segundos agregados a cada consulta")
+    parser.add_argument('--jitter', type=float, default=0.01, help="Variación aleatoria de la latencia")
+    parser.add_argument('--lote', type=int, default=0, help="Órdenes por búsqueda (0 = buscar_orden individual)")
+    parser.add_argument('--con-cache', action='store_true', help="Usar el caché de búsquedas (por defecto se fuerza la consulta)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        os.makedirs(os.path.dirname(args.db) or '.', exist_ok=True)
+        print(f"Generando {args.ordenes} órdenes en {args.db}...")
+        inicio = time.perf_counter()
+        generar_base(args.db, args.ordenes)
+        print(f"Base generada en {time.perf_counter() - inicio:.1f}s")
+
+    nexlab = OrdenesNexlab(backend=BackendSQLite(args.db, args.latencia, args.jitter))
+    exito, error = nexlab.conectar()
+    if not exito:
+        print(f"❌ {error}")
+        return 1
+
+    with sqlite3.connect(args.db) as conn:
+        total_ordenes = conn.execute('SELECT COUNT(*) FROM Ordenes').fetchone()[0]
+    forzar = not args.con_cache
+    rnd = random.Random(7)
+    # ~10% de números inexistentes, como los errores de digitación
+    numeros = [str(PRIMERA_ORDEN + rnd.randint(0, int(total_ordenes * 1.1))) for _ in range(args.consultas)]
+
+    def buscar(numero):
+        inicio = time.perf_counter()
+        if args.lote:
+            base = int(numero)
+            exito, _ = nexlab.buscar_ordenes([str(base + i) for i in range(args.lote)], forzar=forzar)
+            estado = 'ok' if exito else 'error'
+        else:
+            estado = nexlab.buscar_orden_async(numero, forzar).resultado()['estado']
+        return time.perf_counter() - inicio, estado
+
+    print("=" * 60)
+    modo = f"buscar_ordenes x{args.lote}" if args.lote else "buscar_orden"
+    print(f"PRUEBA DE CARGA - {modo}, {args.consultas} búsquedas, {args.hilos} hilos, "
+          f"latencia {args.latencia * 1000:.0f}±{args.jitter * 1000:.0f} ms")
+    print("=" * 60)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.hilos) as executor:
+        resultados = list(executor.map(buscar, numeros))
+    transcurrido = time.perf_counter() - inicio
+
+    tiempos = sorted(tiempo for tiempo, _ in resultados)
+    estados = {}
+    for _, estado in resultados:
+        estados[estado] = estados.get(estado, 0) + 1
+
+    print(f"Búsquedas/s: {len(resultados) / transcurrido:.1f}  (total {transcurrido:.2f}s)")
+    print(f"p50: {percentil(tiempos, 0.50) * 1000:.1f} ms  p95: {percentil(tiempos, 0.95) * 1000:.1f} ms  "
+          f"p99: {percentil(tiempos, 0.99) * 1000:.1f} ms  max: {tiempos[-1] * 1000:.1f} ms")
+    print(f"Resultados: {estados}")
+    if not args.lote:
+        print(f"  encontradas: {estados.get(ESTADO_ENCONTRADA, 0)}, "
+              f"no encontradas: {estados.get(ESTADO_NO_ENCONTRADA, 0)}")
+
+    pool = nexlab.estadisticas_pool()
+    print(f"Pool: {pool['creadas']} conexiones creadas, espera p95 {pool['espera_p95_ms']} ms, "
+          f"máx {pool['espera_max_ms']} ms")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Benchmark de la vista previa: etiqueta PNG (PIL) vs SVG compacto
+Compara el tiempo de generación y el tamaño que se envía al navegador por etiqueta.
+Ejecutar: python benchmark_vista_previa.py [etiquetas]
+"""
+import base64
+import sys
+import time
+from io import BytesIO
+
+from modules.barcode_web import BarcodeWebGenerator
+
+
+def generar_etiquetas(cantidad):
+    """Etiquetas con la forma típica de una hoja de Emergencias"""
+    return [(f"{1600000 + i}.01", f"PACIENTE APELLIDO{i % 97} NOMBRE{i % 13}", str(1600000 + i))
+            for i in range(cantidad)]
+
+
+def etiqueta_png(generator, code, nombre, grau):
+    # Lo que hacía la vista previa: imagen PIL que Streamlit codifica como PNG
+    img = generator.generate_barcode_with_text('CODE128', code, nombre, grau)
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def etiqueta_svg(generator, code, nombre, grau):
+    # st.image incrusta el SVG en la página como data URI en base64
+    svg = generator.generate_barcode_with_text_svg('CODE128', code, nombre, grau)
+    return base64.b64encode(svg.encode('utf-8'))
+
+
+def medir(render, generator, etiquetas):
+    """
+    Genera todas las etiquetas
+
+    Returns:
+        tuple: (segundos, bytes totales)
+    """
+    inicio = time.perf_counter()
+    total = sum(len(render(generator, *etiqueta)) for etiqueta in etiquetas)
+    return time.perf_counter() - inicio, total
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    generator = BarcodeWebGenerator()
+    etiquetas = generar_etiquetas(cantidad)
+    # Fuentes y patrones de barras se cargan una vez; no se cuentan en la medición
+    etiqueta_png(generator, *etiquetas[0])
+
+    print("=" * 60)
+    print(f"BENCHMARK DE VISTA PREVIA - {cantidad} etiquetas")
+    print("=" * 60)
+    resultados = {
+        'PNG': medir(etiqueta_png, generator, etiquetas),
+        'SVG': medir(etiqueta_svg, generator, etiquetas),
+    }
+    base_tiempo, base_bytes = resultados['PNG']
+    print(f"{'Formato':<10}{'ms/etiqueta':>14}{'bytes/etiqueta':>16}{'Total':>12}{'vs PNG':>10}")
+    for formato, (segundos, total) in resultados.items():
+        print(f"{formato:<10}{segundos * 1000 / cantidad:>14.2f}{total / cantidad:>16.0f}"
+              f"{total / 1024:>10.0f}KB{base_tiempo / segundos:>9.1f}x")
+    print(f"\nEl SVG pesa {base_bytes / resultados['SVG'][1]:.1f} veces menos que el PNG")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Diagnóstico del tiempo de arranque de app.py
+Mide en un intérprete nuevo (en frío) cuánto tarda cada importación: las que
+app.py hace al iniciar y las que se difieren al primer uso de cada modo.
+
+Ejecutar: python diagnostico_arranque.py --repeticiones 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from modules.arranque import MODULOS_PRECARGA
+
+# Importaciones que app.py hace al iniciar (antes de mostrar la primera página)
+MODULOS_INICIO = ('streamlit', 'modules.arranque', 'modules.pipeline_zpl')
+
+_MEDIR = "import time; t = time.perf_counter(); import {}; print(time.perf_counter() - t)"
+
+
+def medir_importacion(modulos, repeticiones):
+    """
+    Mejor tiempo (segundos) de importar los módulos en un intérprete nuevo
+
+    Returns:
+        float: Segundos, o None si la importación falló
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        resultado = subprocess.run([sys.executable, '-c', _MEDIR.format(', '.join(modulos))],
+                                   capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if resultado.returncode != 0:
+            return None
+        tiempos.append(float(resultado.stdout.strip().splitlines()[-1]))
+    return min(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempos de importación en frío de la aplicación")
+    parser.add_argument('--repeticiones', type=int, default=3, help="Mediciones por módulo (se toma la mejor)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("TIEMPOS DE IMPORTACIÓN EN FRÍO")
+    print("=" * 60)
+    inicio = medir_importacion(MODULOS_INICIO, args.repeticiones)
+    todo = medir_importacion(MODULOS_INICIO + MODULOS_PRECARGA, args.repeticiones)
+    print(f"Arranque de app.py (importaciones al iniciar): {inicio * 1000:.0f} ms")
+    if todo is not None:
+        print(f"Con todos los módulos pesados:                 {todo * 1000:.0f} ms")
+    print()
+    print("Módulos diferidos (precargados en segundo plano):")
+    for nombre in MODULOS_PRECARGA:
+        segundos = medir_importacion((nombre,), args.repeticiones)
+        texto = f"{segundos * 1000:7.0f} ms" if segundos is not None else "  no disponible"
+        print(f"  {nombre:28} {texto}")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
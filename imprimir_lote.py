@@ -0,0 +1,244 @@
+"""
+Impresión por lotes desde la línea de comandos (sin Streamlit)
+Toma un archivo Excel/CSV/Parquet o una lista/rango de órdenes Nexlab y envía
+las etiquetas a una impresora, un archivo ZPL, una carpeta PNG, un ZIP o un PDF
+de hojas para impresora láser.
+
+Ejemplos:
+    python imprimir_lote.py --archivo turno.xlsx --grau GRAU --nombre "APELLIDOS Y NOMBRES" --impresora "ZDesigner GK420t"
+    python imprimir_lote.py --archivo turno.csv --mapeo web_app/temp/mapeo_carpeta.json --zpl turno.zpl
+    python imprimir_lote.py --ordenes "1622485-1622520, 1622600" --png etiquetas/ --trabajadores 4
+    python imprimir_lote.py --archivo turno.xlsx --grau GRAU --pdf turno.pdf --plantilla "A4 4x10 (52.5 x 29.7 mm)"
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from modules.barcode_web import BarcodeWebGenerator
+from modules.carpeta_vigilada import load_mapping
+from modules.excel_web import ExcelWebReader
+from modules.exportar_pdf import PLANTILLAS_HOJA, PLANTILLA_DEFAULT, escribir_pdf
+from modules.exportar_zip import escribir_zip, nombre_archivo, renderizar_en_orden
+from modules.ordenes_nexlab import OrdenesNexlab, MAX_ORDENES_LOTE, expandir_numeros_orden
+from modules.pipeline_zpl import iter_label_fields, iter_zpl_batches, print_stream
+from modules.validacion_web import ValidadorCodigos
+from modules.zebra_web import ZebraWebPrinter
+
+# Máximo de órdenes en una ejecución por línea de comandos
+MAX_ORDENES_CLI = 200000
+
+_generator = None
+
+
+def _init_worker():
+    global _generator
+    _generator = BarcodeWebGenerator()
+
+
+def _render_png(label, barcode_format):
+    """Renderiza una etiqueta en un proceso de trabajo; retorna los bytes PNG"""
+    img = _generator.generate_barcode_with_text(barcode_format, label['code'], label.get('nombre') or None,
+                                                label.get('grau') or None, label.get('sexo') or None)
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class Progreso:
+    """Muestra el avance en una sola línea de la consola"""
+
+    def __init__(self, total):
+        self.total = total
+        self.inicio = time.perf_counter()
+
+    def __call__(self, hechas, fallidas=0):
+        transcurrido = time.perf_counter() - self.inicio
+        velocidad = hechas / transcurrido if transcurrido else 0
+        total = f"/{self.total}" if self.total else ''
+        fallo = f", {fallidas} fallidas" if fallidas else ''
+        print(f"\r  {hechas}{total} etiquetas{fallo} ({velocidad:.0f}/s)", end='', flush=True)
+
+    def fin(self):
+        print()
+
+
+def etiquetas_archivo(args):
+    """
+    Lee el archivo y retorna (total, generador de etiquetas) tras validar los códigos
+
+    Returns:
+        tuple: (int, Iterator[dict]) o (0, None) si no se pudo leer
+    """
+    mapping = load_mapping(args.mapeo) if args.mapeo else {}
+    grau = args.grau or mapping.get('grau')
+    if not grau:
+        print("❌ Indica la columna de códigos con --grau o --mapeo")
+        return 0, None
+    config = {'nombre': args.nombre or mapping.get('nombre'), 'grau': grau}
+    args.formato = args.formato or mapping.get('barcode_format')
+    args.copias = args.copias or int(mapping.get('copies', 1))
+
+    reader = ExcelWebReader()
+    header_row = args.fila_encabezado if args.fila_encabezado is not None else mapping.get('header_row', 0)
+    if not reader.load_excel_with_header(args.archivo, header_row, args.hoja or mapping.get('sheet_name')):
+        print(f"❌ No se pudo leer {args.archivo}")
+        return 0, None
+
+    records = reader.get_data_with_config(config)
+    report = ValidadorCodigos().validate_records(records, config['grau'], args.formato or 'CODE128',
+                                                 header_row=header_row)
+    for rejected in report.rejected:
+        print(f"  Fila {rejected['fila']} rechazada: {rejected['motivo']}")
+    print(f"{report.valid_count} registros válidos de {report.total}")
+    return report.valid_count, iter_label_fields(report.records, config)
+
+
+def etiquetas_ordenes(args):
+    """
+    Busca las órdenes en Nexlab (lotes en paralelo) y retorna (total, generador de etiquetas)
+
+    Returns:
+        tuple: (int, Iterator[dict]) o (0, None) si falló la búsqueda
+    """
+    try:
+        numeros = expandir_numeros_orden(args.ordenes, MAX_ORDENES_CLI)
+    except ValueError as e:
+        print(f"❌ {str(e)}")
+        return 0, None
+
+    nexlab = OrdenesNexlab()
+    chunks = [numeros[i:i + MAX_ORDENES_LOTE] for i in range(0, len(numeros), MAX_ORDENES_LOTE)]
+    print(f"Buscando {len(numeros)} órdenes en Nexlab...")
+    with ThreadPoolExecutor(max_workers=args.trabajadores) as executor:
+        resultados = list(executor.map(nexlab.buscar_ordenes, chunks))
+
+    ordenes = []
+    for exito, resultado in resultados:
+        if not exito:
+            print(f"❌ {resultado}")
+            return 0, None
+        for numero, orden in resultado.items():
+            if orden is None:
+                print(f"  Orden {numero} no encontrada")
+            else:
+                ordenes.append(orden)
+    print(f"{len(ordenes)} órdenes encontradas de {len(numeros)}")
+
+    def labels():
+        for orden in ordenes:
+            etiqueta = nexlab.generar_etiqueta_texto(orden)
+            yield {'code': etiqueta['codigo'], 'nombre': etiqueta['nombre'].upper(), 'sexo': etiqueta['sexo']}
+
+    return len(ordenes), labels()
+
+
+def salida_impresora(args, labels, progreso):
+    printer = ZebraWebPrinter()
+    printer.set_printer(args.impresora)
+    if not printer.test_connection():
+        print(f"❌ No se pudo abrir la impresora: {args.impresora}")
+        return False
+    batches = iter_zpl_batches(printer, labels, args.formato, args.copias, args.lote)
+    _, failed = print_stream(printer, batches, progreso)
+    return failed == 0
+
+
+def salida_zpl(args, labels, progreso):
+    # generate_zpl no usa la impresora: no hace falta pywin32 ni una impresora instalada
+    printer = ZebraWebPrinter()
+    escritas = 0
+    with open(args.zpl, 'wb') as f:
+        for count, data in iter_zpl_batches(printer, labels, args.formato, args.copias, args.lote):
+            f.write(data)
+            escritas += count
+            progreso(escritas)
+    return True
+
+
+def salida_pdf(args, labels, progreso):
+    # Barras vectoriales: no hace falta generar imágenes ni un pool de procesos
+    bar_runs = partial(BarcodeWebGenerator().get_bar_runs, args.formato)
+    with open(args.pdf, 'wb') as f:
+        _, paginas = escribir_pdf(f, labels, bar_runs, args.plantilla, args.copias, progreso)
+    progreso.fin()
+    print(f"  {paginas} hojas ({args.plantilla})", end='')
+    return True
+
+
+def salida_png(args, labels, progreso):
+    render = partial(_render_png, barcode_format=args.formato)
+    with ProcessPoolExecutor(max_workers=args.trabajadores, initializer=_init_worker) as executor:
+        if args.zip:
+            # Escritura en flujo: PNG sin recomprimir, copias en el manifiesto
+            escribir_zip(args.zip, labels, render, args.copias, 'png', executor, args.lote, progreso)
+            return True
+
+        os.makedirs(args.png, exist_ok=True)
+        hechas = 0
+        for label, data in renderizar_en_orden(labels, render, executor, args.lote):
+            hechas += 1
+            with open(os.path.join(args.png, nombre_archivo(hechas, label)), 'wb') as f:
+                f.write(data)
+            if hechas % args.lote == 0:
+                progreso(hechas)
+        progreso(hechas)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Impresión de etiquetas por lotes sin Streamlit")
+    origen = parser.add_mutually_exclusive_group(required=True)
+    origen.add_argument('--archivo', help="Archivo Excel/CSV/TSV/Parquet")
+    origen.add_argument('--ordenes', help="Órdenes Nexlab y rangos (ej: \"1622485-1622520, 1622600\")")
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument('--impresora', help="Nombre de la impresora Zebra")
+    destino.add_argument('--zpl', help="Archivo ZPL de salida")
+    destino.add_argument('--png', help="Carpeta de salida para imágenes PNG")
+    destino.add_argument('--zip', help="Archivo ZIP de salida con imágenes PNG")
+    destino.add_argument('--pdf', help="Archivo PDF de salida con varias etiquetas por hoja (impresora láser)")
+
+    parser.add_argument('--mapeo', help="Mapeo de columnas guardado desde la aplicación (JSON)")
+    parser.add_argument('--grau', help="Columna con el código (GRAU)")
+    parser.add_argument('--nombre', help="Columna con el nombre")
+    parser.add_argument('--hoja', help="Hoja de Excel (por defecto la primera)")
+    parser.add_argument('--fila-encabezado', type=int, help="Fila del encabezado (0 = primera)")
+    parser.add_argument('--formato', help="Formato de código de barras (por defecto CODE128)")
+    parser.add_argument('--copias', type=int, help="Copias de cada etiqueta (impresora/ZPL/PDF; en ZIP se anotan en el manifiesto)")
+    parser.add_argument('--plantilla', default=PLANTILLA_DEFAULT, choices=list(PLANTILLAS_HOJA),
+                        help="Hoja de etiquetas para --pdf")
+    parser.add_argument('--lote', type=int, default=50, help="Etiquetas por trabajo de impresión")
+    parser.add_argument('--trabajadores', type=int, default=os.cpu_count() or 2,
+                        help="Procesos para PNG / hilos para búsquedas Nexlab")
+    args = parser.parse_args()
+    inicio = time.perf_counter()
+
+    if args.archivo:
+        total, labels = etiquetas_archivo(args)
+    else:
+        total, labels = etiquetas_ordenes(args)
+    if labels is None:
+        return 1
+    args.formato = args.formato or 'CODE128'
+    args.copias = args.copias or 1
+
+    progreso = Progreso(total)
+    if args.impresora:
+        ok = salida_impresora(args, labels, progreso)
+    elif args.zpl:
+        ok = salida_zpl(args, labels, progreso)
+    elif args.pdf:
+        ok = salida_pdf(args, labels, progreso)
+    else:
+        ok = salida_png(args, labels, progreso)
+    progreso.fin()
+
+    print(f"{'✅' if ok else '⚠️'} Terminado en {time.perf_counter() - inicio:.1f}s")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Servicio de impresión automática: imprime la etiqueta de cada orden nueva
+creada en Nexlab en la impresora de la estación.
+
+Ejecutar: python imprimir_ordenes_nuevas.py --impresora "ZDesigner GK420t"
+"""
+import argparse
+import sys
+
+from modules.feed_ordenes import FeedOrdenes, REVISION_SEGUNDOS, STATE_FILE
+from modules.ordenes_nexlab import OrdenesNexlab
+from modules.zebra_web import ZebraWebPrinter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Impresión automática de órdenes nuevas de Nexlab")
+    parser.add_argument('--impresora', required=True, help="Nombre de la impresora Zebra")
+    parser.add_argument('--formato', default='CODE128', help="Formato de código de barras")
+    parser.add_argument('--copias', type=int, default=1, help="Copias de cada etiqueta")
+    parser.add_argument('--estado', default=STATE_FILE, help="Archivo JSON con la marca de agua")
+    parser.add_argument('--intervalo-min', type=float, default=2.0, help="Segundos entre consultas con actividad")
+    parser.add_argument('--intervalo-max', type=float, default=30.0, help="Segundos entre consultas sin actividad")
+    parser.add_argument('--revision', type=float, default=REVISION_SEGUNDOS,
+                        help="Segundos antes de la última orden que se vuelven a revisar (órdenes confirmadas tarde)")
+    parser.add_argument('--una-vez', action='store_true', help="Imprimir lo pendiente y salir")
+    args = parser.parse_args()
+
+    printer = ZebraWebPrinter()
+    printer.set_printer(args.impresora)
+    if not printer.test_connection():
+        print(f"❌ No se pudo abrir la impresora: {args.impresora}")
+        return 1
+
+    nexlab = OrdenesNexlab()
+    exito, error = nexlab.conectar()
+    if not exito:
+        print(f"❌ {error}")
+        return 1
+
+    feed = FeedOrdenes(
+        nexlab, printer, args.estado,
+        barcode_format=args.formato,
+        copies=args.copias,
+        min_interval=args.intervalo_min,
+        max_interval=args.intervalo_max,
+        lookback=args.revision
+    )
+    fecha, numero = feed.watermark()
+    print(f"Imprimiendo órdenes nuevas desde {fecha:%d/%m/%Y %H:%M:%S} #{numero} (Ctrl+C para detener)")
+
+    if args.una_vez:
+        return 0 if feed.poll_once() >= 0 else 1
+
+    try:
+        feed.run()
+    except KeyboardInterrupt:
+        feed.stop()
+        print("Servicio detenido")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
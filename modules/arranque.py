@@ -0,0 +1,119 @@
+"""
+Arranque rápido de la aplicación
+Importa los módulos pesados recién cuando se usan, registra cuánto tarda cada
+importación y los precarga en segundo plano al iniciar el servidor
+"""
+import importlib
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List
+
+# Módulos que se precargan en segundo plano (pandas/openpyxl, pyodbc, PIL, python-barcode, pywin32)
+MODULOS_PRECARGA = (
+    'modules.barcode_web',
+    'modules.zebra_web',
+    'modules.ordenes_nexlab',
+    'modules.excel_web',
+    'modules.validacion_web',
+    'modules.carpeta_vigilada',
+    'openpyxl',
+)
+
+_tiempos = {}
+_precarga = {'estado': 'sin iniciar', 'segundos': 0.0, 'errores': []}
+_lock = threading.Lock()
+
+
+def modulo(nombre: str, origen: str = 'uso'):
+    """
+    Importa un módulo (si aún no está cargado) y registra el tiempo de la primera importación
+
+    Args:
+        nombre (str): Módulo a importar (ej: 'modules.excel_web')
+        origen (str): Quién lo importó: 'uso' (primer uso en la app) o 'precarga'
+
+    Returns:
+        module: Módulo importado
+    """
+    # import_module espera a otro hilo que lo esté importando: nunca retorna un módulo a medio cargar
+    cargado = nombre in sys.modules
+    inicio = time.perf_counter()
+    mod = importlib.import_module(nombre)
+    if not cargado:
+        with _lock:
+            _tiempos.setdefault(nombre, {
+                'modulo': nombre,
+                'ms': round((time.perf_counter() - inicio) * 1000, 1),
+                'origen': origen,
+                'hilo': threading.current_thread().name,
+            })
+    return mod
+
+
+def precalentar(modulos: Iterable[str] = MODULOS_PRECARGA,
+                tareas: Iterable[Callable[[], object]] = (), espera: float = 0.0) -> threading.Thread:
+    """
+    Importa los módulos y ejecuta las tareas de preparación en un hilo en segundo plano
+
+    Args:
+        modulos (Iterable[str]): Módulos a importar
+        tareas (Iterable[Callable]): Funciones sin argumentos (ej: cargar fuentes, abrir la réplica)
+        espera (float): Segundos antes de empezar (la precarga compite por el GIL con la
+                        primera página; conviene empezar después de mostrarla)
+
+    Returns:
+        threading.Thread: Hilo de precarga (ya iniciado)
+    """
+    modulos, tareas = tuple(modulos), tuple(tareas)
+
+    def run():
+        with _lock:
+            _precarga['estado'] = 'programada'
+        time.sleep(espera)
+        inicio = time.perf_counter()
+        with _lock:
+            _precarga['estado'] = 'en curso'
+        for nombre in modulos:
+            try:
+                modulo(nombre, 'precarga')
+            except ImportError as e:
+                # Dependencias opcionales (ej: pywin32 fuera de Windows) no detienen la precarga
+                with _lock:
+                    _precarga['errores'].append(f"{nombre}: {str(e)}")
+        for tarea in tareas:
+            try:
+                tarea()
+            except Exception as e:
+                print(f"Error en precarga ({getattr(tarea, '__name__', tarea)}): {str(e)}")
+                with _lock:
+                    _precarga['errores'].append(f"{getattr(tarea, '__name__', tarea)}: {str(e)}")
+        with _lock:
+            _precarga['estado'] = 'terminada'
+            _precarga['segundos'] = round(time.perf_counter() - inicio, 2)
+
+    thread = threading.Thread(target=run, name='precarga', daemon=True)
+    thread.start()
+    return thread
+
+
+def estado_precarga() -> Dict:
+    """
+    Estado de la precarga en segundo plano
+
+    Returns:
+        dict: {'estado', 'segundos', 'errores'}
+    """
+    with _lock:
+        return {**_precarga, 'errores': list(_precarga['errores'])}
+
+
+def reporte_importaciones() -> List[Dict]:
+    """
+    Tiempos de las importaciones registradas, de la más lenta a la más rápida
+
+    Returns:
+        list: Un dict por módulo con 'modulo', 'ms', 'origen' y 'hilo'
+    """
+    with _lock:
+        return sorted(_tiempos.values(), key=lambda fila: fila['ms'], reverse=True)
@@ -0,0 +1,60 @@
+"""
+Backends de conexión para OrdenesNexlab
+Un backend abre conexiones DB-API compatibles con las consultas de Nexlab
+(filas con acceso por atributo, cursor.cancel(), connection.timeout)
+"""
+import sqlite3
+
+try:
+    import pyodbc
+except ImportError:
+    # Sin driver manager ODBC (ej: CI o laptop): solo backends alternativos
+    pyodbc = None
+
+# Excepciones de base de datos que pueden lanzar los backends
+DB_ERRORS = (sqlite3.Error,) + ((pyodbc.Error,) if pyodbc else ())
+
+
+class BackendOrdenes:
+    """Interfaz de un origen de conexiones para OrdenesNexlab"""
+
+    nombre = ''
+
+    def clave(self) -> str:
+        """Identifica el origen: las conexiones se agrupan en un pool por clave"""
+        raise NotImplementedError
+
+    def conectar(self, timeout: float):
+        """
+        Abre una conexión nueva
+
+        Args:
+            timeout (float): Segundos máximos para establecer la conexión
+
+        Returns:
+            Conexión DB-API con parámetros '?' y sintaxis de SQL Server
+        """
+        raise NotImplementedError
+
+    def descripcion(self) -> str:
+        """Texto para mensajes de error de conexión"""
+        return self.nombre
+
+
+class BackendSQLServer(BackendOrdenes):
+    """SQL Server de Nexlab vía pyodbc"""
+
+    nombre = 'sqlserver'
+
+    def __init__(self, connection_string: str):
+        """
+        Args:
+            connection_string (str): String de conexión ODBC
+        """
+        self.connection_string = connection_string
+
+    def clave(self) -> str:
+        return self.connection_string
+
+    def conectar(self, timeout: float):
+        return pyodbc.connect(self.connection_string, timeout=timeout)
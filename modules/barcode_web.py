@@ -5,9 +5,31 @@ Adaptación del generador original para Streamlit
 import barcode
 from barcode.writer import ImageWriter
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
+from functools import lru_cache
 import os
 
+from modules.diseno_etiqueta import renderizador_raster, renderizar_svg, valores_etiqueta
+
+# Píxeles por punto de la Zebra en el PNG de la etiqueta (2.0 = 406 DPI: nítido en pantalla y en láser)
+ESCALA_PNG = 2.0
+
+@lru_cache(maxsize=4096)
+def _tramos_barras(barcode_class, code_value):
+    # Patrón de módulos ('1' = barra) agrupado en tramos contiguos
+    pattern = barcode_class(code_value).build()[0]
+    runs = []
+    start = None
+    for i, module in enumerate(pattern):
+        if module == '1' and start is None:
+            start = i
+        elif module != '1' and start is not None:
+            runs.append((start, i - start))
+            start = None
+    if start is not None:
+        runs.append((start, len(pattern) - start))
+    return len(pattern), tuple(runs)
+
 class BarcodeWebGenerator:
     """Clase para generar códigos de barras en la versión web"""
     
@@ -74,75 +96,26 @@ class BarcodeWebGenerator:
         except Exception as e:
             raise Exception(f"Error generando código de barras: {str(e)}")
     
-    def generate_barcode_with_text(self, format_type, code_value, nombre=None, grau=None):
+    def generate_barcode_with_text(self, format_type, code_value, nombre=None, grau=None, sexo=None, fecha=None):
         """
-        Genera código de barras con texto adicional (nombre y grau)
+        Genera la etiqueta completa como imagen, con el mismo diseño que se imprime en la Zebra
+        (DISENO_ETIQUETA: fecha, código de barras, número, nombre y sexo)
         
         Args:
             format_type (str): Tipo de código de barras
             code_value (str): Valor del código
             nombre (str): Nombre de la persona
-            grau (str): Grau/grado
+            grau (str): Grau/grado (solo se dibuja si el diseño lo incluye)
+            sexo (str): Sexo (órdenes Nexlab)
+            fecha (str): Fecha impresa (por defecto hoy)
             
         Returns:
-            PIL.Image: Imagen del código con texto
+            PIL.Image: Imagen de la etiqueta
         """
         try:
-            # Generar código de barras base
-            barcode_img = self.generate_barcode(format_type, code_value)
-            
-            # Si no hay texto adicional, retornar solo el código
-            if not nombre and not grau:
-                return barcode_img
-            
-            # Crear imagen más grande para incluir texto
-            width, height = barcode_img.size
-            additional_height = 0
-            
-            if nombre:
-                additional_height += 30
-            if grau:
-                additional_height += 25
-            
-            # Crear nueva imagen
-            new_img = Image.new('RGB', (width, height + additional_height), 'white')
-            
-            # Pegar código de barras
-            new_img.paste(barcode_img, (0, 0))
-            
-            # Agregar texto
-            draw = ImageDraw.Draw(new_img)
-            
-            try:
-                # Intentar usar fuente del sistema
-                font_large = ImageFont.truetype("arial.ttf", 14)
-                font_small = ImageFont.truetype("arial.ttf", 12)
-            except:
-                # Usar fuente por defecto
-                font_large = ImageFont.load_default()
-                font_small = ImageFont.load_default()
-            
-            y_position = height + 5
-            
-            if nombre:
-                # Centrar texto del nombre
-                text = f"Nombre: {nombre}"
-                bbox = draw.textbbox((0, 0), text, font=font_large)
-                text_width = bbox[2] - bbox[0]
-                x_position = (width - text_width) // 2
-                draw.text((x_position, y_position), text, fill='black', font=font_large)
-                y_position += 25
-            
-            if grau:
-                # Centrar texto del grau
-                text = f"Grau: {grau}"
-                bbox = draw.textbbox((0, 0), text, font=font_small)
-                text_width = bbox[2] - bbox[0]
-                x_position = (width - text_width) // 2
-                draw.text((x_position, y_position), text, fill='black', font=font_small)
-            
-            return new_img
-            
+            barras = self.get_bar_runs(format_type, code_value)
+            valores = valores_etiqueta(code_value, nombre, sexo, grau, fecha)
+            return renderizador_raster(ESCALA_PNG).render(barras, valores)
         except Exception as e:
             raise Exception(f"Error generando código con texto: {str(e)}")
     
@@ -161,3 +134,40 @@ class BarcodeWebGenerator:
         buffer = BytesIO()
         img.save(buffer, format='PNG')
         return buffer.getvalue()
+    
+    def get_bar_runs(self, format_type, code_value):
+        """
+        Barras del código como tramos contiguos, para dibujarlas como rectángulos
+        
+        Args:
+            format_type (str): Tipo de código de barras
+            code_value (str): Valor del código
+            
+        Returns:
+            tuple: (total de módulos, tupla de (módulo inicial, ancho en módulos) por barra)
+        """
+        if format_type not in self.supported_formats:
+            raise ValueError(f"Formato no soportado: {format_type}")
+        return _tramos_barras(self.supported_formats[format_type], str(code_value))
+    
+    def generate_barcode_with_text_svg(self, format_type, code_value, nombre=None, grau=None, sexo=None, fecha=None):
+        """
+        Genera la etiqueta completa como SVG compacto, con el mismo diseño que se imprime
+        
+        Las barras contiguas se unen en rectángulos de un único trazo y los textos
+        quedan como texto SVG: ocupa unos cientos de bytes, se ve nítido con
+        cualquier zoom y sirve para la vista previa.
+        
+        Args:
+            format_type (str): Tipo de código de barras
+            code_value (str): Valor del código
+            nombre (str): Nombre de la persona
+            grau (str): Grau/grado (solo se dibuja si el diseño lo incluye)
+            sexo (str): Sexo (órdenes Nexlab)
+            fecha (str): Fecha impresa (por defecto hoy)
+            
+        Returns:
+            str: Documento SVG
+        """
+        barras = self.get_bar_runs(format_type, code_value)
+        return renderizar_svg(barras, valores_etiqueta(code_value, nombre, sexo, grau, fecha))
@@ -0,0 +1,121 @@
+"""
+Caché compartido de búsquedas de órdenes con expiración (TTL) y límite LRU
+Evita repetir consultas a SQL Server para reimpresiones y varias estaciones
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Marca interna para órdenes no encontradas (caché negativo)
+_NOT_FOUND = object()
+
+
+class CacheTTL:
+    """Caché LRU con TTL, caché negativo y métricas de aciertos"""
+
+    def __init__(self, max_size: int = 5000, ttl: float = 600.0, negative_ttl: float = 30.0):
+        """
+        Args:
+            max_size (int): Máximo de entradas (se descarta la menos usada)
+            ttl (float): Segundos de validez de una orden encontrada
+            negative_ttl (float): Segundos de validez de un "no encontrada"
+                                  (corto: la orden puede crearse en cualquier momento)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._load_time = 0.0
+        self._loads = 0
+
+    def get(self, key: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        Busca una entrada vigente
+
+        Args:
+            key (str): Número de orden
+
+        Returns:
+            tuple: (encontrada en caché, datos de la orden o None si se sabe que no existe)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < now:
+                if entry is not None:
+                    del self._data[key]
+                self._misses += 1
+                return False, None
+
+            self._data.move_to_end(key)
+            value = entry[0]
+            if value is _NOT_FOUND:
+                self._negative_hits += 1
+                return True, None
+            self._hits += 1
+            return True, dict(value)
+
+    def set(self, key: str, value: Optional[Dict]) -> None:
+        """
+        Guarda el resultado de una búsqueda
+
+        Args:
+            key (str): Número de orden
+            value (dict): Datos de la orden, o None si no existe
+        """
+        if value is None:
+            stored, ttl = _NOT_FOUND, self.negative_ttl
+        else:
+            stored, ttl = dict(value), self.ttl
+
+        with self._lock:
+            self._data[key] = (stored, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def record_load(self, seconds: float, count: int = 1) -> None:
+        """Registra el tiempo de una consulta real, para estimar la latencia ahorrada"""
+        with self._lock:
+            self._load_time += seconds
+            self._loads += count
+
+    def invalidate(self, key: str) -> None:
+        """Elimina una entrada (ej: al forzar la actualización de una orden)"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Vacía el caché"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        """
+        Métricas del caché
+
+        Returns:
+            dict: Aciertos, fallos, tasa de aciertos y latencia ahorrada estimada
+        """
+        with self._lock:
+            hits = self._hits + self._negative_hits
+            total = hits + self._misses
+            avg_load = self._load_time / self._loads if self._loads else 0.0
+            return {
+                'entradas': len(self._data),
+                'aciertos': self._hits,
+                'aciertos_negativos': self._negative_hits,
+                'fallos': self._misses,
+                'descartes_lru': self._evictions,
+                'tasa_aciertos': round(hits / total, 3) if total else 0.0,
+                'latencia_consulta_ms': round(avg_load * 1000, 2),
+                'latencia_ahorrada_s': round(hits * avg_load, 2),
+            }
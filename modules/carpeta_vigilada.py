@@ -0,0 +1,259 @@
+"""
+Carpeta vigilada para impresión desatendida de archivos Excel/CSV
+Detecta archivos nuevos, aplica un mapeo de columnas guardado e imprime por lotes
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Dict
+
+from modules.excel_web import ExcelWebReader, SUPPORTED_EXTENSIONS
+from modules.pipeline_zpl import iter_label_fields, iter_zpl_batches
+from modules.validacion_web import ValidadorCodigos
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    _HAS_WATCHDOG = True
+except ImportError:
+    _HAS_WATCHDOG = False
+
+CHECKPOINT_FILE = '.procesados.json'
+DONE_DIR = 'procesados'
+ERROR_DIR = 'errores'
+
+
+def load_mapping(path: str) -> Dict:
+    """
+    Carga un mapeo de columnas guardado desde la aplicación
+
+    Args:
+        path (str): Ruta al archivo JSON del mapeo
+
+    Returns:
+        dict: Mapeo con 'nombre', 'grau' y opcionalmente 'header_row',
+              'sheet_name', 'barcode_format' y 'copies'
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        mapping = json.load(f)
+    if not mapping.get('grau'):
+        raise ValueError("El mapeo debe indicar la columna 'grau'")
+    return mapping
+
+
+def save_mapping(path: str, mapping: Dict) -> None:
+    """Guarda un mapeo de columnas para la carpeta vigilada"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(mapping, f, ensure_ascii=False, indent=2)
+
+
+class CarpetaVigilada:
+    """Servicio que imprime automáticamente los archivos dejados en una carpeta"""
+
+    def __init__(self, folder: str, printer, mapping: Dict, batch_size: int = 50,
+                 poll_interval: float = 2.0):
+        """
+        Args:
+            folder (str): Carpeta a vigilar
+            printer (ZebraWebPrinter): Impresora con printer_name configurado
+            mapping (dict): Mapeo de columnas (ver load_mapping)
+            batch_size (int): Etiquetas por trabajo de impresión
+            poll_interval (float): Segundos entre revisiones de la carpeta
+        """
+        self.folder = folder
+        self.printer = printer
+        self.mapping = mapping
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.checkpoint_path = os.path.join(folder, CHECKPOINT_FILE)
+        self.checkpoints = self._load_checkpoints()
+        self._pending = {}
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def _load_checkpoints(self) -> Dict:
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error leyendo checkpoints, se inicia vacío: {str(e)}")
+            return {}
+
+    def _save_checkpoints(self) -> None:
+        # Escritura atómica: un corte a mitad de escritura no pierde el estado
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoints, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.checkpoint_path)
+
+    @staticmethod
+    def file_digest(path: str) -> str:
+        """Huella del contenido, para reconocer un archivo aunque se renombre"""
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def scan(self):
+        """
+        Revisa la carpeta y retorna los archivos listos para procesar
+
+        Un archivo está listo cuando su tamaño y fecha de modificación no
+        cambiaron entre dos revisiones (ya terminó de copiarse).
+
+        Returns:
+            list: Rutas de archivos estables
+        """
+        ready = []
+        seen = set()
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.name.startswith(('.', '~$')):
+                    continue
+                if not entry.name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+
+                stat = entry.stat()
+                signature = (stat.st_size, stat.st_mtime_ns)
+                seen.add(entry.path)
+                if stat.st_size > 0 and self._pending.get(entry.path) == signature:
+                    ready.append(entry.path)
+                self._pending[entry.path] = signature
+
+        # Olvidar archivos que ya no están
+        for path in list(self._pending):
+            if path not in seen:
+                del self._pending[path]
+
+        return sorted(ready)
+
+    def process_file(self, path: str) -> bool:
+        """
+        Imprime un archivo por lotes, retomando desde el último checkpoint
+
+        El checkpoint se actualiza después de cada lote enviado, de modo que
+        un reinicio continúa en el lote siguiente sin reimprimir.
+
+        Args:
+            path (str): Ruta del archivo
+
+        Returns:
+            bool: True si el archivo quedó impreso completo
+        """
+        digest = self.file_digest(path)
+        checkpoint = self.checkpoints.get(digest, {})
+        if checkpoint.get('completado'):
+            print(f"Ya procesado anteriormente: {os.path.basename(path)}")
+            self._archive(path, DONE_DIR)
+            return True
+
+        reader = ExcelWebReader()
+        if not reader.load_excel_with_header(path, self.mapping.get('header_row', 0),
+                                             self.mapping.get('sheet_name')):
+            self._archive(path, ERROR_DIR)
+            return False
+
+        barcode_format = self.mapping.get('barcode_format', 'CODE128')
+        config = {'nombre': self.mapping.get('nombre'), 'grau': self.mapping['grau']}
+        records = reader.get_data_with_config(config)
+        report = ValidadorCodigos().validate_records(records, config['grau'], barcode_format,
+                                                     header_row=self.mapping.get('header_row', 0))
+        for rejected in report.rejected:
+            print(f"  Fila {rejected['fila']} rechazada: {rejected['motivo']}")
+
+        data = report.records
+        copies = int(self.mapping.get('copies', 1))
+        printed = checkpoint.get('filas_impresas', 0)
+
+        checkpoint.update({
+            'archivo': os.path.basename(path),
+            'total': len(data),
+            'filas_impresas': printed,
+            'completado': False,
+        })
+        self.checkpoints[digest] = checkpoint
+
+        labels = iter_label_fields(data, config, range(printed, len(data)))
+        for count, zpl_batch in iter_zpl_batches(self.printer, labels, barcode_format, copies, self.batch_size):
+            if not self.printer.send_raw(zpl_batch):
+                print(f"  Error de impresión en filas {printed + 1}-{printed + count}, se reintentará")
+                self._save_checkpoints()
+                return False
+
+            printed += count
+            checkpoint['filas_impresas'] = printed
+            self._save_checkpoints()
+            print(f"  {printed}/{len(data)} etiquetas enviadas")
+
+        checkpoint['completado'] = True
+        checkpoint['fecha'] = datetime.now().isoformat(timespec='seconds')
+        self._save_checkpoints()
+        self._archive(path, DONE_DIR)
+        return True
+
+    def _archive(self, path: str, subfolder: str) -> None:
+        target_dir = os.path.join(self.folder, subfolder)
+        os.makedirs(target_dir, exist_ok=True)
+        try:
+            shutil.move(path, os.path.join(target_dir, os.path.basename(path)))
+        except OSError as e:
+            print(f"No se pudo mover {path}: {str(e)}")
+        self._pending.pop(path, None)
+
+    def run_once(self) -> int:
+        """
+        Procesa los archivos listos en este momento
+
+        Returns:
+            int: Número de archivos procesados
+        """
+        processed = 0
+        for path in self.scan():
+            print(f"Procesando {os.path.basename(path)}...")
+            try:
+                if self.process_file(path):
+                    processed += 1
+            except Exception as e:
+                print(f"Error procesando {path}: {str(e)}")
+        return processed
+
+    def run(self) -> None:
+        """Vigila la carpeta hasta llamar a stop()"""
+        observer = self._start_observer()
+        try:
+            while not self._stop.is_set():
+                self.run_once()
+                # Con watchdog se despierta al llegar un archivo; sin él, sondeo periódico
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+        finally:
+            if observer:
+                observer.stop()
+                observer.join()
+
+    def stop(self) -> None:
+        """Detiene el servicio"""
+        self._stop.set()
+        self._wake.set()
+
+    def _start_observer(self):
+        if not _HAS_WATCHDOG:
+            return None
+
+        wake = self._wake
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wake.set()
+
+        observer = Observer()
+        observer.schedule(_Handler(), self.folder, recursive=False)
+        observer.start()
+        return observer
@@ -0,0 +1,373 @@
+"""
+Diseño único de la etiqueta
+Una sola definición declarativa (campos, posiciones, letras y código de barras)
+de la que salen la plantilla ZPL que se envía a la Zebra, la imagen PNG, el
+SVG de la vista previa y las celdas del PDF. El ajuste de cada etiqueta (ancho
+de barra y compresión de textos largos) se calcula una sola vez en
+colocar_etiqueta y todas las salidas lo aplican, así que la vista previa
+muestra lo que se imprime.
+"""
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+import unicodedata
+from typing import Dict, Iterator, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Etiqueta de 52 x 33 mm a 203 DPI; posiciones y tamaños en puntos de la impresora
+DISENO_ETIQUETA = {
+    'ancho': 415,
+    'alto': 264,
+    'elementos': (
+        # (x, y) = esquina superior izquierda, igual que ^FO en ZPL.
+        # 'requiere': el elemento solo se imprime si ese otro campo tiene valor
+        {'tipo': 'texto', 'campo': 'fecha', 'x': 280, 'y': 10, 'alto': 24, 'ancho': 24},
+        {'tipo': 'barras', 'campo': 'codigo', 'x': 30, 'y': 50, 'alto': 80, 'modulo': 2},
+        {'tipo': 'texto', 'campo': 'codigo', 'x': 30, 'y': 140, 'alto': 35, 'ancho': 35},
+        {'tipo': 'texto', 'campo': 'nombre', 'x': 30, 'y': 185, 'alto': 20, 'ancho': 18},
+        {'tipo': 'texto', 'campo': 'sexo', 'x': 30, 'y': 210, 'alto': 18, 'ancho': 16, 'requiere': 'nombre'},
+    ),
+}
+
+# Comandos ZPL de cada formato de código de barras
+ZPL_FORMATOS = {
+    'CODE128': '^BC',
+    'CODE39': '^B3',
+    'EAN13': '^BE',
+    'EAN8': '^B8',
+    'UPC_A': '^BU',
+    'ITF': '^BI'
+}
+
+# Fuentes parecidas a la fuente 0 de Zebra (sans negrita), en orden de preferencia
+FUENTES_RASTER = ('arialbd.ttf', 'Arial Bold.ttf', 'DejaVuSans-Bold.ttf', 'LiberationSans-Bold.ttf', 'arial.ttf')
+
+# Línea base del texto respecto al alto de letra (la fuente 0 no tiene descendentes bajo el alto indicado)
+_LINEA_BASE = 0.8
+# Puntos libres a la derecha del texto: un texto más largo se comprime horizontalmente
+MARGEN_DERECHO = 8
+
+# Ancho de cada carácter en Helvetica-Bold (= Arial Bold), en milésimas del tamaño de letra.
+# Mide el texto del SVG y del PDF, y es la base para estimar el de la Zebra
+_ANCHOS_NEGRITA = {
+    caracter: ancho
+    for caracteres, ancho in (
+        ("'", 238), (' ,./Iijl', 278), ('!():;-[]ft', 333), ('*r', 389), ('"', 474), ('z', 500),
+        ('#$0123456789Jacekvsxy_', 556), ('+<=>', 584), ('?FLTZbdghnopqu', 611), ('EPSVXY', 667),
+        ('&ABCDHKNRU', 722), ('GOQw', 778), ('M', 833), ('%m', 889), ('W', 944), ('@', 975),
+    )
+    for caracter in caracteres
+}
+_ANCHO_NEGRITA_DEFAULT = 600
+# La fuente 0 de la Zebra (CG Triumvirate Bold Condensed) es más angosta que Helvetica-Bold
+# con el mismo ancho de letra (^A0N,alto,ancho); valor aproximado
+FUENTE_0_CONDENSADA = 0.85
+
+Elemento = namedtuple('Elemento', 'tipo campo x y alto ancho modulo requiere base')
+# Ajuste de un elemento para una etiqueta concreta, igual en todas las salidas:
+# modulo = ancho de barra en puntos (entero, como ^BY); escala_x = compresión del texto
+# (ancho de letra ZPL / ancho del diseño); ancho = ancho impreso estimado en puntos
+Colocacion = namedtuple('Colocacion', 'elemento texto modulo escala_x ancho')
+
+
+@lru_cache(maxsize=1)
+def elementos() -> Tuple[Elemento, ...]:
+    """
+    Geometría precalculada de DISENO_ETIQUETA
+
+    Returns:
+        tuple: Elementos en el orden en que se imprimen (base = línea base del texto)
+    """
+    return tuple(
+        Elemento(e['tipo'], e['campo'], e['x'], e['y'], e['alto'], e.get('ancho', e['alto']),
+                 e.get('modulo', 2), e.get('requiere'), e['y'] + e['alto'] * _LINEA_BASE)
+        for e in DISENO_ETIQUETA['elementos']
+    )
+
+
+def fecha_etiqueta() -> str:
+    """Fecha impresa en la etiqueta (hoy)"""
+    return datetime.now().strftime("%d/%m/%Y")
+
+
+def valores_etiqueta(code, nombre=None, sexo=None, grau=None, fecha=None) -> Dict[str, str]:
+    """
+    Valores de los campos del diseño para una etiqueta
+
+    Args:
+        code (str): Código (barras y número grande)
+        nombre (str): Nombre opcional
+        sexo (str): Sexo opcional (solo se imprime con nombre)
+        grau (str): Grau opcional (disponible para diseños que lo incluyan)
+        fecha (str): Fecha a imprimir (por defecto hoy)
+
+    Returns:
+        dict: {campo: texto}
+    """
+    return {'fecha': fecha or fecha_etiqueta(), 'codigo': str(code), 'nombre': nombre or '',
+            'sexo': sexo or '', 'grau': str(grau) if grau else ''}
+
+
+def elementos_visibles(valores: Dict[str, str]) -> Iterator[Tuple[Elemento, str]]:
+    """
+    Elementos que se dibujan para estos valores, con su texto
+
+    Yields:
+        tuple: (Elemento, texto)
+    """
+    for elemento in elementos():
+        texto = valores.get(elemento.campo)
+        if texto and (not elemento.requiere or valores.get(elemento.requiere)):
+            yield elemento, texto
+
+
+def ancho_texto(texto: str, size: float) -> float:
+    """
+    Ancho de un texto en Helvetica-Bold / Arial Bold (las letras acentuadas miden como sin acento)
+
+    Args:
+        texto (str): Texto
+        size (float): Tamaño de letra
+
+    Returns:
+        float: Ancho en las mismas unidades que size
+    """
+    total = 0
+    for caracter in texto:
+        ancho = _ANCHOS_NEGRITA.get(caracter)
+        if ancho is None:
+            ancho = _ANCHOS_NEGRITA.get(unicodedata.normalize('NFD', caracter)[0], _ANCHO_NEGRITA_DEFAULT)
+        total += ancho
+    return total * size / 1000
+
+
+def texto_disponible(elemento: Elemento) -> float:
+    """Puntos entre el inicio del texto y el margen derecho de la etiqueta"""
+    return DISENO_ETIQUETA['ancho'] - elemento.x - MARGEN_DERECHO
+
+
+def colocar_etiqueta(valores: Dict[str, str], modulos: Optional[int] = None) -> Tuple[Colocacion, ...]:
+    """
+    Decide una vez por etiqueta cómo entra cada elemento: la Zebra y todas las vistas aplican lo mismo
+
+    Un código con demasiados módulos usa una barra más angosta (siempre un número entero de
+    puntos, como ^BY) y un texto que no entra hasta el margen derecho reduce el ancho de letra
+    (^A0N,alto,ancho) en lugar de salirse de la etiqueta.
+
+    Args:
+        valores (dict): Valores de valores_etiqueta
+        modulos (int, optional): Módulos del código (BarcodeWebGenerator.get_bar_runs);
+                                 None = ancho de barra del diseño
+
+    Returns:
+        tuple: Colocacion de cada elemento visible, en orden
+    """
+    resultado = []
+    for elemento, texto in elementos_visibles(valores):
+        if elemento.tipo == 'barras':
+            modulo = elemento.modulo
+            if modulos:
+                disponible = DISENO_ETIQUETA['ancho'] - 2 * elemento.x
+                modulo = max(1, min(modulo, int(disponible // modulos)))
+            resultado.append(Colocacion(elemento, texto, modulo, 1.0, modulo * (modulos or 0)))
+        else:
+            ancho = ancho_texto(texto, elemento.ancho) * FUENTE_0_CONDENSADA
+            escala_x = 1.0
+            if ancho > texto_disponible(elemento):
+                # Ancho de letra entero (como lo recibe ^A0) y el factor que realmente resulta
+                letra = max(1, int(elemento.ancho * texto_disponible(elemento) / ancho))
+                escala_x = letra / elemento.ancho
+                ancho *= escala_x
+            resultado.append(Colocacion(elemento, texto, elemento.modulo, escala_x, ancho))
+    return tuple(resultado)
+
+
+def ancho_dibujado(colocacion: Colocacion, ancho_propio: float) -> Optional[float]:
+    """
+    Ancho al que una vista (imagen, SVG o PDF) debe ajustar un texto dibujado con su propia fuente
+
+    Args:
+        colocacion (Colocacion): Colocación del texto (colocar_etiqueta)
+        ancho_propio (float): Ancho del texto con la fuente de la vista, en puntos del diseño
+
+    Returns:
+        float: Ancho en puntos del diseño, o None si se dibuja tal cual
+    """
+    if colocacion.escala_x < 1.0:
+        # La Zebra comprime este texto: la vista lo muestra con el mismo ancho impreso
+        return colocacion.ancho
+    if ancho_propio > texto_disponible(colocacion.elemento):
+        # La Zebra lo imprime entero; la fuente de la vista es más ancha y no debe salirse
+        return texto_disponible(colocacion.elemento)
+    return None
+
+
+@lru_cache(maxsize=None)
+def plantilla_zpl(barcode_type: str) -> Tuple[str, Dict[Tuple[str, str], Tuple[str, str, str]]]:
+    """
+    Plantilla ZPL compilada para un formato de código de barras
+
+    Returns:
+        tuple: (encabezado, {(tipo, campo): (prefijo, medio, sufijo)}); entre prefijo y medio
+               va el ajuste de la etiqueta (^BY de las barras o ancho de letra del texto)
+    """
+    encabezado = f"^XA\n^PW{DISENO_ETIQUETA['ancho']}\n^LL{DISENO_ETIQUETA['alto']}\n"
+    comando = ZPL_FORMATOS.get(barcode_type, '^BC')
+    partes = {}
+    for elemento in elementos():
+        if elemento.tipo == 'barras':
+            prefijo = f"^FO{elemento.x},{elemento.y}^BY"
+            medio = f"\n{comando}N,{elemento.alto},N,N,N,A\n^FD"
+        else:
+            prefijo = f"^FO{elemento.x},{elemento.y}^A0N,{elemento.alto},"
+            medio = "^FD"
+        partes[(elemento.tipo, elemento.campo)] = (prefijo, medio, "^FS\n")
+    return encabezado, partes
+
+
+def generar_zpl(barcode_type: str, valores: Dict[str, str], modulos: Optional[int] = None) -> str:
+    """
+    ZPL de una etiqueta a partir de la plantilla compilada
+
+    Args:
+        barcode_type (str): Formato de código de barras
+        valores (dict): Valores de valores_etiqueta
+        modulos (int, optional): Módulos del código, para elegir el ^BY que entra en la etiqueta
+
+    Returns:
+        str: Código ZPL (^XA ... ^XZ)
+    """
+    encabezado, partes = plantilla_zpl(barcode_type)
+    zpl = [encabezado]
+    for colocacion in colocar_etiqueta(valores, modulos):
+        elemento = colocacion.elemento
+        prefijo, medio, sufijo = partes[(elemento.tipo, elemento.campo)]
+        if elemento.tipo == 'barras':
+            ajuste = colocacion.modulo
+        else:
+            ajuste = round(elemento.ancho * colocacion.escala_x)
+        zpl.extend((prefijo, str(ajuste), medio, colocacion.texto, sufijo))
+    zpl.append("^XZ")
+    return ''.join(zpl)
+
+
+@lru_cache(maxsize=32)
+def cargar_fuente(size: int):
+    """Fuente TrueType del tamaño indicado (la de PIL si no hay ninguna instalada)"""
+    for nombre in FUENTES_RASTER:
+        try:
+            return ImageFont.truetype(nombre, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow < 10.1: fuente por defecto sin tamaño
+        return ImageFont.load_default()
+
+
+class RenderizadorRaster:
+    """Dibuja la etiqueta como imagen con la geometría del diseño (fuentes ya cargadas)"""
+
+    def __init__(self, escala: float = 1.0):
+        """
+        Args:
+            escala (float): Píxeles por punto de la impresora (1.0 = tamaño real a 203 DPI)
+        """
+        self.escala = escala
+        self.tamano = (round(DISENO_ETIQUETA['ancho'] * escala), round(DISENO_ETIQUETA['alto'] * escala))
+        self.fuentes = {elemento: cargar_fuente(max(1, round(elemento.alto * escala)))
+                        for elemento in elementos() if elemento.tipo == 'texto'}
+
+    def render(self, barras: Tuple[int, Tuple[Tuple[int, int], ...]], valores: Dict[str, str]) -> Image.Image:
+        """
+        Args:
+            barras (tuple): (módulos, tramos) de BarcodeWebGenerator.get_bar_runs
+            valores (dict): Valores de valores_etiqueta
+
+        Returns:
+            PIL.Image: Etiqueta en escala de grises
+        """
+        escala = self.escala
+        img = Image.new('L', self.tamano, 255)
+        draw = ImageDraw.Draw(img)
+        modulos, tramos = barras
+        for colocacion in colocar_etiqueta(valores, modulos):
+            elemento = colocacion.elemento
+            if elemento.tipo == 'barras':
+                modulo = colocacion.modulo * escala
+                x0, y0 = elemento.x * escala, elemento.y * escala
+                y1 = y0 + elemento.alto * escala - 1
+                for inicio, largo in tramos:
+                    draw.rectangle((round(x0 + inicio * modulo), y0,
+                                    round(x0 + (inicio + largo) * modulo) - 1, y1), fill=0)
+            else:
+                self._texto(img, draw, colocacion)
+        return img
+
+    def _texto(self, img, draw, colocacion):
+        escala = self.escala
+        elemento, texto = colocacion.elemento, colocacion.texto
+        fuente = self.fuentes[elemento]
+        if not isinstance(fuente, ImageFont.FreeTypeFont):
+            # Fuente de mapa de bits (sin anclas): se ubica por el borde superior
+            draw.text((elemento.x * escala, elemento.y * escala), texto, fill=0, font=fuente)
+            return
+        ancho = fuente.getlength(texto)
+        destino = ancho_dibujado(colocacion, ancho / escala)
+        if destino is None:
+            draw.text((elemento.x * escala, elemento.base * escala), texto, fill=0, font=fuente, anchor='ls')
+            return
+        # Texto largo: se dibuja aparte y se comprime a lo ancho que ocupa en la Zebra
+        alto = round(elemento.alto * escala * 1.2)
+        capa = Image.new('L', (max(1, round(ancho)), alto), 0)
+        ImageDraw.Draw(capa).text((0, (elemento.base - elemento.y) * escala), texto, fill=255, font=fuente, anchor='ls')
+        capa = capa.resize((max(1, round(destino * escala)), alto), Image.LANCZOS)
+        img.paste(0, (round(elemento.x * escala), round(elemento.y * escala)), mask=capa)
+
+
+@lru_cache(maxsize=4)
+def renderizador_raster(escala: float = 1.0) -> RenderizadorRaster:
+    """Renderizador compartido por escala (las fuentes se cargan una sola vez)"""
+    return RenderizadorRaster(escala)
+
+
+def renderizar_svg(barras: Tuple[int, Tuple[Tuple[int, int], ...]], valores: Dict[str, str]) -> str:
+    """
+    Etiqueta como SVG compacto: barras contiguas unidas en rectángulos de un solo
+    trazo y textos como texto SVG, en las coordenadas del diseño
+
+    Args:
+        barras (tuple): (módulos, tramos) de BarcodeWebGenerator.get_bar_runs
+        valores (dict): Valores de valores_etiqueta
+
+    Returns:
+        str: Documento SVG
+    """
+    ancho, alto = DISENO_ETIQUETA['ancho'], DISENO_ETIQUETA['alto']
+    modulos, tramos = barras
+    partes = []
+    for colocacion in colocar_etiqueta(valores, modulos):
+        elemento, texto = colocacion.elemento, colocacion.texto
+        if elemento.tipo == 'barras':
+            modulo = colocacion.modulo
+            # Un subtrazo por barra: 'z' vuelve al borde izquierdo de la barra y 'm' avanza hasta la siguiente
+            trazo = [f"M{elemento.x} {elemento.y}"]
+            anterior = 0
+            for inicio, largo in tramos:
+                trazo.append(f"m{(inicio - anterior) * modulo:g} 0h{largo * modulo:g}"
+                             f"v{elemento.alto}h-{largo * modulo:g}z")
+                anterior = inicio
+            partes.append(f'<path d="{"".join(trazo)}" shape-rendering="crispEdges"/>')
+        else:
+            destino = ancho_dibujado(colocacion, ancho_texto(texto, elemento.alto))
+            ajuste = ''
+            if destino is not None:
+                ajuste = f' textLength="{destino:.0f}" lengthAdjust="spacingAndGlyphs"'
+            partes.append(f'<text x="{elemento.x}" y="{elemento.base:g}" font-size="{elemento.alto}"{ajuste}>'
+                          f'{escape(texto)}</text>')
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {ancho} {alto}" width="{ancho}" height="{alto}">'
+            f'<rect width="{ancho}" height="{alto}" fill="#fff"/>'
+            f'<g font-family="Arial,Helvetica,sans-serif" font-weight="bold">{"".join(partes)}</g></svg>')
@@ -3,9 +3,27 @@ Módulo para leer archivos Excel en la versión web
 Adaptación del lector original para Streamlit
 """
 import pandas as pd
+import codecs
+import csv
 import os
 from typing import List, Dict, Optional
 
+from modules.registros_web import RegistrosColumnares
+
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+# Extensiones aceptadas además de Excel
+DELIMITED_EXTENSIONS = ('.csv', '.tsv', '.txt')
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls') + DELIMITED_EXTENSIONS + PARQUET_EXTENSIONS
+
+# Bytes leídos para detectar codificación y delimitador
+SNIFF_BYTES = 64 * 1024
+
 class ExcelWebReader:
     """Clase para leer y procesar archivos Excel en la versión web"""
     
@@ -17,12 +35,15 @@ class ExcelWebReader:
         
     def load_excel_with_header(self, file_path: str, header_row: int = 0, sheet_name: str = None) -> bool:
         """
-        Carga un archivo Excel con fila de encabezado personalizada
+        Carga un archivo de datos con fila de encabezado personalizada
+        
+        Acepta Excel (.xlsx, .xls), texto delimitado (.csv, .tsv, .txt) y
+        Parquet (.parquet). El formato se detecta por la extensión.
         
         Args:
-            file_path (str): Ruta al archivo Excel
+            file_path (str): Ruta al archivo
             header_row (int): Número de fila donde están los encabezados (0-based)
-            sheet_name (str, optional): Nombre de la hoja
+            sheet_name (str, optional): Nombre de la hoja (solo Excel)
             
         Returns:
             bool: True si se cargó exitosamente
@@ -37,12 +58,20 @@ class ExcelWebReader:
             
             self.header_row = header_row
             
-            # Leer Excel con header personalizado usando openpyxl
-            if sheet_name:
+            formato = self.detect_format(file_path)
+            if formato == 'csv':
+                self.df = self._read_delimited(file_path, header_row)
+            elif formato == 'parquet':
+                # Parquet guarda los encabezados en el esquema, header_row no aplica
+                self.df = pd.read_parquet(file_path)
+            elif sheet_name:
                 self.df = pd.read_excel(file_path, sheet_name=sheet_name, header=header_row, engine='openpyxl')
             else:
                 self.df = pd.read_excel(file_path, header=header_row, engine='openpyxl')
             
+            # Los encabezados numéricos se tratan como texto
+            self.df.columns = [str(col) for col in self.df.columns]
+            
             # Limpiar datos
             self.df = self.df.dropna(how='all')
             
@@ -61,9 +90,117 @@ class ExcelWebReader:
             return True
             
         except Exception as e:
-            print(f"Error cargando Excel: {str(e)}")
+            print(f"Error cargando archivo: {str(e)}")
             return False
     
+    @staticmethod
+    def detect_format(file_path: str) -> str:
+        """
+        Detecta el formato del archivo según su extensión
+        
+        Args:
+            file_path (str): Ruta al archivo
+            
+        Returns:
+            str: 'excel', 'csv' o 'parquet'
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension in DELIMITED_EXTENSIONS:
+            return 'csv'
+        if extension in PARQUET_EXTENSIONS:
+            return 'parquet'
+        return 'excel'
+    
+    def _read_delimited(self, file_path: str, header_row: int) -> pd.DataFrame:
+        """
+        Lee un archivo CSV/TSV detectando codificación y delimitador
+        
+        Todas las columnas se leen como texto para conservar los ceros a la
+        izquierda de los números de orden. Se usa el motor pyarrow si está
+        instalado y el motor C de pandas en caso contrario.
+        
+        Args:
+            file_path (str): Ruta al archivo
+            header_row (int): Fila de encabezados (0-based)
+            
+        Returns:
+            pd.DataFrame: Datos leídos
+        """
+        with open(file_path, 'rb') as f:
+            sample = f.read(SNIFF_BYTES)
+        
+        encoding = self._sniff_encoding(sample)
+        text = sample.decode(encoding, errors='ignore')
+        default = '\t' if file_path.lower().endswith('.tsv') else ','
+        delimiter = self._sniff_delimiter(text, default)
+        
+        options = {
+            'sep': delimiter,
+            'header': header_row,
+            'encoding': encoding,
+            'dtype': str,
+        }
+        
+        if _HAS_PYARROW and encoding in ('utf-8', 'utf-8-sig'):
+            try:
+                return pd.read_csv(file_path, engine='pyarrow', **options)
+            except Exception:
+                # Opciones no soportadas por pyarrow: continuar con el motor C
+                pass
+        
+        return pd.read_csv(file_path, engine='c', **options)
+    
+    @staticmethod
+    def _sniff_encoding(sample: bytes) -> str:
+        """
+        Detecta la codificación de un archivo de texto a partir de una muestra
+        
+        Args:
+            sample (bytes): Primeros bytes del archivo
+            
+        Returns:
+            str: Nombre de la codificación
+        """
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return 'utf-16'
+        
+        try:
+            sample.decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError as e:
+            # La muestra puede cortar un carácter multibyte al final
+            if e.start >= len(sample) - 3:
+                return 'utf-8'
+        
+        # Excel en Windows exporta CSV en cp1252
+        try:
+            sample.decode('cp1252')
+            return 'cp1252'
+        except UnicodeDecodeError:
+            return 'latin-1'
+    
+    @staticmethod
+    def _sniff_delimiter(text: str, default: str) -> str:
+        """
+        Detecta el delimitador de un archivo de texto
+        
+        Args:
+            text (str): Muestra decodificada del archivo
+            default (str): Delimitador a usar si no se puede detectar
+            
+        Returns:
+            str: Delimitador detectado
+        """
+        # Descartar la última línea, probablemente incompleta
+        lines = text.splitlines()[:-1] or text.splitlines()
+        try:
+            dialect = csv.Sniffer().sniff('\n'.join(lines), delimiters=',;\t|')
+            return dialect.delimiter
+        except csv.Error:
+            return default
+    
     def get_available_columns(self) -> List[str]:
         """
         Obtiene lista de columnas disponibles
@@ -76,7 +213,7 @@ class ExcelWebReader:
         
         return list(self.df.columns)
     
-    def get_data_with_config(self, config: Dict[str, str]) -> List[Dict]:
+    def get_data_with_config(self, config: Dict[str, str]) -> RegistrosColumnares:
         """
         Obtiene datos según configuración de columnas
         
@@ -86,43 +223,13 @@ class ExcelWebReader:
                 - 'grau': Columna de grau
         
         Returns:
-            List[Dict]: Lista de registros
+            RegistrosColumnares: Registros en formato columnar (sin filas vacías)
         """
         if self.df is None:
-            return []
-        
-        data = []
+            return RegistrosColumnares({})
         
-        for idx, row in self.df.iterrows():
-            record = {}
-            
-            if config.get('nombre') and config['nombre'] in self.df.columns:
-                val = row[config['nombre']]
-                if pd.notna(val):
-                    # Convertir a string, removiendo .0 si es número entero
-                    if isinstance(val, (int, float)):
-                        record[config['nombre']] = str(int(val)) if val == int(val) else str(val)
-                    else:
-                        record[config['nombre']] = str(val)
-                else:
-                    record[config['nombre']] = ''
-            
-            if config.get('grau') and config['grau'] in self.df.columns:
-                val = row[config['grau']]
-                if pd.notna(val):
-                    # Convertir a string, removiendo .0 si es número entero
-                    if isinstance(val, (int, float)):
-                        record[config['grau']] = str(int(val)) if val == int(val) else str(val)
-                    else:
-                        record[config['grau']] = str(val)
-                else:
-                    record[config['grau']] = ''
-            
-            # Solo agregar si tiene al menos un valor
-            if any(record.values()):
-                data.append(record)
-        
-        return data
+        columns = [config.get('nombre'), config.get('grau')]
+        return RegistrosColumnares.from_dataframe(self.df, [col for col in columns if col])
     
     def get_sheet_names(self) -> List[str]:
         """
@@ -134,6 +241,10 @@ class ExcelWebReader:
         if not self.file_path or not os.path.exists(self.file_path):
             return []
         
+        # CSV y Parquet no tienen hojas
+        if self.detect_format(self.file_path) != 'excel':
+            return []
+        
         # Verificar tamaño del archivo
         if os.path.getsize(self.file_path) == 0:
             raise ValueError("El archivo está vacío")
@@ -0,0 +1,236 @@
+"""
+Exportación de etiquetas a PDF en hojas A4/Carta para impresoras láser
+Alternativa cuando la Zebra no está disponible: varias etiquetas por hoja,
+barras dibujadas como rectángulos vectoriales (sin imágenes) y texto con las
+fuentes estándar del PDF. Las páginas se escriben una a una a medida que se
+completan, sin mantener el documento en memoria.
+"""
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from modules.diseno_etiqueta import (DISENO_ETIQUETA, ancho_dibujado, ancho_texto, colocar_etiqueta, fecha_etiqueta,
+                                     valores_etiqueta)
+
+# Puntos PDF por milímetro
+MM = 72 / 25.4
+
+# Plantillas de hoja: medidas en mm (página, márgenes, etiqueta y separación entre etiquetas)
+PLANTILLAS_HOJA = {
+    'A4 3x8 (70 x 37 mm)': {
+        'pagina': (210, 297), 'columnas': 3, 'filas': 8,
+        'etiqueta': (70, 37), 'margen': (0, 0.5), 'separacion': (0, 0),
+    },
+    'A4 4x10 (52.5 x 29.7 mm)': {
+        'pagina': (210, 297), 'columnas': 4, 'filas': 10,
+        'etiqueta': (52.5, 29.7), 'margen': (0, 0), 'separacion': (0, 0),
+    },
+    'A4 2x7 (99.1 x 38.1 mm)': {
+        'pagina': (210, 297), 'columnas': 2, 'filas': 7,
+        'etiqueta': (99.1, 38.1), 'margen': (4.65, 15.15), 'separacion': (2.5, 0),
+    },
+    'Carta 3x10 (66.7 x 25.4 mm)': {
+        'pagina': (215.9, 279.4), 'columnas': 3, 'filas': 10,
+        'etiqueta': (66.7, 25.4), 'margen': (4.8, 12.7), 'separacion': (3.2, 0),
+    },
+}
+PLANTILLA_DEFAULT = 'A4 3x8 (70 x 37 mm)'
+
+
+def _texto_pdf(texto: str) -> bytes:
+    """Cadena literal PDF en WinAnsiEncoding (acentos y Ñ incluidos)"""
+    data = str(texto).encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class EscritorPDF:
+    """PDF mínimo escrito en flujo: una página a la vez, el índice (xref) al final"""
+
+    # Objetos fijos; las páginas y sus contenidos se numeran desde _PRIMER_OBJETO
+    _CATALOGO, _PAGINAS, _FUENTE, _FUENTE_NEGRITA = 1, 2, 3, 4
+    _PRIMER_OBJETO = 5
+
+    def __init__(self, destino, ancho: float, alto: float, comprimir: bool = True):
+        """
+        Args:
+            destino (file): Archivo binario de salida (no necesita ser seekable)
+            ancho (float): Ancho de página en puntos
+            alto (float): Alto de página en puntos
+            comprimir (bool): Comprimir el contenido de las páginas (FlateDecode)
+        """
+        self.destino = destino
+        self.ancho = ancho
+        self.alto = alto
+        self.comprimir = comprimir
+        self._offsets = {}
+        self._posicion = 0
+        self._siguiente = self._PRIMER_OBJETO
+        self._paginas = []
+        self._escribir(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        for numero, fuente in ((self._FUENTE, b'Helvetica'), (self._FUENTE_NEGRITA, b'Helvetica-Bold')):
+            self._objeto(numero, b'<< /Type /Font /Subtype /Type1 /BaseFont /' + fuente +
+                         b' /Encoding /WinAnsiEncoding >>')
+
+    def _escribir(self, data: bytes) -> None:
+        self.destino.write(data)
+        self._posicion += len(data)
+
+    def _objeto(self, numero: int, cuerpo: bytes) -> None:
+        self._offsets[numero] = self._posicion
+        self._escribir(b'%d 0 obj\n' % numero + cuerpo + b'\nendobj\n')
+
+    def agregar_pagina(self, contenido: bytes) -> None:
+        """
+        Escribe una página con el flujo de operadores indicado
+
+        Args:
+            contenido (bytes): Operadores PDF de la página (F1 = Helvetica, F2 = Helvetica-Bold)
+        """
+        stream, numero = self._siguiente, self._siguiente + 1
+        self._siguiente += 2
+        filtro = b''
+        if self.comprimir:
+            contenido = zlib.compress(contenido, 6)
+            filtro = b' /Filter /FlateDecode'
+        self._objeto(stream, b'<< /Length %d%s >>\nstream\n' % (len(contenido), filtro) + contenido +
+                     b'\nendstream')
+        self._objeto(numero, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Contents %d 0 R '
+                             b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>'
+                     % (self.ancho, self.alto, stream))
+        self._paginas.append(numero)
+
+    def cerrar(self) -> int:
+        """
+        Escribe el árbol de páginas, el catálogo y el índice
+
+        Returns:
+            int: Páginas escritas
+        """
+        kids = b' '.join(b'%d 0 R' % numero for numero in self._paginas)
+        self._objeto(self._PAGINAS, b'<< /Type /Pages /Kids [' + kids + b'] /Count %d >>' % len(self._paginas))
+        self._objeto(self._CATALOGO, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+        total = self._siguiente
+        xref = self._posicion
+        lineas = [b'xref\n0 %d\n' % total, b'0000000000 65535 f \n']
+        for numero in range(1, total):
+            lineas.append(b'%010d 00000 n \n' % self._offsets[numero])
+        self._escribir(b''.join(lineas))
+        self._escribir(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (total, xref))
+        return len(self._paginas)
+
+
+def celdas(plantilla: Dict) -> List[Tuple[float, float, float, float]]:
+    """
+    Posición de cada etiqueta de la hoja, en orden de lectura
+
+    Args:
+        plantilla (dict): Una de PLANTILLAS_HOJA
+
+    Returns:
+        list: (x, y, ancho, alto) en puntos, con y = borde inferior de la celda
+    """
+    _, alto_pagina = plantilla['pagina']
+    ancho, alto = plantilla['etiqueta']
+    margen_x, margen_y = plantilla['margen']
+    sep_x, sep_y = plantilla['separacion']
+    resultado = []
+    for fila in range(plantilla['filas']):
+        for columna in range(plantilla['columnas']):
+            x = margen_x + columna * (ancho + sep_x)
+            y_superior = margen_y + fila * (alto + sep_y)
+            resultado.append((x * MM, (alto_pagina - y_superior - alto) * MM, ancho * MM, alto * MM))
+    return resultado
+
+
+def _texto(x: float, y: float, size: float, texto: str, escala_x: float = 1.0) -> bytes:
+    # Tz comprime el texto a lo ancho (en %), igual que la imagen y el SVG; se fija siempre porque
+    # forma parte del estado gráfico y pasaría a los textos siguientes
+    return b'BT /F2 %.2f Tf %.0f Tz %.2f %.2f Td %s Tj ET\n' % (size, escala_x * 100, x, y, _texto_pdf(texto))
+
+
+def dibujar_etiqueta(celda: Tuple[float, float, float, float], label: Dict,
+                     barras: Tuple[int, Tuple[Tuple[int, int], ...]], fecha: str) -> bytes:
+    """
+    Operadores PDF de una etiqueta con el diseño de la Zebra (DISENO_ETIQUETA) escalado a la celda
+
+    Args:
+        celda (tuple): (x, y, ancho, alto) en puntos
+        label (dict): Campos 'code', 'nombre' y opcionalmente 'sexo'/'grau'
+        barras (tuple): (total de módulos, tramos) de BarcodeWebGenerator.get_bar_runs
+        fecha (str): Fecha impresa en la esquina superior
+
+    Returns:
+        bytes: Operadores PDF
+    """
+    x0, y0, ancho, alto = celda
+    sx, sy = ancho / DISENO_ETIQUETA['ancho'], alto / DISENO_ETIQUETA['alto']
+    top = y0 + alto
+    modulos, tramos = barras
+    valores = valores_etiqueta(label['code'], label.get('nombre'), label.get('sexo'), label.get('grau'), fecha)
+
+    # El diseño mide desde arriba y PDF desde abajo; lo que exceda la celda se recorta como en la Zebra
+    partes = [b'q %.2f %.2f %.2f %.2f re W n 0 g\n' % (x0, y0, ancho, alto)]
+    for colocacion in colocar_etiqueta(valores, modulos):
+        elemento, texto = colocacion.elemento, colocacion.texto
+        if elemento.tipo == 'barras':
+            modulo = colocacion.modulo * sx
+            x_barras = x0 + elemento.x * sx
+            y_barras = top - (elemento.y + elemento.alto) * sy
+            partes.extend(b'%.3f %.2f %.3f %.2f re\n' % (x_barras + inicio * modulo, y_barras, largo * modulo,
+                                                         elemento.alto * sy)
+                          for inicio, largo in tramos)
+            partes.append(b'f\n')
+        else:
+            # La letra se escala con el alto de la celda; si la celda es más angosta que la etiqueta
+            # el texto ocupa proporcionalmente más y puede necesitar comprimirse
+            propio = ancho_texto(texto, elemento.alto) * sy / sx
+            destino = ancho_dibujado(colocacion, propio)
+            escala_x = destino / propio if destino is not None else 1.0
+            partes.append(_texto(x0 + elemento.x * sx, top - elemento.base * sy, elemento.alto * sy, texto, escala_x))
+    partes.append(b'Q\n')
+    return b''.join(partes)
+
+
+def escribir_pdf(destino, labels: Iterable[Dict], bar_runs: Callable[[str], Tuple], plantilla: str = PLANTILLA_DEFAULT,
+                 copies: int = 1, on_progress: Optional[Callable[[int], None]] = None) -> Tuple[int, int]:
+    """
+    Escribe un PDF con las etiquetas distribuidas en hojas según la plantilla
+
+    Args:
+        destino (file): Archivo binario de salida
+        labels (Iterable[dict]): Etiquetas ('code', 'nombre' y opcionalmente 'sexo'/'grau')
+        bar_runs (Callable): Recibe el código y retorna (módulos, tramos),
+                             ej: partial(generator.get_bar_runs, 'CODE128')
+        plantilla (str): Nombre de una plantilla de PLANTILLAS_HOJA
+        copies (int): Copias de cada etiqueta (en celdas consecutivas)
+        on_progress (Callable, optional): Recibe las etiquetas colocadas tras cada página
+
+    Returns:
+        tuple: (etiquetas colocadas, páginas)
+    """
+    hoja = PLANTILLAS_HOJA[plantilla]
+    ancho_pagina, alto_pagina = hoja['pagina']
+    posiciones = celdas(hoja)
+    pdf = EscritorPDF(destino, ancho_pagina * MM, alto_pagina * MM)
+    fecha = fecha_etiqueta()
+
+    colocadas = paginas = 0
+    pagina = []
+    for label in labels:
+        barras = bar_runs(str(label['code']))
+        for _ in range(copies):
+            pagina.append(dibujar_etiqueta(posiciones[len(pagina)], label, barras, fecha))
+            colocadas += 1
+            if len(pagina) == len(posiciones):
+                pdf.agregar_pagina(b''.join(pagina))
+                paginas += 1
+                pagina = []
+                if on_progress:
+                    on_progress(colocadas)
+    if pagina or not paginas:
+        # Última hoja incompleta (o una hoja en blanco si no hubo etiquetas)
+        pdf.agregar_pagina(b''.join(pagina))
+    paginas = pdf.cerrar()
+    if on_progress:
+        on_progress(colocadas)
+    return colocadas, paginas
@@ -0,0 +1,138 @@
+"""
+Exportación de etiquetas a ZIP en flujo
+Cada imagen se escribe en el ZIP apenas se genera (la memoria no crece con el
+lote), las etiquetas repetidas y las copias se guardan una sola vez con un
+manifiesto, y las imágenes PNG se guardan sin volver a comprimir
+"""
+import csv
+import io
+import zipfile
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+MANIFEST_NAME = 'manifiesto.csv'
+# Lotes de etiquetas generándose a la vez en el pool (acota la memoria)
+MAX_LOTES_EN_VUELO = 8
+
+# Formatos ya comprimidos: volver a comprimirlos solo gasta CPU
+_YA_COMPRIMIDOS = {'png', 'jpg', 'jpeg'}
+
+
+def nombre_archivo(numero: int, label: Dict, extension: str = 'png') -> str:
+    """
+    Nombre de archivo seguro para una etiqueta
+
+    Args:
+        numero (int): Número de la etiqueta en la exportación
+        label (dict): Campos de la etiqueta ('code' y opcionalmente 'nombre')
+        extension (str): Extensión del archivo
+
+    Returns:
+        str: Nombre del archivo (ej: '00001_1622485.01_JUAN_PEREZ.png')
+    """
+    partes = [f"{numero:05d}", str(label.get('code', ''))]
+    if label.get('nombre'):
+        partes.append(str(label['nombre'])[:40])
+    nombre = '_'.join(partes)
+    for caracter in ' /\\:*?"<>|':
+        nombre = nombre.replace(caracter, '_')
+    return f"{nombre}.{extension}"
+
+
+def _render_lote(render: Callable[[Dict], bytes], labels: List[Dict]) -> List[bytes]:
+    # Función de módulo: se puede enviar a un ProcessPoolExecutor junto con render
+    return [render(label) for label in labels]
+
+
+def renderizar_en_orden(labels: Iterable[Dict], render: Callable[[Dict], bytes], executor=None,
+                        lote: int = 1, en_vuelo: int = MAX_LOTES_EN_VUELO) -> Iterator[Tuple[Dict, bytes]]:
+    """
+    Genera las imágenes en un pool y las entrega en el orden original
+
+    A diferencia de executor.map, no envía todo el lote de una vez: como
+    máximo hay `en_vuelo` lotes generándose o esperando ser consumidos.
+
+    Args:
+        labels (Iterable[dict]): Etiquetas a generar
+        render (Callable): Recibe una etiqueta y retorna los bytes de la imagen
+                           (con ProcessPoolExecutor debe ser una función de módulo o un partial)
+        executor (Executor, optional): Pool de hilos o procesos (None = en este hilo)
+        lote (int): Etiquetas por tarea enviada al pool
+        en_vuelo (int): Máximo de tareas pendientes
+
+    Yields:
+        tuple: (etiqueta, bytes de la imagen)
+    """
+    if executor is None:
+        for label in labels:
+            yield label, render(label)
+        return
+
+    pendientes = deque()
+    iterador = iter(labels)
+    while True:
+        while len(pendientes) < en_vuelo:
+            chunk = [label for _, label in zip(range(lote), iterador)]
+            if not chunk:
+                break
+            pendientes.append((chunk, executor.submit(_render_lote, render, chunk)))
+        if not pendientes:
+            return
+        chunk, future = pendientes.popleft()
+        yield from zip(chunk, future.result())
+
+
+def escribir_zip(destino, labels: Iterable[Dict], render: Callable[[Dict], bytes], copies: int = 1,
+                 extension: str = 'png', executor=None, lote: int = 1,
+                 on_progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Escribe un ZIP con una imagen por etiqueta distinta y un manifiesto
+
+    Las etiquetas con los mismos campos (code, nombre, grau, sexo) se generan y
+    guardan una sola vez; el manifiesto lista todas las etiquetas pedidas, el
+    archivo que les corresponde y las copias a imprimir.
+
+    Args:
+        destino (str | file): Ruta o archivo binario de salida (no necesita ser seekable)
+        labels (Iterable[dict]): Etiquetas en orden
+        render (Callable): Recibe una etiqueta y retorna los bytes de la imagen
+        copies (int): Copias de cada etiqueta (solo se anotan en el manifiesto)
+        extension (str): Extensión de las imágenes ('png', 'svg', ...)
+        executor (Executor, optional): Pool donde generar las imágenes
+        lote (int): Etiquetas por tarea enviada al pool
+        on_progress (Callable, optional): Recibe las imágenes escritas hasta el momento
+
+    Returns:
+        int: Etiquetas del manifiesto (incluye repetidas)
+    """
+    compression = zipfile.ZIP_STORED if extension in _YA_COMPRIMIDOS else zipfile.ZIP_DEFLATED
+    archivos = {}
+    pedidas = []
+
+    def clave(label):
+        return (label.get('code', ''), label.get('nombre', ''), label.get('grau', ''), label.get('sexo', ''))
+
+    def unicas():
+        # Solo las etiquetas que aún no se generaron pasan al pool
+        for label in labels:
+            key = clave(label)
+            pedidas.append(key)
+            if key not in archivos:
+                archivos[key] = None
+                yield label
+
+    with zipfile.ZipFile(destino, 'w', compression) as zf:
+        for numero, (label, data) in enumerate(renderizar_en_orden(unicas(), render, executor, lote), start=1):
+            archivo = nombre_archivo(numero, label, extension)
+            zf.writestr(archivo, data)
+            archivos[clave(label)] = archivo
+            if on_progress:
+                on_progress(numero)
+
+        manifest = io.StringIO()
+        writer = csv.writer(manifest)
+        writer.writerow(['etiqueta', 'archivo', 'codigo', 'nombre', 'grau', 'sexo', 'copias'])
+        for numero, key in enumerate(pedidas, start=1):
+            writer.writerow([numero, archivos[key], *key, copies])
+        zf.writestr(MANIFEST_NAME, manifest.getvalue(), zipfile.ZIP_DEFLATED)
+    return len(pedidas)
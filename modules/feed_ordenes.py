@@ -0,0 +1,197 @@
+"""
+Feed de órdenes nuevas de Nexlab para impresión automática de etiquetas
+Consulta periódicamente las órdenes creadas después de una marca de agua
+(o_fecha, o_numero) y las envía a la impresora de la estación. Cada consulta
+vuelve a revisar unos minutos antes de la marca: una orden cuya transacción
+confirma tarde aparece con una fecha anterior a la marca y también se imprime
+(una sola vez, gracias a las órdenes impresas que se recuerdan)
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from modules.pipeline_zpl import iter_zpl_batches
+
+STATE_FILE = os.path.join("web_app", "temp", "feed_ordenes.json")
+# Órdenes impresas que se recuerdan además de la marca de agua (deben cubrir la ventana de revisión)
+MAX_IMPRESAS_RECORDADAS = 5000
+# Segundos antes de la marca de agua que se vuelven a consultar (órdenes confirmadas tarde)
+REVISION_SEGUNDOS = 180
+
+
+class FeedOrdenes:
+    """Servicio que imprime una etiqueta por cada orden nueva en Nexlab"""
+
+    def __init__(self, nexlab, printer, state_path: str = STATE_FILE,
+                 barcode_format: str = 'CODE128', copies: int = 1, batch_size: int = 50,
+                 fetch_size: int = 200, min_interval: float = 2.0, max_interval: float = 30.0,
+                 lookback: float = REVISION_SEGUNDOS):
+        """
+        Args:
+            nexlab (OrdenesNexlab): Acceso a la base de datos de órdenes
+            printer (ZebraWebPrinter): Impresora con printer_name configurado
+            state_path (str): Archivo JSON con la marca de agua y las órdenes impresas
+            barcode_format (str): Formato de código de barras
+            copies (int): Copias de cada etiqueta
+            batch_size (int): Etiquetas por trabajo de impresión
+            fetch_size (int): Órdenes máximas por consulta
+            min_interval (float): Segundos entre consultas cuando llegan órdenes
+            max_interval (float): Segundos entre consultas tras un período sin órdenes
+            lookback (float): Segundos antes de la marca de agua que se vuelven a revisar
+        """
+        self.nexlab = nexlab
+        self.printer = printer
+        self.state_path = state_path
+        self.barcode_format = barcode_format
+        self.copies = copies
+        self.batch_size = batch_size
+        self.fetch_size = fetch_size
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.lookback = lookback
+        self.last_fetch = 0
+        # Posición dentro de la revisión en curso (None = empezar otra desde la marca - lookback)
+        self._desde = None
+        self.state = self._load_state()
+        self._stop = threading.Event()
+
+    def _load_state(self) -> Dict:
+        state = {'marca_agua': None, 'impresas': {}, 'en_envio': []}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state.update(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Error leyendo estado del feed, se inicia vacío: {str(e)}")
+        state['impresas'] = OrderedDict(state['impresas'])
+
+        # Un corte durante el envío deja el lote sin confirmar: no se reimprime
+        if state['en_envio']:
+            print(f"⚠️ Envío interrumpido, verificar manualmente las órdenes: {', '.join(state['en_envio'])}")
+            fecha = datetime.now().isoformat(timespec='seconds')
+            for numero in state['en_envio']:
+                state['impresas'][numero] = fecha
+            state['en_envio'] = []
+        return state
+
+    def _save_state(self) -> None:
+        # Escritura atómica: un corte a mitad de escritura no pierde el estado
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def watermark(self):
+        """
+        Última orden procesada
+
+        Returns:
+            tuple: (datetime, número); al iniciar por primera vez, el momento actual
+                   (no se imprimen órdenes anteriores al servicio)
+        """
+        if self.state['marca_agua'] is None:
+            self.state['marca_agua'] = [datetime.now().isoformat(sep=' '), '']
+            self._save_state()
+        fecha, numero = self.state['marca_agua']
+        return datetime.fromisoformat(fecha), numero
+
+    def poll_once(self) -> int:
+        """
+        Consulta las órdenes nuevas e imprime sus etiquetas
+
+        Cada revisión empieza `lookback` segundos antes de la marca de agua y
+        avanza de a fetch_size órdenes; las que ya se imprimieron se saltean.
+        La marca de agua avanza solo con los lotes enviados; si la impresora
+        falla, la revisión se repite en la siguiente consulta.
+
+        Returns:
+            int: Etiquetas impresas (-1 si falló la consulta o la impresión)
+        """
+        self.last_fetch = 0
+        if self._desde is None:
+            fecha, _ = self.watermark()
+            self._desde = (fecha - timedelta(seconds=self.lookback), '')
+        exito, ordenes = self.nexlab.listar_ordenes_nuevas(self._desde, self.fetch_size)
+        if not exito:
+            print(f"Error consultando órdenes nuevas: {ordenes}")
+            self._desde = None
+            return -1
+
+        self.last_fetch = len(ordenes)
+        printed = 0
+        for inicio in range(0, len(ordenes), self.batch_size):
+            count = self._print_batch(ordenes[inicio:inicio + self.batch_size])
+            if count < 0:
+                self._desde = None
+                return -1
+            printed += count
+
+        if len(ordenes) < self.fetch_size:
+            # Revisión completa: la próxima vuelve a empezar desde la marca de agua
+            self._desde = None
+        else:
+            self._desde = (ordenes[-1]['fecha_creacion'], ordenes[-1]['numero_orden'])
+        return printed
+
+    def _print_batch(self, ordenes: List[Dict]) -> int:
+        pendientes = [orden for orden in ordenes if str(orden['numero_orden']) not in self.state['impresas']]
+        labels = []
+        for orden in pendientes:
+            etiqueta = self.nexlab.generar_etiqueta_texto(orden)
+            labels.append({'code': etiqueta['codigo'], 'nombre': etiqueta['nombre'], 'sexo': etiqueta['sexo']})
+
+        if labels:
+            # Registrar el lote antes de enviarlo: tras un corte no se sabe si salió
+            self.state['en_envio'] = [str(orden['numero_orden']) for orden in pendientes]
+            self._save_state()
+            data = b''.join(zpl for _, zpl in iter_zpl_batches(
+                self.printer, labels, self.barcode_format, self.copies, len(labels)
+            ))
+            if not self.printer.send_raw(data):
+                print(f"Error de impresión en órdenes {pendientes[0]['numero_orden']}-"
+                      f"{pendientes[-1]['numero_orden']}, se reintentará")
+                self.state['en_envio'] = []
+                self._save_state()
+                return -1
+
+        fecha = datetime.now().isoformat(timespec='seconds')
+        for orden in pendientes:
+            self.state['impresas'][str(orden['numero_orden'])] = fecha
+            print(f"  Orden {orden['numero_orden']} impresa")
+        while len(self.state['impresas']) > MAX_IMPRESAS_RECORDADAS:
+            self.state['impresas'].popitem(last=False)
+
+        # Las órdenes de la ventana de revisión son anteriores a la marca: no la hacen retroceder
+        ultima = ordenes[-1]
+        if ultima['fecha_creacion'] >= self.watermark()[0]:
+            self.state['marca_agua'] = [ultima['fecha_creacion'].isoformat(sep=' '), ultima['numero_orden']]
+        self.state['en_envio'] = []
+        self._save_state()
+        return len(pendientes)
+
+    def run(self) -> None:
+        """
+        Consulta órdenes nuevas hasta llamar a stop()
+
+        El intervalo se ajusta a la actividad: vuelve al mínimo al llegar
+        órdenes y crece gradualmente hasta el máximo mientras no hay nuevas.
+        """
+        while not self._stop.is_set():
+            result = self.poll_once()
+            if result >= 0 and self._desde is not None:
+                # La revisión no terminó (quedan órdenes): consultar de inmediato
+                continue
+            if result > 0:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * 1.5)
+            self._stop.wait(self.interval)
+
+    def stop(self) -> None:
+        """Detiene el servicio"""
+        self._stop.set()
@@ -0,0 +1,403 @@
+"""
+Servicio HTTP local de etiquetas para otros sistemas del hospital
+Genera PNG/SVG/ZPL y encola trabajos de impresión a partir de una etiqueta
+(code, nombre, grau, sexo) o de un lote {"etiquetas": [...]}
+
+Rutas:
+    GET  /salud                 Estado del servicio, la cola y la impresora
+    GET  /png|/svg|/zpl?code=   Una etiqueta con parámetros en la URL
+    POST /png|/svg|/zpl         Una etiqueta o un lote (PNG/SVG de un lote se entregan en ZIP)
+    POST /imprimir              Encola un trabajo de impresión (202 + id del trabajo)
+    GET  /trabajos/<id>         Estado de un trabajo de impresión
+"""
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from modules.diseno_etiqueta import fecha_etiqueta
+from modules.exportar_zip import escribir_zip
+from modules.pipeline_zpl import iter_zpl_batches, print_stream
+
+# Etiquetas máximas por solicitud
+MAX_ETIQUETAS_LOTE = 2000
+# Tamaño máximo del cuerpo de una solicitud (bytes)
+MAX_CUERPO = 2 * 1024 * 1024
+# Segundos que una conexión keep-alive puede quedar inactiva
+KEEPALIVE_TIMEOUT = 5.0
+# Imágenes renderizadas que se conservan en memoria (compartidas entre clientes)
+CACHE_IMAGENES = 2000
+# Trabajos de impresión terminados que se recuerdan para /trabajos/<id>
+MAX_TRABAJOS_RECORDADOS = 1000
+
+TIPOS_CONTENIDO = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'zpl': 'text/plain; charset=utf-8',
+    'zip': 'application/zip',
+    'json': 'application/json; charset=utf-8',
+}
+
+
+class ErrorSolicitud(Exception):
+    """Solicitud inválida: se responde con el código HTTP indicado"""
+
+    def __init__(self, mensaje: str, status: int = 400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+class ColaImpresion:
+    """Trabajos de impresión enviados en orden por un único hilo"""
+
+    def __init__(self, printer, batch_size: int = 50):
+        """
+        Args:
+            printer (ZebraWebPrinter): Impresora con printer_name configurado
+            batch_size (int): Etiquetas por envío a la impresora
+        """
+        self.printer = printer
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._trabajos = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='cola-impresion', daemon=True)
+        self._thread.start()
+
+    def encolar(self, labels: List[Dict], barcode_format: str, copies: int) -> str:
+        """
+        Agrega un trabajo a la cola
+
+        Returns:
+            str: Id del trabajo
+        """
+        trabajo_id = uuid.uuid4().hex[:12]
+        trabajo = {'id': trabajo_id, 'estado': 'en_cola', 'etiquetas': len(labels),
+                   'impresas': 0, 'fallidas': 0, 'creado': time.time()}
+        with self._lock:
+            self._trabajos[trabajo_id] = trabajo
+            while len(self._trabajos) > MAX_TRABAJOS_RECORDADOS:
+                self._trabajos.popitem(last=False)
+        self._queue.put((trabajo, labels, barcode_format, copies))
+        return trabajo_id
+
+    def estado(self, trabajo_id: str) -> Optional[Dict]:
+        """Copia del estado de un trabajo (None si no existe)"""
+        with self._lock:
+            trabajo = self._trabajos.get(trabajo_id)
+            return dict(trabajo) if trabajo else None
+
+    def pendientes(self) -> int:
+        """Trabajos que esperan en la cola"""
+        return self._queue.qsize()
+
+    def stop(self) -> None:
+        """Termina el hilo después de los trabajos ya encolados"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            trabajo, labels, barcode_format, copies = item
+            trabajo['estado'] = 'imprimiendo'
+
+            def on_progress(printed, failed):
+                trabajo['impresas'], trabajo['fallidas'] = printed, failed
+
+            try:
+                batches = iter_zpl_batches(self.printer, labels, barcode_format, copies, self.batch_size)
+                printed, failed = print_stream(self.printer, batches, on_progress)
+                trabajo['estado'] = 'terminado' if failed == 0 else 'error'
+            except Exception as e:
+                trabajo['estado'] = 'error'
+                trabajo['error'] = str(e)
+                print(f"Error en trabajo de impresión {trabajo['id']}: {str(e)}")
+
+
+class ServicioEtiquetas:
+    """Generación de etiquetas compartida por todas las conexiones del servidor"""
+
+    def __init__(self, generator, printer, cache_size: int = CACHE_IMAGENES, batch_size: int = 50):
+        """
+        Args:
+            generator (BarcodeWebGenerator): Generador de códigos de barras
+            printer (ZebraWebPrinter): Impresora (generate_zpl y, si tiene printer_name, impresión)
+            cache_size (int): Imágenes renderizadas que se conservan en memoria
+            batch_size (int): Etiquetas por envío a la impresora
+        """
+        self.generator = generator
+        self.printer = printer
+        self.formatos = set(generator.get_supported_formats())
+        self.cola = ColaImpresion(printer, batch_size) if printer.printer_name else None
+        # El caché es compartido: la misma etiqueta pedida por varios sistemas se renderiza una vez
+        self._png = lru_cache(maxsize=cache_size)(self._render_png)
+        self._svg = lru_cache(maxsize=cache_size)(self._render_svg)
+
+    def etiquetas(self, payload: Dict) -> Tuple[List[Dict], str, int, bool]:
+        """
+        Valida el cuerpo de una solicitud
+
+        Args:
+            payload (dict): Una etiqueta {'code', 'nombre', 'grau', 'sexo'} o {'etiquetas': [...]},
+                            con 'formato' y 'copias' opcionales
+
+        Returns:
+            tuple: (etiquetas, formato, copias, es_lote)
+        """
+        if not isinstance(payload, dict):
+            raise ErrorSolicitud("El cuerpo debe ser un objeto JSON")
+        barcode_format = str(payload.get('formato') or 'CODE128').upper()
+        if barcode_format not in self.formatos:
+            raise ErrorSolicitud(f"Formato no soportado: {barcode_format}")
+        try:
+            copies = int(payload.get('copias') or 1)
+        except (TypeError, ValueError):
+            raise ErrorSolicitud("'copias' debe ser un número")
+        if not 1 <= copies <= 100:
+            raise ErrorSolicitud("'copias' debe estar entre 1 y 100")
+
+        es_lote = 'etiquetas' in payload
+        items = payload['etiquetas'] if es_lote else [payload]
+        if not isinstance(items, list) or not items:
+            raise ErrorSolicitud("'etiquetas' debe ser una lista no vacía")
+        if len(items) > MAX_ETIQUETAS_LOTE:
+            raise ErrorSolicitud(f"Máximo {MAX_ETIQUETAS_LOTE} etiquetas por solicitud", 413)
+
+        labels = []
+        for numero, item in enumerate(items, start=1):
+            if not isinstance(item, dict):
+                raise ErrorSolicitud(f"Etiqueta {numero}: debe ser un objeto")
+            code = str(item.get('code') or item.get('codigo') or '').strip()
+            if not code:
+                raise ErrorSolicitud(f"Etiqueta {numero}: falta 'code'")
+            labels.append({
+                'code': code,
+                'nombre': str(item.get('nombre') or '').strip(),
+                'grau': str(item.get('grau') or '').strip(),
+                'sexo': str(item.get('sexo') or '').strip(),
+            })
+        return labels, barcode_format, copies, es_lote
+
+    def _render_png(self, barcode_format: str, code: str, nombre: str, grau: str, sexo: str, fecha: str) -> bytes:
+        img = self.generator.generate_barcode_with_text(barcode_format, code, nombre or None, grau or None,
+                                                        sexo or None, fecha)
+        buffer = BytesIO()
+        img.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def _render_svg(self, barcode_format: str, code: str, nombre: str, grau: str, sexo: str, fecha: str) -> bytes:
+        svg = self.generator.generate_barcode_with_text_svg(barcode_format, code, nombre or None, grau or None,
+                                                            sexo or None, fecha)
+        return svg.encode('utf-8')
+
+    def imagen(self, tipo: str, label: Dict, barcode_format: str) -> bytes:
+        """
+        PNG o SVG de una etiqueta (desde el caché si ya se generó)
+
+        Args:
+            tipo (str): 'png' o 'svg'
+            label (dict): Campos de la etiqueta
+            barcode_format (str): Formato de código de barras
+
+        Returns:
+            bytes: Imagen
+        """
+        # La fecha impresa forma parte de la clave: el caché no devuelve etiquetas de otro día
+        campos = (barcode_format, label['code'], label['nombre'], label['grau'], label['sexo'], fecha_etiqueta())
+        try:
+            if tipo == 'png':
+                return self._png(*campos)
+            return self._svg(*campos)
+        except Exception as e:
+            raise ErrorSolicitud(f"Código {label['code']}: {str(e)}")
+
+    def zip_imagenes(self, tipo: str, labels: List[Dict], barcode_format: str, copies: int = 1) -> bytes:
+        """ZIP con una imagen por etiqueta distinta y manifiesto (PNG sin recomprimir, SVG comprimido)"""
+        buffer = BytesIO()
+        escribir_zip(buffer, labels, lambda label: self.imagen(tipo, label, barcode_format), copies, tipo)
+        return buffer.getvalue()
+
+    def zpl(self, labels: List[Dict], barcode_format: str, copies: int) -> bytes:
+        """ZPL de todas las etiquetas (la fecha impresa cambia cada día: no se guarda en caché)"""
+        return b''.join(data for _, data in iter_zpl_batches(self.printer, labels, barcode_format,
+                                                             copies, len(labels)))
+
+    def salud(self) -> Dict:
+        """Estado de la impresora, la cola de impresión y el caché"""
+        info = self._png.cache_info()
+        return {
+            'impresora': self.printer.printer_name,
+            'impresora_disponible': bool(self.printer.printer_name) and self.printer.test_connection(),
+            'trabajos_en_cola': self.cola.pendientes() if self.cola else 0,
+            'cache_png': {'aciertos': info.hits, 'fallos': info.misses, 'tamano': info.currsize},
+        }
+
+
+class ManejadorEtiquetas(BaseHTTPRequestHandler):
+    """Atiende las rutas del servicio; HTTP/1.1 mantiene la conexión abierta entre solicitudes"""
+
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+    server_version = 'ServicioEtiquetas/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _responder(self, status: int, body: bytes, tipo: str, extra: Optional[Dict] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', TIPOS_CONTENIDO[tipo])
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _json(self, status: int, data: Dict) -> None:
+        self._responder(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'json')
+
+    def _leer_json(self) -> Dict:
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            raise ErrorSolicitud("Content-Length inválido")
+        if length > MAX_CUERPO:
+            # El cuerpo no se lee: la conexión no se puede reutilizar
+            self.close_connection = True
+            raise ErrorSolicitud(f"Cuerpo mayor a {MAX_CUERPO} bytes", 413)
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise ErrorSolicitud("JSON inválido")
+
+    def _atender(self, ruta: str, payload: Dict) -> None:
+        servicio = self.server.servicio
+        tipo = ruta.strip('/')
+        if ruta == '/salud':
+            self._json(200, {'estado': 'ok', **self.server.estadisticas(), **servicio.salud()})
+        elif ruta.startswith('/trabajos/'):
+            trabajo = servicio.cola.estado(ruta.rsplit('/', 1)[1]) if servicio.cola else None
+            if trabajo is None:
+                raise ErrorSolicitud("Trabajo no encontrado", 404)
+            self._json(200, trabajo)
+        elif tipo in ('png', 'svg', 'zpl'):
+            labels, barcode_format, copies, es_lote = servicio.etiquetas(payload)
+            if tipo == 'zpl':
+                self._responder(200, servicio.zpl(labels, barcode_format, copies), 'zpl')
+            elif es_lote:
+                self._responder(200, servicio.zip_imagenes(tipo, labels, barcode_format, copies), 'zip',
+                                {'Content-Disposition': f'attachment; filename="etiquetas_{tipo}.zip"'})
+            else:
+                self._responder(200, servicio.imagen(tipo, labels[0], barcode_format), tipo,
+                                {'Cache-Control': 'max-age=3600'})
+        elif tipo == 'imprimir':
+            if self.command != 'POST':
+                raise ErrorSolicitud("Usar POST", 405)
+            if servicio.cola is None:
+                raise ErrorSolicitud("El servicio no tiene impresora configurada", 503)
+            labels, barcode_format, copies, _ = servicio.etiquetas(payload)
+            trabajo_id = servicio.cola.encolar(labels, barcode_format, copies)
+            self._json(202, {'id': trabajo_id, 'etiquetas': len(labels), 'estado': f'/trabajos/{trabajo_id}'})
+        else:
+            raise ErrorSolicitud("Ruta no encontrada", 404)
+
+    def _procesar(self, payload_fn) -> None:
+        url = urlsplit(self.path)
+        try:
+            self._atender(url.path.rstrip('/') or '/', payload_fn(url))
+        except ErrorSolicitud as e:
+            self._json(e.status, {'error': str(e)})
+        except Exception as e:
+            print(f"Error atendiendo {self.command} {self.path}: {str(e)}")
+            self._json(500, {'error': str(e)})
+
+    def do_GET(self):
+        self._procesar(lambda url: {k: v[-1] for k, v in parse_qs(url.query).items()})
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        self._procesar(lambda url: self._leer_json())
+
+
+class ServidorEtiquetas(HTTPServer):
+    """
+    Servidor HTTP con un pool fijo de hilos
+
+    Cada conexión (con sus solicitudes keep-alive) ocupa un hilo del pool;
+    cuando hilos y cola están llenos se responde 503 en lugar de acumular.
+    """
+
+    def __init__(self, address: Tuple[str, int], servicio: ServicioEtiquetas,
+                 trabajadores: int = 8, cola: int = 32, verbose: bool = False):
+        """
+        Args:
+            address (tuple): (host, puerto); puerto 0 elige uno libre
+            servicio (ServicioEtiquetas): Generación compartida de etiquetas
+            trabajadores (int): Hilos que atienden conexiones
+            cola (int): Conexiones aceptadas que pueden esperar un hilo libre
+            verbose (bool): Registrar cada solicitud en la consola
+        """
+        self.servicio = servicio
+        self.trabajadores = trabajadores
+        self.verbose = verbose
+        self._executor = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix='http-etiquetas')
+        self._cupos = threading.BoundedSemaphore(trabajadores + cola)
+        self._lock = threading.Lock()
+        self._activas = 0
+        self._atendidas = 0
+        self._rechazadas = 0
+        super().__init__(address, ManejadorEtiquetas)
+
+    def process_request(self, request, client_address):
+        if not self._cupos.acquire(blocking=False):
+            with self._lock:
+                self._rechazadas += 1
+            try:
+                body = b'{"error": "Servicio ocupado"}'
+                request.sendall(b'HTTP/1.1 503 Service Unavailable\r\nContent-Type: application/json\r\n'
+                                b'Retry-After: 1\r\nConnection: close\r\n'
+                                b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self._executor.submit(self._conexion, request, client_address)
+
+    def _conexion(self, request, client_address):
+        with self._lock:
+            self._activas += 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._lock:
+                self._activas -= 1
+                self._atendidas += 1
+            self._cupos.release()
+
+    def estadisticas(self) -> Dict:
+        """Conexiones atendidas, activas y rechazadas por falta de cupo"""
+        with self._lock:
+            return {'trabajadores': self.trabajadores, 'conexiones_activas': self._activas,
+                    'conexiones_atendidas': self._atendidas, 'conexiones_rechazadas': self._rechazadas}
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False)
+        if self.servicio.cola:
+            self.servicio.cola.stop()
@@ -0,0 +1,244 @@
+"""
+Instrumentación de consultas a la base de datos
+Mide las fases de conexión, ejecución y lectura de cada operación, las acumula
+en histogramas en memoria y registra las consultas lentas en un log rotativo
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+
+# Límites superiores (ms) de los intervalos de los histogramas
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+FASE_CONEXION = 'conexion'
+FASE_EJECUCION = 'ejecucion'
+FASE_LECTURA = 'lectura'
+FASE_TOTAL = 'total'
+
+
+class HistogramaLatencias:
+    """Histograma de latencias por intervalos fijos (memoria constante)"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Registra una duración en segundos"""
+        ms = seconds * 1000
+        for i, limit in enumerate(BUCKETS_MS):
+            if ms <= limit:
+                break
+        else:
+            i = len(BUCKETS_MS)
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p: float) -> float:
+        """Percentil aproximado (límite superior del intervalo que lo contiene, sin pasar el máximo), en ms"""
+        if not self.count:
+            return 0.0
+        target = p * self.count
+        acumulado = 0
+        for i, count in enumerate(self.counts):
+            acumulado += count
+            if acumulado >= target:
+                return min(float(BUCKETS_MS[i]), round(self.max, 2)) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict:
+        """
+        Resumen del histograma
+
+        Returns:
+            dict: Cantidad, media, percentiles y máximo en ms
+        """
+        return {
+            'n': self.count,
+            'media_ms': round(self.total / self.count, 2) if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max, 2),
+        }
+
+
+class _MedicionNula:
+    """Medición que no registra nada (código ejecutado fuera de una operación medida)"""
+
+    filas = 0
+    detalle = ''
+    error = None
+
+    @contextmanager
+    def fase(self, nombre: str):
+        yield
+
+
+class Medicion:
+    """Tiempos de una operación, separados por fase"""
+
+    def __init__(self, operacion: str):
+        self.operacion = operacion
+        self.tiempos = {}
+        self.filas = 0
+        self.detalle = ''
+        self.error = None
+        self.inicio = time.perf_counter()
+
+    @contextmanager
+    def fase(self, nombre: str):
+        """Mide el bloque y lo suma a la fase indicada (conexion, ejecucion, lectura)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tiempos[nombre] = self.tiempos.get(nombre, 0.0) + time.perf_counter() - inicio
+
+
+class MetricasConsultas:
+    """Registro de tiempos de consultas con log de consultas lentas"""
+
+    def __init__(self, slow_threshold: float = 1.0, log_path: Optional[str] = None,
+                 max_bytes: int = 1024 * 1024, backup_count: int = 5):
+        """
+        Args:
+            slow_threshold (float): Segundos a partir de los cuales una operación es lenta
+            log_path (str, optional): Archivo del log de consultas lentas (None = sin archivo)
+            max_bytes (int): Tamaño máximo del log antes de rotar
+            backup_count (int): Archivos rotados que se conservan
+        """
+        self.slow_threshold = slow_threshold
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._histogramas = {}
+        self._filas = {}
+        self._errores = {}
+        self._lentas = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._logger = None
+
+    @contextmanager
+    def medir(self, operacion: str):
+        """
+        Mide una operación completa; dentro del bloque, actual() retorna su medición
+
+        Args:
+            operacion (str): Nombre de la operación (ej: 'buscar_orden')
+
+        Yields:
+            Medicion: Medición en curso
+        """
+        medicion = Medicion(operacion)
+        anterior = getattr(self._local, 'medicion', None)
+        self._local.medicion = medicion
+        try:
+            yield medicion
+        except BaseException as e:
+            medicion.error = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            self._local.medicion = anterior
+            self.registrar(medicion)
+
+    def actual(self):
+        """Medición de la operación en curso en este hilo (o una nula si no hay)"""
+        return getattr(self._local, 'medicion', None) or _MedicionNula()
+
+    def registrar(self, medicion: Medicion) -> None:
+        """
+        Acumula una medición terminada y, si superó el umbral, la envía al log
+
+        Args:
+            medicion (Medicion): Medición terminada (error indica si falló)
+        """
+        error = medicion.error
+        total = time.perf_counter() - medicion.inicio
+        operacion = medicion.operacion
+        with self._lock:
+            for fase, seconds in list(medicion.tiempos.items()) + [(FASE_TOTAL, total)]:
+                histograma = self._histogramas.get((operacion, fase))
+                if histograma is None:
+                    histograma = self._histogramas[(operacion, fase)] = HistogramaLatencias()
+                histograma.observe(seconds)
+            self._filas[operacion] = self._filas.get(operacion, 0) + medicion.filas
+            if error:
+                self._errores[operacion] = self._errores.get(operacion, 0) + 1
+
+        if total >= self.slow_threshold:
+            entrada = {
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'operacion': operacion,
+                'total_ms': round(total * 1000, 1),
+                **{f"{fase}_ms": round(seconds * 1000, 1) for fase, seconds in medicion.tiempos.items()},
+                'filas': medicion.filas,
+                'detalle': medicion.detalle,
+                'error': error,
+            }
+            with self._lock:
+                self._lentas.append(entrada)
+            self._log(entrada)
+
+    def _log(self, entrada: Dict) -> None:
+        if not self.log_path:
+            return
+        with self._lock:
+            if self._logger is None:
+                try:
+                    os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+                    handler = RotatingFileHandler(self.log_path, maxBytes=self.max_bytes,
+                                                  backupCount=self.backup_count, encoding='utf-8')
+                except OSError as e:
+                    print(f"No se pudo abrir el log de consultas lentas: {str(e)}")
+                    self.log_path = None
+                    return
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger = logging.getLogger(f"consultas_lentas.{self.log_path}")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                logger.addHandler(handler)
+                self._logger = logger
+        self._logger.info(json.dumps(entrada, ensure_ascii=False, default=str))
+
+    def stats(self) -> List[Dict]:
+        """
+        Resumen por operación y fase
+
+        Returns:
+            list: Una fila por (operación, fase) con percentiles en ms, filas y errores
+        """
+        with self._lock:
+            filas = []
+            for (operacion, fase), histograma in sorted(self._histogramas.items()):
+                fila = {'operacion': operacion, 'fase': fase, **histograma.snapshot()}
+                if fase == FASE_TOTAL:
+                    fila['filas'] = self._filas.get(operacion, 0)
+                    fila['errores'] = self._errores.get(operacion, 0)
+                filas.append(fila)
+            return filas
+
+    def slow_queries(self, limit: int = 50) -> List[Dict]:
+        """Últimas operaciones lentas, de la más reciente a la más antigua"""
+        with self._lock:
+            return list(self._lentas)[::-1][:limit]
+
+    def reset(self) -> None:
+        """Reinicia los histogramas y la lista de operaciones lentas"""
+        with self._lock:
+            self._histogramas.clear()
+            self._filas.clear()
+            self._errores.clear()
+            self._lentas.clear()
@@ -0,0 +1,245 @@
+"""
+Sustituto de Nexlab sobre SQLite para pruebas sin SQL Server y pruebas de carga
+Genera las tablas Ordenes/Historias con datos sintéticos y las sirve con la
+misma interfaz que pyodbc, con latencia configurable
+"""
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Iterator, Tuple
+
+from modules.backend_nexlab import BackendOrdenes
+
+# Formato fijo de fechas: las comparaciones de texto respetan el orden cronológico
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S.%f'
+# Primer número de orden generado (mismo largo que las órdenes reales)
+PRIMERA_ORDEN = 1000000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Historias (
+    h_id            INTEGER PRIMARY KEY,
+    h_nombres       TEXT,
+    h_apellido1     TEXT,
+    h_apellido2     TEXT,
+    h_sexo          TEXT
+);
+CREATE TABLE IF NOT EXISTS Ordenes (
+    o_numero        TEXT PRIMARY KEY,
+    o_fecha         FECHAHORA NOT NULL,
+    o_estado        INTEGER,
+    o_his_id        INTEGER NOT NULL
+);
+"""
+# Índices creados después de la carga (insertar sin índices es más rápido)
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_ordenes_fecha ON Ordenes (o_fecha, o_numero);
+"""
+
+_NOMBRES = ('JUAN', 'MARIA', 'JOSE', 'ROSA', 'LUIS', 'CARMEN', 'CARLOS', 'ANA', 'JORGE', 'ELENA',
+            'MIGUEL', 'LUCIA', 'PEDRO', 'SOFIA', 'RAUL', 'GLORIA')
+_APELLIDOS = ('QUISPE', 'FLORES', 'SANCHEZ', 'RODRIGUEZ', 'GARCIA', 'HUAMAN', 'MAMANI', 'CHAVEZ',
+              'TORRES', 'RAMOS', 'VARGAS', 'CASTILLO', 'ROJAS', 'MENDOZA', 'DIAZ', 'RUIZ')
+
+# SQLSTATE con los que pyodbc informa tiempo agotado y cancelación
+_SQLSTATE_TIMEOUT = 'HYT00'
+_SQLSTATE_CANCELADA = 'HY008'
+
+_TOP = re.compile(r'SELECT\s+TOP\s*\(\?\)', re.IGNORECASE)
+
+sqlite3.register_converter('FECHAHORA', lambda value: datetime.strptime(value.decode(), FORMATO_FECHA))
+
+
+def _fila_factory():
+    # Una clase de fila por forma de resultado: acceso por atributo como en pyodbc
+    clases = {}
+
+    def factory(cursor, row):
+        columnas = tuple(col[0] for col in cursor.description)
+        clase = clases.get(columnas)
+        if clase is None:
+            clase = clases[columnas] = namedtuple('Fila', columnas, rename=True)
+        return clase(*row)
+
+    return factory
+
+
+def _adaptar_parametro(value):
+    if isinstance(value, datetime):
+        return value.strftime(FORMATO_FECHA)
+    return value
+
+
+def _adaptar_consulta(query: str, params) -> Tuple[str, list]:
+    """Traduce 'SELECT TOP (?)' de SQL Server a LIMIT de SQLite"""
+    params = [_adaptar_parametro(value) for value in params]
+    if _TOP.search(query):
+        query = _TOP.sub('SELECT', query, count=1).rstrip() + '\nLIMIT ?'
+        params = params[1:] + params[:1]
+    return query, params
+
+
+def generar_base(path: str, ordenes: int = 100000, pacientes: int = None, dias: int = 30,
+                 semilla: int = 1, lote: int = 50000) -> int:
+    """
+    Crea una base SQLite con el esquema de Nexlab y datos sintéticos
+
+    Las órdenes se reparten en los últimos `dias` días hasta el momento
+    actual, en orden creciente de fecha y número.
+
+    Args:
+        path (str): Archivo SQLite a crear (se agregan filas si ya existe)
+        ordenes (int): Número de órdenes
+        pacientes (int, optional): Número de historias (por defecto ordenes / 3)
+        dias (int): Días que abarcan las órdenes
+        semilla (int): Semilla para datos reproducibles
+        lote (int): Filas por transacción
+
+    Returns:
+        int: Órdenes generadas
+    """
+    rnd = random.Random(semilla)
+    pacientes = pacientes or max(1, ordenes // 3)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.executescript(_SCHEMA)
+
+        def historias() -> Iterator[tuple]:
+            for h_id in range(1, pacientes + 1):
+                yield (h_id, f"{rnd.choice(_NOMBRES)} {rnd.choice(_NOMBRES)}", rnd.choice(_APELLIDOS),
+                       rnd.choice(_APELLIDOS), rnd.choice('MF'))
+
+        inicio = datetime.now() - timedelta(days=dias)
+        paso = timedelta(days=dias) / max(1, ordenes)
+
+        def filas_ordenes() -> Iterator[tuple]:
+            for i in range(ordenes):
+                fecha = inicio + paso * i
+                yield (str(PRIMERA_ORDEN + i), fecha.strftime(FORMATO_FECHA), rnd.choice((1, 1, 1, 2, 3)),
+                       rnd.randint(1, pacientes))
+
+        for tabla, filas, columnas in (('Historias', historias(), 5), ('Ordenes', filas_ordenes(), 4)):
+            placeholders = ', '.join('?' * columnas)
+            while True:
+                chunk = [fila for _, fila in zip(range(lote), filas)]
+                if not chunk:
+                    break
+                with conn:
+                    conn.executemany(f'INSERT OR REPLACE INTO {tabla} VALUES ({placeholders})', chunk)
+
+        conn.executescript(_INDEXES)
+        conn.execute('ANALYZE')
+        conn.commit()
+    finally:
+        conn.close()
+    return ordenes
+
+
+class _CursorSimulado:
+    """Cursor SQLite con latencia inyectada, tiempo máximo y cancelación al estilo pyodbc"""
+
+    def __init__(self, connection: '_ConexionSimulada'):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+        self._cancel = threading.Event()
+        self.arraysize = 1
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query: str, params=()):
+        backend = self._connection.backend
+        timeout = self._connection.timeout or None
+        delay = backend.latencia_consulta()
+
+        # La latencia simulada respeta el tiempo máximo y la cancelación
+        if timeout is not None and delay > timeout:
+            if self._cancel.wait(timeout):
+                raise sqlite3.OperationalError(_SQLSTATE_CANCELADA, 'Operation canceled')
+            raise sqlite3.OperationalError(_SQLSTATE_TIMEOUT, 'Query timeout expired')
+        if self._cancel.wait(delay):
+            raise sqlite3.OperationalError(_SQLSTATE_CANCELADA, 'Operation canceled')
+
+        query, params = _adaptar_consulta(query, params)
+        self._cursor.execute(query, params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def cancel(self):
+        self._cancel.set()
+        self._connection.raw.interrupt()
+
+    def close(self):
+        self._cursor.close()
+
+
+class _ConexionSimulada:
+    """Conexión SQLite compartible entre hilos (el pool la presta a uno a la vez)"""
+
+    def __init__(self, backend: 'BackendSQLite'):
+        self.backend = backend
+        self.timeout = 0
+        self.raw = sqlite3.connect(backend.path, check_same_thread=False,
+                                   detect_types=sqlite3.PARSE_DECLTYPES)
+        self.raw.row_factory = _fila_factory()
+        self.raw.execute('PRAGMA query_only=ON')
+
+    def cursor(self):
+        return _CursorSimulado(self)
+
+    def close(self):
+        self.raw.close()
+
+
+class BackendSQLite(BackendOrdenes):
+    """Tablas Ordenes/Historias en SQLite con latencia de red simulada"""
+
+    nombre = 'sqlite'
+
+    def __init__(self, path: str, latencia: float = 0.0, jitter: float = 0.0,
+                 latencia_conexion: float = 0.0):
+        """
+        Args:
+            path (str): Base creada con generar_base
+            latencia (float): Segundos agregados a cada consulta
+            jitter (float): Variación aleatoria máxima (+/-) de la latencia
+            latencia_conexion (float): Segundos agregados al abrir cada conexión
+        """
+        self.path = path
+        self.latencia = latencia
+        self.jitter = jitter
+        self.latencia_conexion = latencia_conexion
+
+    def clave(self) -> str:
+        # La latencia es parte de la clave: cada configuración usa su propio pool
+        return f"sqlite:{self.path}:{self.latencia}:{self.jitter}:{self.latencia_conexion}"
+
+    def latencia_consulta(self) -> float:
+        """Latencia de una consulta con su variación aleatoria"""
+        if not self.jitter:
+            return self.latencia
+        return max(0.0, self.latencia + random.uniform(-self.jitter, self.jitter))
+
+    def conectar(self, timeout: float):
+        if self.latencia_conexion > timeout:
+            time.sleep(timeout)
+            raise sqlite3.OperationalError(_SQLSTATE_TIMEOUT, 'Login timeout expired')
+        time.sleep(self.latencia_conexion)
+        return _ConexionSimulada(self)
+
+    def descripcion(self) -> str:
+        return f"SQLite simulado ({self.path}, latencia {self.latencia * 1000:.0f} ms)"
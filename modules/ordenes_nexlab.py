@@ -2,41 +2,368 @@
 Módulo para buscar órdenes en la base de datos SQL Server (Nexlab)
 Genera etiquetas con información de pacientes
 """
-import pyodbc
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
 
+from modules.backend_nexlab import pyodbc, DB_ERRORS, BackendSQLServer
+from modules.cache_ordenes import CacheTTL
+from modules.metricas_db import MetricasConsultas, Medicion, FASE_CONEXION, FASE_EJECUCION, FASE_LECTURA
+from modules.nexlab_sqlite import BackendSQLite
+from modules.pool_conexiones import PoolConexiones, PoolAgotadoError
+from modules.replica_ordenes import ReplicaOrdenes
+
+# Configuración de conexión: archivo JSON y variables de entorno NEXLAB_*
+# (las variables de entorno tienen prioridad sobre el archivo)
+CONFIG_FILE = os.path.join("web_app", "temp", "nexlab_config.json")
+CONFIG_DEFAULTS = {
+    'server': '',  # Ejemplo: 'localhost' o '192.168.1.100'
+    'database': '',  # Ejemplo: 'NexlabDB'
+    'username': '',  # Ejemplo: 'sa' o 'nexlab_user'
+    'password': '',
+    'driver': '',  # Vacío = detectar el driver instalado
+    'packet_size': None,  # Bytes por paquete TDS (ej: 32767 para lecturas grandes)
+    'read_only': False,  # ApplicationIntent=ReadOnly (réplica de lectura en AlwaysOn)
+    'encrypt': None,  # None = valor por defecto del driver
+    'backend': 'sqlserver',  # 'sqlite' = base simulada para pruebas sin SQL Server
+    'sqlite_path': os.path.join("web_app", "temp", "nexlab_simulado.db"),
+    'sqlite_latency': 0.0,  # segundos agregados a cada consulta simulada
+}
+
+# Orden de preferencia de drivers
+PREFERRED_DRIVERS = [
+    'ODBC Driver 18 for SQL Server',
+    'ODBC Driver 17 for SQL Server',
+    'ODBC Driver 13 for SQL Server',
+    'ODBC Driver 11 for SQL Server',
+    'SQL Server Native Client 11.0',
+    'SQL Server Native Client 10.0',
+    'SQL Server'
+]
+
+# Pool de conexiones compartido por todas las sesiones del proceso
+# Dimensionado para las estaciones concurrentes de Emergencias
+POOL_MAX_SIZE = 12
+POOL_MAX_IDLE = 300  # segundos
+POOL_MAX_LIFETIME = 1800  # segundos
+POOL_TIMEOUT = 15  # segundos de espera por una conexión libre
+
+# Parámetros por consulta en búsquedas por lote (SQL Server admite hasta 2100)
+IN_CHUNK_SIZE = 500
+# Máximo de órdenes por búsqueda por lote
+MAX_ORDENES_LOTE = 1000
+
+# Caché de búsquedas compartido por todas las sesiones
+CACHE_MAX_ORDENES = 5000
+CACHE_TTL = 600  # segundos para órdenes encontradas
+CACHE_TTL_NO_ENCONTRADA = 30  # segundos para órdenes no encontradas
+
+# Réplica local SQLite de órdenes recientes
+REPLICA_PATH = os.path.join("web_app", "temp", "replica_ordenes.db")  # base: un archivo por origen
+REPLICA_DIAS = 3  # días de órdenes conservadas
+REPLICA_INTERVALO = 30  # segundos entre sincronizaciones
+REPLICA_RETRASO_MAX = 300  # con más retraso se consulta directo a SQL Server
+REPLICA_PAGINA = 5000  # filas por página (paginación por fecha/número)
+REPLICA_LOTE = 500  # filas por fetchmany
+
+# Listado de órdenes recientes
+LISTADO_ARRAYSIZE = 200  # filas por fetchmany
+
+# Tiempos máximos (segundos)
+CONNECT_TIMEOUT = 5  # login en SQL Server
+QUERY_TIMEOUT = 10  # ejecución de cada consulta
+RESPUESTA_TIMEOUT = QUERY_TIMEOUT + CONNECT_TIMEOUT  # espera de la interfaz
+
+# Registro de consultas lentas
+SLOW_QUERY_THRESHOLD = 1.0  # segundos
+SLOW_QUERY_LOG = os.path.join("web_app", "temp", "consultas_lentas.log")
+
+# Estados de una búsqueda estructurada
+ESTADO_ENCONTRADA = 'encontrada'
+ESTADO_NO_ENCONTRADA = 'no_encontrada'
+ESTADO_TIMEOUT = 'timeout'
+ESTADO_ERROR = 'error'
+ESTADO_CANCELADA = 'cancelada'
+
+# SQLSTATE de tiempo agotado en ODBC
+_SQLSTATE_TIMEOUT = ('HYT00', 'HYT01')
+
+_pools = {}
+_pools_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=POOL_MAX_SIZE, thread_name_prefix='nexlab')
+# Caché de búsquedas y réplica local por origen (backend.clave()), igual que los pools:
+# un backend SQLite de pruebas no lee ni escribe los datos de SQL Server
+_caches = {}
+_replicas = {}
+_replica_lock = threading.Lock()
+_metricas = MetricasConsultas(SLOW_QUERY_THRESHOLD, SLOW_QUERY_LOG)
+# Drivers ODBC instalados (pyodbc.drivers() recorre el registro/odbcinst: una vez por proceso)
+_drivers = None
+_drivers_lock = threading.Lock()
+
+def _installed_drivers(refresh=False):
+    """Lista de drivers ODBC instalados, detectada una sola vez por proceso"""
+    global _drivers
+    if pyodbc is None:
+        return []
+    with _drivers_lock:
+        if _drivers is None or refresh:
+            try:
+                _drivers = pyodbc.drivers()
+            except pyodbc.Error:
+                _drivers = []
+        return _drivers
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'si', 'sí', 'yes')
+    return bool(value)
+
+def load_connection_settings(path=CONFIG_FILE):
+    """
+    Carga la configuración de conexión
+    
+    Se parte de CONFIG_DEFAULTS, luego el archivo JSON (si existe) y por
+    último las variables de entorno NEXLAB_SERVER, NEXLAB_DATABASE,
+    NEXLAB_USERNAME, NEXLAB_PASSWORD, NEXLAB_DRIVER, NEXLAB_PACKET_SIZE,
+    NEXLAB_READ_ONLY, NEXLAB_ENCRYPT, NEXLAB_BACKEND, NEXLAB_SQLITE_PATH y
+    NEXLAB_SQLITE_LATENCY.
+    
+    Args:
+        path (str): Archivo JSON de configuración
+        
+    Returns:
+        dict: Configuración con las claves de CONFIG_DEFAULTS
+    """
+    settings = dict(CONFIG_DEFAULTS)
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                settings.update({k: v for k, v in json.load(f).items() if k in CONFIG_DEFAULTS})
+        except (OSError, ValueError) as e:
+            print(f"Error leyendo configuración Nexlab {path}: {str(e)}")
+    
+    for key in CONFIG_DEFAULTS:
+        value = os.environ.get(f"NEXLAB_{key.upper()}")
+        if value is not None:
+            settings[key] = value
+    
+    # Un valor mal escrito no impide iniciar la aplicación: se usa el valor por defecto
+    try:
+        settings['packet_size'] = int(settings['packet_size']) if settings['packet_size'] not in (None, '') else None
+    except (TypeError, ValueError):
+        print(f"packet_size inválido en la configuración Nexlab ({settings['packet_size']!r}), se usa el del driver")
+        settings['packet_size'] = None
+    settings['read_only'] = _as_bool(settings['read_only'])
+    if settings['encrypt'] not in (None, ''):
+        settings['encrypt'] = _as_bool(settings['encrypt'])
+    else:
+        settings['encrypt'] = None
+    try:
+        settings['sqlite_latency'] = float(settings['sqlite_latency'] or 0)
+    except (TypeError, ValueError):
+        print(f"sqlite_latency inválido en la configuración Nexlab ({settings['sqlite_latency']!r}), se usa 0")
+        settings['sqlite_latency'] = 0.0
+    return settings
+
+def _ruta_replica(clave):
+    """Archivo de la réplica de un origen (la clave puede incluir credenciales: se usa su hash)"""
+    base, extension = os.path.splitext(REPLICA_PATH)
+    return f"{base}_{hashlib.sha1(clave.encode('utf-8')).hexdigest()[:12]}{extension}"
+
+def _open_connection(backend):
+    """Abre una conexión del backend con tiempo máximo de login y de consulta"""
+    # Medido aparte: distingue la latencia de red/driver de la espera por el pool
+    with _metricas.medir('abrir_conexion') as medicion:
+        with medicion.fase(FASE_CONEXION):
+            connection = backend.conectar(CONNECT_TIMEOUT)
+    connection.timeout = QUERY_TIMEOUT
+    return connection
+
+def _is_timeout(error):
+    """True si el error de base de datos corresponde a un tiempo agotado (SQLSTATE)"""
+    return bool(error.args) and error.args[0] in _SQLSTATE_TIMEOUT
+
+class ConsultaOrden:
+    """Búsqueda de orden en curso en el pool de trabajo, con cancelación"""
+    
+    def __init__(self, numero_orden):
+        self.numero_orden = numero_orden
+        self.inicio = time.monotonic()
+        self.future = None
+        self._cursor = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+    
+    def _set_cursor(self, cursor):
+        # Llamado desde el hilo de trabajo al ejecutar la consulta
+        with self._lock:
+            self._cursor = cursor
+            cancelled = self._cancelled
+        if cancelled:
+            raise CancelledError()
+    
+    def cancelar(self):
+        """Cancela la búsqueda; si la consulta ya está en SQL Server se aborta"""
+        with self._lock:
+            self._cancelled = True
+            cursor = self._cursor
+        if self.future is not None:
+            self.future.cancel()
+        if cursor is not None:
+            try:
+                cursor.cancel()
+            except Exception:
+                pass
+    
+    def listo(self):
+        """True si la búsqueda terminó"""
+        return self.future is not None and self.future.done()
+    
+    def transcurrido(self):
+        """Segundos desde que se inició la búsqueda"""
+        return time.monotonic() - self.inicio
+    
+    def resultado(self, timeout=RESPUESTA_TIMEOUT):
+        """
+        Espera el resultado de la búsqueda
+        
+        Args:
+            timeout (float): Segundos máximos de espera (0 = no esperar; si no terminó se cancela)
+            
+        Returns:
+            dict: {'estado', 'orden', 'mensaje'} con estado 'encontrada',
+                  'no_encontrada', 'timeout', 'error' o 'cancelada'
+        """
+        try:
+            return self.future.result(timeout)
+        except FutureTimeoutError:
+            self.cancelar()
+            return {
+                'estado': ESTADO_TIMEOUT,
+                'orden': None,
+                'mensaje': f"La base de datos no respondió en {self.transcurrido():.0f} segundos"
+            }
+        except CancelledError:
+            return {'estado': ESTADO_CANCELADA, 'orden': None, 'mensaje': "Búsqueda cancelada"}
+
+def _row_to_orden(row):
+    """Convierte una fila de Ordenes+Historias al diccionario de orden"""
+    return {
+        'numero_orden': row.numero_orden,
+        'fecha_creacion': row.fecha_creacion,
+        'estado': row.o_estado,
+        'nombres': row.h_nombres or '',
+        'apellido1': row.h_apellido1 or '',
+        'apellido2': row.h_apellido2 or '',
+        'sexo': row.h_sexo or ''
+    }
+
+def expandir_numeros_orden(texto, limite=MAX_ORDENES_LOTE):
+    """
+    Convierte una lista pegada de órdenes y rangos en números individuales
+    
+    Acepta separadores de coma, punto y coma, espacios o saltos de línea.
+    Ejemplo: "1622485-1622487, 1622600" -> ['1622485', '1622486', '1622487', '1622600']
+    
+    Args:
+        texto (str): Órdenes y rangos
+        limite (int): Máximo de órdenes (por defecto MAX_ORDENES_LOTE)
+        
+    Returns:
+        list: Números de orden sin repetir, en el orden ingresado
+        
+    Raises:
+        ValueError: Si hay un valor no numérico o se supera el límite
+    """
+    numeros = []
+    for parte in re.split(r'[,;\s]+', texto.strip()):
+        if not parte:
+            continue
+        if '-' in parte:
+            inicio, _, fin = parte.partition('-')
+            if not (inicio.isdigit() and fin.isdigit()):
+                raise ValueError(f"Rango inválido: {parte}")
+            inicio, fin = int(inicio), int(fin)
+            if fin < inicio:
+                inicio, fin = fin, inicio
+            if fin - inicio + 1 > limite:
+                raise ValueError(f"El rango {parte} supera {limite} órdenes")
+            numeros.extend(str(numero) for numero in range(inicio, fin + 1))
+        elif parte.isdigit():
+            numeros.append(parte)
+        else:
+            raise ValueError(f"Número de orden inválido: {parte}")
+    
+    numeros = list(dict.fromkeys(numeros))
+    if len(numeros) > limite:
+        raise ValueError(f"Se pueden buscar hasta {limite} órdenes a la vez")
+    return numeros
+
 class OrdenesNexlab:
     """Clase para manejar conexión con base de datos de órdenes Nexlab"""
     
-    def __init__(self):
-        # Configuración de conexión a SQL Server (AJUSTAR ESTAS CREDENCIALES)
-        self.server = ''  # Ejemplo: 'localhost' o '192.168.1.100'
-        self.database = ''  # Ejemplo: 'NexlabDB'
-        self.username = ''  # Ejemplo: 'sa' o 'nexlab_user'
-        self.password = ''  # Ejemplo: 'MiContraseña123'
-        self.connection = None
+    def __init__(self, backend=None, **config):
+        """
+        Args:
+            backend (BackendOrdenes, optional): Origen de conexiones; por defecto
+                                                SQL Server según la configuración
+            **config: Valores que reemplazan a la configuración cargada
+                      (server, database, username, password, driver,
+                      packet_size, read_only, encrypt, backend, sqlite_*)
+        """
+        self._backend_fijo = backend
+        self._config = config
+        self._connection_string = None
+        self._connection_key = None
+        self._sqlserver = None
+        self.recargar_configuracion()
+    
+    def recargar_configuracion(self):
+        """
+        Vuelve a leer la configuración de conexión (CONFIG_FILE y variables NEXLAB_*)
+        
+        Permite configurar el servidor sin reiniciar la aplicación: la instancia
+        compartida toma los valores nuevos en la próxima conexión.
+        """
+        # Configuración de conexión a SQL Server: ver CONFIG_FILE y variables NEXLAB_*
+        settings = load_connection_settings()
+        settings.update(self._config)
+        self.server = settings['server']
+        self.database = settings['database']
+        self.username = settings['username']
+        self.password = settings['password']
+        self.driver = settings['driver']
+        self.packet_size = settings['packet_size']
+        self.read_only = settings['read_only']
+        self.encrypt = settings['encrypt']
+        
+        backend = self._backend_fijo
+        if backend is None and settings['backend'] == 'sqlite':
+            backend = BackendSQLite(settings['sqlite_path'], settings['sqlite_latency'])
+        self.backend = backend
         
     def get_available_driver(self):
         """
         Detecta el driver ODBC disponible en el sistema
         
+        La lista de drivers instalados se obtiene una vez por proceso.
+        
         Returns:
             str: Nombre del driver disponible o None
         """
-        drivers = pyodbc.drivers()
+        if self.driver:
+            return self.driver
         
-        # Orden de preferencia de drivers
-        preferred_drivers = [
-            'ODBC Driver 18 for SQL Server',
-            'ODBC Driver 17 for SQL Server',
-            'ODBC Driver 13 for SQL Server',
-            'ODBC Driver 11 for SQL Server',
-            'SQL Server Native Client 11.0',
-            'SQL Server Native Client 10.0',
-            'SQL Server'
-        ]
+        drivers = _installed_drivers()
         
-        for driver in preferred_drivers:
+        for driver in PREFERRED_DRIVERS:
             if driver in drivers:
                 return driver
         
@@ -47,88 +374,581 @@ class OrdenesNexlab:
         
         return None
     
-    def conectar(self):
+    def _build_connection_string(self):
         """
-        Establece conexión con la base de datos SQL Server
+        Construye el string de conexión con el driver disponible
+        
+        El resultado se guarda y solo se reconstruye si cambia la configuración.
         
         Returns:
-            tuple: (bool, str) - (éxito, mensaje de error si hay)
+            tuple: (str, str) - (string de conexión o None, mensaje de error si hay)
         """
-        try:
-            # Detectar driver disponible
-            driver = self.get_available_driver()
-            
-            if not driver:
-                available_drivers = pyodbc.drivers()
-                return False, (
-                    f"No se encontró ningún driver ODBC para SQL Server instalado.\n"
-                    f"Drivers disponibles: {', '.join(available_drivers) if available_drivers else 'Ninguno'}\n\n"
-                    f"Por favor instala un driver ODBC desde:\n"
-                    f"https://docs.microsoft.com/en-us/sql/connect/odbc/download-odbc-driver-for-sql-server"
+        key = (self.server, self.database, self.username, self.password, self.driver,
+               self.packet_size, self.read_only, self.encrypt)
+        if self._connection_string is not None and key == self._connection_key:
+            return self._connection_string, None
+        
+        if not self.server or not self.database:
+            return None, (
+                "Falta configurar el servidor y la base de datos de Nexlab "
+                f"({CONFIG_FILE} o variables NEXLAB_SERVER y NEXLAB_DATABASE)"
+            )
+        
+        if pyodbc is None:
+            return None, "pyodbc no está disponible: instala pyodbc y el driver manager ODBC (unixODBC en Linux)"
+        
+        driver = self.get_available_driver()
+        
+        if not driver:
+            available_drivers = _installed_drivers()
+            return None, (
+                f"No se encontró ningún driver ODBC para SQL Server instalado.\n"
+                f"Drivers disponibles: {', '.join(available_drivers) if available_drivers else 'Ninguno'}\n\n"
+                f"Por favor instala un driver ODBC desde:\n"
+                f"https://docs.microsoft.com/en-us/sql/connect/odbc/download-odbc-driver-for-sql-server"
+            )
+        
+        # String de conexión para SQL Server
+        connection_string = (
+            f'DRIVER={{{driver}}};'
+            f'SERVER={self.server};'
+            f'DATABASE={self.database};'
+            f'UID={self.username};'
+            f'PWD={self.password}'
+        )
+        if self.packet_size:
+            connection_string += f';Packet Size={self.packet_size}'
+        if self.read_only:
+            connection_string += ';ApplicationIntent=ReadOnly'
+        if self.encrypt is not None:
+            connection_string += f";Encrypt={'yes' if self.encrypt else 'no'}"
+        
+        self._connection_string = connection_string
+        self._connection_key = key
+        return connection_string, None
+    
+    def _connection_error_message(self, error):
+        """Mensaje detallado para un error al conectar"""
+        if self.backend is not None:
+            return f"Error de conexión: {str(error)}\n\nBackend: {self.backend.descripcion()}"
+        driver_info = self.get_available_driver()
+        return (
+            f"Error de conexión: {str(error)}\n\n"
+            f"Driver detectado: {driver_info or 'Ninguno'}\n"
+            f"Servidor: {self.server}\n"
+            f"Base de datos: {self.database}\n"
+            f"Usuario: {self.username}"
+        )
+    
+    def get_backend(self):
+        """
+        Origen de conexiones en uso
+        
+        Returns:
+            tuple: (BackendOrdenes, str) - (backend o None, mensaje de error si hay)
+        """
+        if self.backend is not None:
+            return self.backend, None
+        
+        connection_string, error = self._build_connection_string()
+        if error:
+            return None, error
+        if self._sqlserver is None or self._sqlserver.connection_string != connection_string:
+            self._sqlserver = BackendSQLServer(connection_string)
+        return self._sqlserver, None
+    
+    def get_pool(self):
+        """
+        Obtiene el pool compartido para la configuración actual
+        
+        Returns:
+            tuple: (PoolConexiones, str) - (pool o None, mensaje de error si hay)
+        """
+        backend, error = self.get_backend()
+        if error:
+            return None, error
+        
+        key = backend.clave()
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = PoolConexiones(
+                    lambda: _open_connection(backend),
+                    max_size=POOL_MAX_SIZE,
+                    max_idle=POOL_MAX_IDLE,
+                    max_lifetime=POOL_MAX_LIFETIME
                 )
+                _pools[key] = pool
+        return pool, None
+    
+    def _run_query(self, query_fn, operacion='consulta'):
+        """
+        Ejecuta una consulta con una conexión prestada del pool
+        
+        La conexión se devuelve al terminar; si la consulta falla se descarta
+        para que la siguiente solicitud obtenga una conexión sana. Los tiempos
+        de conexión, ejecución y lectura se registran bajo la operación indicada.
+        
+        Args:
+            query_fn (Callable): Recibe la conexión y retorna el resultado
+            operacion (str): Nombre de la operación para las métricas
             
-            # String de conexión para SQL Server
-            connection_string = (
-                f'DRIVER={{{driver}}};'
-                f'SERVER={self.server};'
-                f'DATABASE={self.database};'
-                f'UID={self.username};'
-                f'PWD={self.password}'
-            )
+        Returns:
+            tuple: (bool, resultado/str) - (éxito, resultado o mensaje de error de conexión)
+        """
+        pool, error = self.get_pool()
+        if error:
+            return False, f"Error de conexión: {error}"
+        
+        with _metricas.medir(operacion) as medicion:
+            try:
+                with medicion.fase(FASE_CONEXION):
+                    connection = pool.acquire(POOL_TIMEOUT)
+            except PoolAgotadoError as e:
+                medicion.error = str(e)
+                return False, f"Error de conexión: {str(e)}"
+            except DB_ERRORS as e:
+                medicion.error = str(e)
+                return False, self._connection_error_message(e)
             
-            self.connection = pyodbc.connect(connection_string)
-            return True, None
-            
-        except pyodbc.Error as e:
-            error_msg = str(e)
-            driver_info = self.get_available_driver()
-            return False, (
-                f"Error de conexión: {error_msg}\n\n"
-                f"Driver detectado: {driver_info or 'Ninguno'}\n"
-                f"Servidor: {self.server}\n"
-                f"Base de datos: {self.database}\n"
-                f"Usuario: {self.username}"
-            )
+            ok = False
+            try:
+                result = query_fn(connection)
+                ok = True
+                return True, result
+            finally:
+                pool.release(connection, discard=not ok)
+    
+    def conectar(self):
+        """
+        Verifica que se pueda obtener una conexión del pool
+        
+        Returns:
+            tuple: (bool, str) - (éxito, mensaje de error si hay)
+        """
+        exito, resultado = self._run_query(lambda connection: None, 'conectar')
+        if not exito:
+            return False, resultado
+        return True, None
     
     def desconectar(self):
-        """Cierra la conexión con la base de datos"""
-        if self.connection:
-            try:
-                self.connection.close()
-                self.connection = None
-            except:
-                pass
+        """Cierra las conexiones libres del pool compartido"""
+        pool, _ = self.get_pool()
+        if pool:
+            pool.close_idle()
+    
+    def iniciar_replica(self):
+        """
+        Inicia (una vez por proceso y origen) la réplica local y su sincronización
+        
+        Sin una configuración de conexión válida (servidor y base de datos, o el
+        backend SQLite) no se inicia: la sincronización reintentaría para siempre
+        sin poder conectar. test_conexion la inicia al confirmar una configuración.
+        
+        Returns:
+            ReplicaOrdenes: Réplica del origen, o None si no hay configuración válida
+        """
+        backend, error = self.get_backend()
+        if error:
+            return None
+        clave = backend.clave()
+        with _replica_lock:
+            replica = _replicas.get(clave)
+            if replica is None:
+                replica = ReplicaOrdenes(_ruta_replica(clave), REPLICA_DIAS)
+                replica.start_sync(self.sincronizar_replica, REPLICA_INTERVALO)
+                _replicas[clave] = replica
+        return replica
+    
+    def sincronizar_replica(self, replica):
+        """
+        Trae a la réplica las órdenes nuevas desde la última marca de agua
+        
+        Usa paginación por (o_fecha, o_numero) y lee cada página con
+        fetchmany, por lo que la memoria no depende del volumen pendiente.
+        
+        Args:
+            replica (ReplicaOrdenes): Réplica a actualizar
+            
+        Returns:
+            int: Filas aplicadas
+            
+        Raises:
+            Exception: Si no se pudo conectar o consultar
+        """
+        exito, resultado = self._run_query(
+            lambda connection: self._query_sincronizacion(connection, replica), 'sincronizar_replica'
+        )
+        if not exito:
+            raise ConnectionError(resultado)
+        return resultado
+    
+    def _query_sincronizacion(self, connection, replica):
+        query = """
+            SELECT TOP (?)
+                o.o_numero              AS numero_orden,
+                o.o_fecha               AS fecha_creacion,
+                o.o_estado,
+                h.h_nombres,
+                h.h_apellido1,
+                h.h_apellido2,
+                h.h_sexo
+            FROM Ordenes o
+            INNER JOIN Historias h
+                ON o.o_his_id = h.h_id
+            WHERE o.o_fecha > ?
+               OR (o.o_fecha = ? AND o.o_numero > ?)
+            ORDER BY o.o_fecha, o.o_numero
+        """
+        total = 0
+        medicion = _metricas.actual()
+        cursor = connection.cursor()
+        cursor.arraysize = REPLICA_LOTE
+        try:
+            while True:
+                wm_fecha, wm_numero = replica.watermark()
+                with medicion.fase(FASE_EJECUCION):
+                    cursor.execute(query, (REPLICA_PAGINA, wm_fecha, wm_fecha, wm_numero))
+                
+                filas_pagina = 0
+                while True:
+                    with medicion.fase(FASE_LECTURA):
+                        rows = cursor.fetchmany(REPLICA_LOTE)
+                    if not rows:
+                        break
+                    filas_pagina += replica.apply_rows(_row_to_orden(row) for row in rows)
+                
+                total += filas_pagina
+                medicion.filas = total
+                if filas_pagina < REPLICA_PAGINA:
+                    return total
+        finally:
+            cursor.close()
+    
+    def _clave_origen(self):
+        """Clave del backend en uso (None sin configuración válida)"""
+        backend, _ = self.get_backend()
+        return backend.clave() if backend else None
+    
+    def _cache(self):
+        """Caché compartido de búsquedas del origen en uso"""
+        clave = self._clave_origen()
+        with _pools_lock:
+            cache = _caches.get(clave)
+            if cache is None:
+                cache = _caches[clave] = CacheTTL(CACHE_MAX_ORDENES, CACHE_TTL, CACHE_TTL_NO_ENCONTRADA)
+        return cache
+    
+    def _replica_disponible(self):
+        """Réplica del origen en uso si está al día, None en caso contrario"""
+        replica = _replicas.get(self._clave_origen())
+        if replica is not None and replica.is_fresh(REPLICA_RETRASO_MAX):
+            return replica
+        return None
+    
+    def estado_replica(self):
+        """
+        Estado de la réplica local (órdenes, retraso, último error)
+        
+        Returns:
+            dict: Estado de la réplica o vacío si no está iniciada
+        """
+        replica = _replicas.get(self._clave_origen())
+        return replica.status() if replica is not None else {}
+    
+    def estadisticas_cache(self):
+        """
+        Métricas del caché compartido de búsquedas
+        
+        Returns:
+            dict: Aciertos, fallos, tasa de aciertos y latencia ahorrada
+        """
+        return self._cache().stats()
+    
+    def limpiar_cache(self):
+        """Vacía el caché compartido de búsquedas"""
+        self._cache().clear()
+    
+    def estadisticas_pool(self):
+        """
+        Métricas del pool compartido (uso y tiempos de espera)
+        
+        Returns:
+            dict: Métricas del pool o vacío si no hay configuración válida
+        """
+        pool, _ = self.get_pool()
+        return pool.stats() if pool else {}
+    
+    def estadisticas_consultas(self):
+        """
+        Tiempos de las operaciones con la base de datos por fase
+        
+        Returns:
+            list: Filas con operación, fase, n, media y percentiles en ms
+        """
+        return _metricas.stats()
+    
+    def consultas_lentas(self, limite=50):
+        """
+        Últimas operaciones que superaron el umbral de consulta lenta
+        
+        Returns:
+            list: Entradas del log de consultas lentas (más reciente primero)
+        """
+        return _metricas.slow_queries(limite)
+    
+    def umbral_consulta_lenta(self, segundos=None):
+        """
+        Consulta o cambia el umbral del log de consultas lentas
+        
+        Args:
+            segundos (float, optional): Nuevo umbral (None = solo consultar)
+            
+        Returns:
+            float: Umbral vigente en segundos
+        """
+        if segundos is not None:
+            _metricas.slow_threshold = float(segundos)
+        return _metricas.slow_threshold
+    
+    def reiniciar_metricas(self):
+        """Reinicia los histogramas de tiempos de consulta"""
+        _metricas.reset()
     
     def listar_drivers_disponibles(self):
         """
         Lista todos los drivers ODBC disponibles en el sistema
         
+        Vuelve a detectar los drivers (ej: tras instalar uno nuevo).
+        
         Returns:
             list: Lista de drivers disponibles
         """
-        try:
-            return pyodbc.drivers()
-        except:
-            return []
+        return list(_installed_drivers(refresh=True))
     
-    def buscar_orden(self, numero_orden):
+    def buscar_orden(self, numero_orden, forzar=False):
         """
         Busca una orden específica en la base de datos
         
+        Los resultados (incluido "no encontrada") se guardan en un caché
+        compartido con expiración.
+        
         Args:
             numero_orden (str): Número de orden a buscar (ej: '1622485')
+            forzar (bool): Ignorar el caché y volver a consultar la base de datos
             
         Returns:
             tuple: (bool, dict/str) - (éxito, datos de orden o mensaje de error)
         """
+        resultado = self._resolver_orden(numero_orden, forzar)
+        if resultado['estado'] == ESTADO_ENCONTRADA:
+            return True, resultado['orden']
+        return False, resultado['mensaje']
+    
+    def buscar_orden_async(self, numero_orden, forzar=False):
+        """
+        Inicia la búsqueda de una orden en el pool de trabajo sin bloquear
+        
+        Args:
+            numero_orden (str): Número de orden a buscar
+            forzar (bool): Ignorar el caché y volver a consultar la base de datos
+            
+        Returns:
+            ConsultaOrden: Búsqueda en curso (resultado() / cancelar())
+        """
+        consulta = ConsultaOrden(numero_orden)
+        consulta.future = _executor.submit(self._resolver_orden, numero_orden, forzar, consulta)
+        return consulta
+    
+    def _resolver_orden(self, numero_orden, forzar=False, consulta=None):
+        """
+        Resuelve una orden: caché, réplica local y por último SQL Server
+        
+        Args:
+            numero_orden (str): Número de orden
+            forzar (bool): Ignorar caché y réplica
+            consulta (ConsultaOrden, optional): Recibe el cursor para poder cancelarlo
+            
+        Returns:
+            dict: {'estado', 'orden', 'mensaje'}
+        """
         try:
-            if not self.connection:
-                conectado, error = self.conectar()
-                if not conectado:
-                    return False, f"Error de conexión: {error}"
+            numero_orden = str(numero_orden).strip()
+            cache = self._cache()
+            if forzar:
+                cache.invalidate(numero_orden)
             
-            cursor = self.connection.cursor()
+            en_cache, resultado = cache.get(numero_orden)
+            if not en_cache:
+                # Réplica local primero; si no está (orden muy reciente o réplica atrasada), SQL Server
+                replica = None if forzar else self._replica_disponible()
+                resultado = replica.buscar(numero_orden) if replica else None
+                
+                if resultado is None:
+                    on_cursor = consulta._set_cursor if consulta else None
+                    inicio = time.perf_counter()
+                    exito, resultado = self._run_query(
+                        lambda connection: self._query_orden(connection, numero_orden, on_cursor),
+                        'buscar_orden'
+                    )
+                    if not exito:
+                        return {'estado': ESTADO_ERROR, 'orden': None, 'mensaje': resultado}
+                    cache.record_load(time.perf_counter() - inicio)
+                cache.set(numero_orden, resultado)
             
+            if resultado:
+                return {'estado': ESTADO_ENCONTRADA, 'orden': resultado, 'mensaje': None}
+            else:
+                return {
+                    'estado': ESTADO_NO_ENCONTRADA,
+                    'orden': None,
+                    'mensaje': f"No se encontró la orden {numero_orden}"
+                }
+                
+        except DB_ERRORS as e:
+            if consulta is not None and consulta._cancelled:
+                return {'estado': ESTADO_CANCELADA, 'orden': None, 'mensaje': "Búsqueda cancelada"}
+            if _is_timeout(e):
+                return {
+                    'estado': ESTADO_TIMEOUT,
+                    'orden': None,
+                    'mensaje': f"La consulta superó el tiempo máximo de {QUERY_TIMEOUT} segundos"
+                }
+            return {'estado': ESTADO_ERROR, 'orden': None, 'mensaje': f"Error en la consulta: {str(e)}"}
+        except CancelledError:
+            return {'estado': ESTADO_CANCELADA, 'orden': None, 'mensaje': "Búsqueda cancelada"}
+        except Exception as e:
+            return {'estado': ESTADO_ERROR, 'orden': None, 'mensaje': f"Error inesperado: {str(e)}"}
+    
+    def buscar_ordenes(self, numeros, forzar=False):
+        """
+        Busca varias órdenes en una sola ida a la base de datos
+        
+        Las órdenes que no están en caché se consultan con listas IN
+        parametrizadas de hasta IN_CHUNK_SIZE números, todas con la misma
+        conexión prestada.
+        
+        Args:
+            numeros (list/str): Números de orden, o texto con órdenes y rangos
+                                (ej: "1622485-1622520, 1622600")
+            forzar (bool): Ignorar el caché y volver a consultar la base de datos
+            
+        Returns:
+            tuple: (bool, dict/str) - (éxito, {numero: datos de orden o None si no existe}
+                   o mensaje de error)
+        """
+        try:
+            if isinstance(numeros, str):
+                numeros = expandir_numeros_orden(numeros)
+            else:
+                numeros = list(dict.fromkeys(str(numero).strip() for numero in numeros))
+            
+            if not numeros:
+                return True, {}
+            
+            cache = self._cache()
+            resultados = {}
+            pendientes = []
+            for numero in numeros:
+                if forzar:
+                    cache.invalidate(numero)
+                en_cache, orden = cache.get(numero)
+                if en_cache:
+                    resultados[numero] = orden
+                else:
+                    pendientes.append(numero)
+            
+            replica = None if forzar else self._replica_disponible()
+            if pendientes and replica:
+                en_replica = replica.buscar_varias(pendientes)
+                for numero, orden in en_replica.items():
+                    resultados[numero] = orden
+                    cache.set(numero, orden)
+                pendientes = [numero for numero in pendientes if numero not in en_replica]
+            
+            if pendientes:
+                inicio = time.perf_counter()
+                exito, encontradas = self._run_query(
+                    lambda connection: self._query_ordenes(connection, pendientes), 'buscar_ordenes'
+                )
+                if not exito:
+                    return False, encontradas
+                cache.record_load(time.perf_counter() - inicio, len(pendientes))
+                
+                for numero in pendientes:
+                    resultados[numero] = encontradas.get(numero)
+                    cache.set(numero, resultados[numero])
+            
+            # Mantener el orden solicitado; None marca las no encontradas
+            return True, {numero: resultados[numero] for numero in numeros}
+            
+        except ValueError as e:
+            return False, str(e)
+        except DB_ERRORS as e:
+            return False, f"Error en la consulta: {str(e)}"
+        except Exception as e:
+            return False, f"Error inesperado: {str(e)}"
+    
+    def _query_ordenes(self, connection, numeros):
+        """
+        Consulta un lote de órdenes con una conexión abierta
+        
+        Returns:
+            dict: {numero: datos de orden} solo para las órdenes encontradas
+        """
+        encontradas = {}
+        medicion = _metricas.actual()
+        medicion.detalle = f"{len(numeros)} órdenes"
+        cursor = connection.cursor()
+        try:
+            for inicio in range(0, len(numeros), IN_CHUNK_SIZE):
+                chunk = numeros[inicio:inicio + IN_CHUNK_SIZE]
+                placeholders = ', '.join('?' * len(chunk))
+                query = f"""
+                    SELECT
+                        o.o_numero              AS numero_orden,
+                        o.o_fecha               AS fecha_creacion,
+                        o.o_estado,
+                        h.h_nombres,
+                        h.h_apellido1,
+                        h.h_apellido2,
+                        h.h_sexo
+                    FROM Ordenes o
+                    INNER JOIN Historias h
+                        ON o.o_his_id = h.h_id
+                    WHERE o.o_numero IN ({placeholders})
+                    ORDER BY o.o_fecha DESC
+                """
+                with medicion.fase(FASE_EJECUCION):
+                    cursor.execute(query, chunk)
+                with medicion.fase(FASE_LECTURA):
+                    rows = cursor.fetchall()
+                medicion.filas += len(rows)
+                
+                for row in rows:
+                    numero = str(row.numero_orden).strip()
+                    # Igual que buscar_orden: prevalece la más reciente
+                    if numero not in encontradas:
+                        encontradas[numero] = _row_to_orden(row)
+            return encontradas
+        finally:
+            cursor.close()
+    
+    def _query_orden(self, connection, numero_orden, on_cursor=None):
+        """
+        Consulta una orden con una conexión abierta
+        
+        Args:
+            on_cursor (Callable, optional): Recibe el cursor antes de ejecutar (para cancelar)
+        
+        Returns:
+            dict: Datos de la orden o None si no existe
+        """
+        cursor = connection.cursor()
+        try:
+            # Dentro del try: si la búsqueda ya se canceló, on_cursor lanza y el cursor se cierra igual
+            if on_cursor:
+                on_cursor(cursor)
             # Query para buscar la orden específica
             query = """
                 SELECT
@@ -146,30 +966,20 @@ class OrdenesNexlab:
                 ORDER BY o.o_fecha DESC
             """
             
-            cursor.execute(query, (numero_orden,))
-            row = cursor.fetchone()
-            
-            if row:
-                # Convertir resultado a diccionario
-                orden_data = {
-                    'numero_orden': row.numero_orden,
-                    'fecha_creacion': row.fecha_creacion,
-                    'estado': row.o_estado,
-                    'nombres': row.h_nombres or '',
-                    'apellido1': row.h_apellido1 or '',
-                    'apellido2': row.h_apellido2 or '',
-                    'sexo': row.h_sexo or ''
-                }
-                cursor.close()
-                return True, orden_data
-            else:
-                cursor.close()
-                return False, f"No se encontró la orden {numero_orden}"
-                
-        except pyodbc.Error as e:
-            return False, f"Error en la consulta: {str(e)}"
-        except Exception as e:
-            return False, f"Error inesperado: {str(e)}"
+            medicion = _metricas.actual()
+            medicion.detalle = f"orden {numero_orden}"
+            with medicion.fase(FASE_EJECUCION):
+                cursor.execute(query, (numero_orden,))
+            with medicion.fase(FASE_LECTURA):
+                row = cursor.fetchone()
+            
+            if not row:
+                return None
+            
+            # Convertir resultado a diccionario
+            return _row_to_orden(row)
+        finally:
+            cursor.close()
     
     def generar_etiqueta_texto(self, orden_data):
         """
@@ -220,47 +1030,203 @@ class OrdenesNexlab:
             tuple: (bool, list/str) - (éxito, lista de órdenes o mensaje de error)
         """
         try:
-            if not self.connection:
-                conectado, error = self.conectar()
-                if not conectado:
-                    return False, f"Error de conexión: {error}"
+            return True, list(self.iterar_ordenes_recientes(limite=limite))
             
-            cursor = self.connection.cursor()
+        except ConnectionError as e:
+            return False, str(e)
+        except DB_ERRORS as e:
+            return False, f"Error en la consulta: {str(e)}"
+        except Exception as e:
+            return False, f"Error inesperado: {str(e)}"
+    
+    def listar_ordenes_pagina(self, tamano=50, despues_de=None, desde=None, hasta=None, estado=None):
+        """
+        Obtiene una página de órdenes recientes (para "cargar más")
+        
+        Args:
+            tamano (int): Órdenes por página
+            despues_de (tuple, optional): Cursor 'siguiente' de la página anterior
+            desde (datetime, optional): Fecha mínima de creación
+            hasta (datetime, optional): Fecha máxima de creación (exclusiva)
+            estado (optional): Filtrar por o_estado
             
-            query = """
-                SELECT TOP (?)
-                    o.o_numero              AS numero_orden,
-                    o.o_fecha               AS fecha_creacion,
-                    o.o_estado,
-                    h.h_nombres,
-                    h.h_apellido1,
-                    h.h_apellido2,
-                    h.h_sexo
-                FROM Ordenes o
-                INNER JOIN Historias h
-                    ON o.o_his_id = h.h_id
-                ORDER BY o.o_fecha DESC
-            """
+        Returns:
+            tuple: (bool, dict/str) - (éxito, {'ordenes': [...], 'siguiente': cursor o None}
+                   o mensaje de error)
+        """
+        try:
+            # Se pide una fila extra para saber si hay otra página
+            ordenes = list(self.iterar_ordenes_recientes(
+                limite=tamano + 1, despues_de=despues_de, desde=desde, hasta=hasta, estado=estado
+            ))
+            siguiente = None
+            if len(ordenes) > tamano:
+                ordenes = ordenes[:tamano]
+                ultima = ordenes[-1]
+                siguiente = (ultima['fecha_creacion'], ultima['numero_orden'])
+            return True, {'ordenes': ordenes, 'siguiente': siguiente}
+            
+        except ConnectionError as e:
+            return False, str(e)
+        except DB_ERRORS as e:
+            return False, f"Error en la consulta: {str(e)}"
+        except Exception as e:
+            return False, f"Error inesperado: {str(e)}"
+    
+    def iterar_ordenes_recientes(self, limite=None, despues_de=None, desde=None, hasta=None,
+                                 estado=None, arraysize=LISTADO_ARRAYSIZE):
+        """
+        Recorre las órdenes de la más reciente a la más antigua sin cargarlas todas
+        
+        Las filas se leen con fetchmany; los filtros y la paginación por
+        (o_fecha, o_numero) se resuelven en SQL Server. La conexión queda
+        prestada mientras se consume el generador.
+        
+        Args:
+            limite (int, optional): Máximo de órdenes (None = sin límite)
+            despues_de (tuple, optional): (fecha, número) de la última orden ya vista
+            desde (datetime, optional): Fecha mínima de creación
+            hasta (datetime, optional): Fecha máxima de creación (exclusiva)
+            estado (optional): Filtrar por o_estado
+            arraysize (int): Filas por fetchmany
             
-            cursor.execute(query, (limite,))
-            rows = cursor.fetchall()
-            
-            ordenes = []
-            for row in rows:
-                ordenes.append({
-                    'numero_orden': row.numero_orden,
-                    'fecha_creacion': row.fecha_creacion,
-                    'estado': row.o_estado,
-                    'nombres': row.h_nombres or '',
-                    'apellido1': row.h_apellido1 or '',
-                    'apellido2': row.h_apellido2 or '',
-                    'sexo': row.h_sexo or ''
-                })
+        Yields:
+            dict: Datos de cada orden
             
-            cursor.close()
-            return True, ordenes
+        Raises:
+            ConnectionError: Si no se pudo obtener una conexión
+            DB_ERRORS: Si falla la consulta
+        """
+        condiciones = []
+        params = []
+        if desde is not None:
+            condiciones.append("o.o_fecha >= ?")
+            params.append(desde)
+        if hasta is not None:
+            condiciones.append("o.o_fecha < ?")
+            params.append(hasta)
+        if estado is not None:
+            condiciones.append("o.o_estado = ?")
+            params.append(estado)
+        if despues_de is not None:
+            fecha, numero = despues_de
+            condiciones.append("(o.o_fecha < ? OR (o.o_fecha = ? AND o.o_numero < ?))")
+            params.extend([fecha, fecha, numero])
+        
+        top = ""
+        if limite is not None:
+            top = "TOP (?)"
+            params.insert(0, limite)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        
+        query = f"""
+            SELECT {top}
+                o.o_numero              AS numero_orden,
+                o.o_fecha               AS fecha_creacion,
+                o.o_estado,
+                h.h_nombres,
+                h.h_apellido1,
+                h.h_apellido2,
+                h.h_sexo
+            FROM Ordenes o
+            INNER JOIN Historias h
+                ON o.o_his_id = h.h_id
+            {where}
+            ORDER BY o.o_fecha DESC, o.o_numero DESC
+        """
+        
+        pool, error = self.get_pool()
+        if error:
+            raise ConnectionError(f"Error de conexión: {error}")
+        
+        # Medición explícita: el generador puede consumirse entre varios pasos
+        medicion = Medicion('listar_ordenes_recientes')
+        medicion.detalle = f"limite={limite} filtros={len(condiciones)}"
+        try:
+            with medicion.fase(FASE_CONEXION):
+                connection = pool.acquire(POOL_TIMEOUT)
+        except (PoolAgotadoError,) + DB_ERRORS as e:
+            medicion.error = str(e)
+            _metricas.registrar(medicion)
+            if isinstance(e, PoolAgotadoError):
+                raise ConnectionError(f"Error de conexión: {str(e)}")
+            raise ConnectionError(self._connection_error_message(e))
+        
+        ok = False
+        try:
+            cursor = connection.cursor()
+            cursor.arraysize = arraysize
+            try:
+                with medicion.fase(FASE_EJECUCION):
+                    cursor.execute(query, params)
+                while True:
+                    with medicion.fase(FASE_LECTURA):
+                        rows = cursor.fetchmany(arraysize)
+                    if not rows:
+                        break
+                    medicion.filas += len(rows)
+                    for row in rows:
+                        yield _row_to_orden(row)
+            finally:
+                cursor.close()
+            ok = True
+        except GeneratorExit:
+            # El consumidor dejó de leer: la conexión sigue sana
+            ok = True
+            raise
+        except Exception as e:
+            medicion.error = str(e)
+            raise
+        finally:
+            pool.release(connection, discard=not ok)
+            _metricas.registrar(medicion)
+    
+    def listar_ordenes_nuevas(self, despues_de, limite=200):
+        """
+        Lista las órdenes creadas después de una posición, de la más antigua a la más nueva
+        
+        Args:
+            despues_de (tuple): (fecha, número) desde donde listar (el feed pasa la marca de agua
+                                menos un margen para no perder órdenes confirmadas tarde)
+            limite (int): Máximo de órdenes a retornar
             
-        except pyodbc.Error as e:
+        Returns:
+            tuple: (bool, list/str) - (éxito, lista de órdenes o mensaje de error)
+        """
+        query = """
+            SELECT TOP (?)
+                o.o_numero              AS numero_orden,
+                o.o_fecha               AS fecha_creacion,
+                o.o_estado,
+                h.h_nombres,
+                h.h_apellido1,
+                h.h_apellido2,
+                h.h_sexo
+            FROM Ordenes o
+            INNER JOIN Historias h
+                ON o.o_his_id = h.h_id
+            WHERE o.o_fecha > ?
+               OR (o.o_fecha = ? AND o.o_numero > ?)
+            ORDER BY o.o_fecha, o.o_numero
+        """
+        fecha, numero = despues_de
+        
+        def query_nuevas(connection):
+            medicion = _metricas.actual()
+            cursor = connection.cursor()
+            try:
+                with medicion.fase(FASE_EJECUCION):
+                    cursor.execute(query, (limite, fecha, fecha, numero))
+                with medicion.fase(FASE_LECTURA):
+                    rows = cursor.fetchall()
+                medicion.filas = len(rows)
+                return [_row_to_orden(row) for row in rows]
+            finally:
+                cursor.close()
+        
+        try:
+            return self._run_query(query_nuevas, 'listar_ordenes_nuevas')
+        except DB_ERRORS as e:
             return False, f"Error en la consulta: {str(e)}"
         except Exception as e:
             return False, f"Error inesperado: {str(e)}"
@@ -273,11 +1239,29 @@ class OrdenesNexlab:
             tuple: (bool, str) - (éxito, mensaje)
         """
         try:
-            conectado, error = self.conectar()
-            if conectado:
-                self.desconectar()
-                return True, "Conexión exitosa a la base de datos"
-            else:
+            # Conexión dedicada: no toca las conexiones del pool compartido
+            backend, error = self.get_backend()
+            if error:
                 return False, error
+            
+            try:
+                connection = _open_connection(backend)
+            except DB_ERRORS as e:
+                return False, self._connection_error_message(e)
+            
+            try:
+                with _metricas.medir('test_conexion') as medicion:
+                    cursor = connection.cursor()
+                    with medicion.fase(FASE_EJECUCION):
+                        cursor.execute("SELECT 1")
+                    with medicion.fase(FASE_LECTURA):
+                        cursor.fetchone()
+                    cursor.close()
+            finally:
+                connection.close()
+            
+            # Configuración confirmada (ej: servidor configurado después de iniciar): réplica local
+            self.iniciar_replica()
+            return True, "Conexión exitosa a la base de datos"
         except Exception as e:
             return False, f"Error probando conexión: {str(e)}"
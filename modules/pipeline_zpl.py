@@ -0,0 +1,115 @@
+"""
+Pipeline de impresión directa: registros -> campos validados -> ZPL -> impresora
+Trabaja con generadores y no renderiza imágenes, la memoria no crece con el lote
+"""
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    # Solo para anotaciones: importar pandas aquí retrasaría el arranque de quien imprime ZPL
+    from modules.registros_web import RegistrosColumnares
+
+# Formato del código impreso a partir del GRAU
+CODE_TEMPLATE = '{}.01'
+
+
+def iter_label_fields(records: 'RegistrosColumnares', config: Dict[str, str],
+                      positions: Optional[Iterable[int]] = None,
+                      code_template: str = CODE_TEMPLATE) -> Iterator[Dict[str, str]]:
+    """
+    Recorre los registros y genera los campos de cada etiqueta
+
+    Args:
+        records (RegistrosColumnares): Registros (idealmente ya validados)
+        config (dict): Columnas 'nombre' y 'grau'
+        positions (Iterable[int], optional): Filas a recorrer (por defecto todas)
+        code_template (str): Plantilla del código
+
+    Yields:
+        dict: {'code', 'nombre', 'grau'} de cada etiqueta
+    """
+    nombres = records.column(config.get('nombre'))
+    graus = records.column(config.get('grau'))
+    if positions is None:
+        positions = range(len(records))
+
+    for pos in positions:
+        grau = graus[pos]
+        yield {
+            'code': code_template.replace('{}', grau or str(pos + 1)),
+            'nombre': nombres[pos],
+            'grau': grau,
+        }
+
+
+def iter_zpl_batches(printer, labels: Iterable[Dict[str, str]], barcode_format: str,
+                     copies: int = 1, batch_size: int = 50) -> Iterator[Tuple[int, bytes]]:
+    """
+    Convierte etiquetas a ZPL y las agrupa en lotes listos para enviar
+
+    Args:
+        printer (ZebraWebPrinter): Impresora (se usa su generate_zpl)
+        labels (Iterable[dict]): Campos de cada etiqueta
+        barcode_format (str): Formato de código de barras
+        copies (int): Copias de cada etiqueta
+        batch_size (int): Etiquetas distintas por lote
+
+    Yields:
+        tuple: (etiquetas en el lote, bytes ZPL del lote)
+    """
+    chunk: List[bytes] = []
+    for label in labels:
+        zpl = printer.generate_zpl(
+            label['code'],
+            barcode_format,
+            nombre=label.get('nombre') or None,
+            grau=label.get('grau') or None,
+            sexo=label.get('sexo') or None
+        ).encode()
+        chunk.append(zpl * copies)
+        if len(chunk) >= batch_size:
+            yield len(chunk), b''.join(chunk)
+            chunk = []
+
+    if chunk:
+        yield len(chunk), b''.join(chunk)
+
+
+def print_stream(printer, batches: Iterable[Tuple[int, bytes]],
+                 on_progress: Optional[Callable[[int, int], None]] = None) -> Tuple[int, int]:
+    """
+    Envía los lotes a la impresora a medida que se generan
+
+    Args:
+        printer (ZebraWebPrinter): Impresora con printer_name configurado
+        batches (Iterable): Lotes de iter_zpl_batches
+        on_progress (Callable, optional): Recibe (impresas, fallidas) tras cada lote
+
+    Returns:
+        tuple: (etiquetas impresas, etiquetas fallidas)
+    """
+    printed = failed = 0
+    for count, data in batches:
+        if printer.send_raw(data):
+            printed += count
+        else:
+            failed += count
+        if on_progress:
+            on_progress(printed, failed)
+    return printed, failed
+
+
+def sample_indices(indices: Sequence[int], limit: int) -> List[int]:
+    """
+    Muestra de filas para vista previa: primeras y últimas limit/2
+
+    Args:
+        indices (Sequence[int]): Filas seleccionadas
+        limit (int): Máximo de filas a mostrar
+
+    Returns:
+        list: Filas de la muestra (todas si no superan el límite)
+    """
+    if len(indices) <= limit:
+        return list(indices)
+    head = limit - limit // 2
+    return list(indices[:head]) + list(indices[len(indices) - limit // 2:])
@@ -0,0 +1,231 @@
+"""
+Pool de conexiones compartido entre sesiones
+Limita el número de conexiones abiertas y valida cada conexión al prestarla
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+
+class PoolAgotadoError(Exception):
+    """No se liberó ninguna conexión dentro del tiempo de espera"""
+
+
+class _ConexionPool:
+    """Conexión con sus marcas de tiempo dentro del pool"""
+
+    __slots__ = ('connection', 'created_at', 'last_used')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class PoolConexiones:
+    """Pool acotado de conexiones con préstamo/devolución y métricas de espera"""
+
+    def __init__(self, factory: Callable, max_size: int = 12, max_idle: float = 300.0,
+                 max_lifetime: float = 1800.0, validation_interval: float = 5.0,
+                 validation_query: str = 'SELECT 1'):
+        """
+        Args:
+            factory (Callable): Función sin argumentos que abre una conexión nueva
+            max_size (int): Máximo de conexiones abiertas (prestadas + libres)
+            max_idle (float): Segundos sin uso tras los que se cierra una conexión libre
+            max_lifetime (float): Segundos de vida máxima de una conexión
+            validation_interval (float): Se valida al prestar si estuvo libre más de
+                                         estos segundos (0 = validar siempre)
+            validation_query (str): Consulta usada para validar
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.validation_interval = validation_interval
+        self.validation_query = validation_query
+
+        self._idle = deque()
+        self._in_use = {}
+        self._opening = 0
+        self._cond = threading.Condition()
+
+        self._created = 0
+        self._discarded = 0
+        self._borrowed = 0
+        self._waits = deque(maxlen=1000)
+        self._max_wait = 0.0
+
+    def acquire(self, timeout: float = 15.0):
+        """
+        Presta una conexión válida del pool
+
+        Args:
+            timeout (float): Segundos máximos de espera si el pool está lleno
+
+        Returns:
+            Conexión abierta
+
+        Raises:
+            PoolAgotadoError: Si no se liberó ninguna conexión a tiempo
+            Exception: Errores de la factory al abrir una conexión nueva
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            entry = None
+            with self._cond:
+                while True:
+                    self._evict_locked()
+                    if self._idle:
+                        entry = self._idle.pop()
+                        # Queda reservada mientras se valida fuera del lock: cuenta para max_size
+                        self._in_use[id(entry.connection)] = entry
+                        break
+                    if len(self._in_use) + self._opening < self.max_size:
+                        self._opening += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._record_wait(time.monotonic() - start)
+                        raise PoolAgotadoError(
+                            f"No hay conexiones libres ({self.max_size} en uso) tras {timeout:g}s"
+                        )
+                    self._cond.wait(remaining)
+
+            if entry is None:
+                # Abrir fuera del lock: conectar puede tardar segundos
+                try:
+                    entry = _ConexionPool(self.factory())
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    # Pasa de "abriendo" a prestada sin que el lugar quede libre en el medio
+                    self._opening -= 1
+                    self._created += 1
+                    self._in_use[id(entry.connection)] = entry
+            elif not self._validate(entry):
+                with self._cond:
+                    del self._in_use[id(entry.connection)]
+                    self._cond.notify()
+                self._close(entry)
+                continue
+
+            with self._cond:
+                self._borrowed += 1
+                self._record_wait(time.monotonic() - start)
+            return entry.connection
+
+    def release(self, connection, discard: bool = False) -> None:
+        """
+        Devuelve una conexión al pool
+
+        Args:
+            connection: Conexión obtenida con acquire()
+            discard (bool): Cerrar la conexión en vez de reutilizarla (ej: tras un error)
+        """
+        with self._cond:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                return
+            now = time.monotonic()
+            if discard or now - entry.created_at > self.max_lifetime:
+                to_close = entry
+            else:
+                entry.last_used = now
+                self._idle.append(entry)
+                to_close = None
+            self._cond.notify()
+
+        if to_close:
+            self._close(to_close)
+
+    @contextmanager
+    def connection(self, timeout: float = 15.0):
+        """Presta una conexión y la devuelve al salir (se descarta si hubo error)"""
+        conn = self.acquire(timeout)
+        ok = False
+        try:
+            yield conn
+            ok = True
+        finally:
+            self.release(conn, discard=not ok)
+
+    def close_idle(self) -> None:
+        """Cierra todas las conexiones libres"""
+        with self._cond:
+            entries = list(self._idle)
+            self._idle.clear()
+        for entry in entries:
+            self._close(entry)
+
+    def stats(self) -> Dict:
+        """
+        Métricas del pool
+
+        Returns:
+            dict: Tamaño, uso y tiempos de espera (ms) al pedir una conexión
+        """
+        with self._cond:
+            waits = sorted(self._waits)
+            in_use = len(self._in_use)
+            idle = len(self._idle)
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))] * 1000
+
+        return {
+            'max_conexiones': self.max_size,
+            'en_uso': in_use,
+            'libres': idle,
+            'creadas': self._created,
+            'descartadas': self._discarded,
+            'prestamos': self._borrowed,
+            'espera_p50_ms': round(percentile(0.50), 2),
+            'espera_p95_ms': round(percentile(0.95), 2),
+            'espera_max_ms': round(self._max_wait * 1000, 2),
+        }
+
+    def _validate(self, entry: _ConexionPool) -> bool:
+        if time.monotonic() - entry.last_used < self.validation_interval:
+            return True
+        try:
+            cursor = entry.connection.cursor()
+            try:
+                cursor.execute(self.validation_query)
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _evict_locked(self) -> None:
+        """Cierra conexiones libres vencidas (llamar con el lock tomado)"""
+        now = time.monotonic()
+        expired = [
+            entry for entry in self._idle
+            if now - entry.last_used > self.max_idle or now - entry.created_at > self.max_lifetime
+        ]
+        for entry in expired:
+            self._idle.remove(entry)
+            self._close(entry)
+
+    def _close(self, entry: _ConexionPool) -> None:
+        self._discarded += 1
+        try:
+            entry.connection.close()
+        except Exception:
+            pass
+
+    def _record_wait(self, seconds: float) -> None:
+        self._waits.append(seconds)
+        self._max_wait = max(self._max_wait, seconds)
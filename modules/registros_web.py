@@ -0,0 +1,216 @@
+"""
+Almacenamiento columnar compacto de registros importados
+Reemplaza la lista de diccionarios por fila usada en el modo Excel
+"""
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+
+class FilaRegistro:
+    """Vista ligera de una fila de RegistrosColumnares (sin copiar datos)"""
+
+    __slots__ = ('_registros', '_pos')
+
+    def __init__(self, registros: 'RegistrosColumnares', pos: int):
+        self._registros = registros
+        self._pos = pos
+
+    @property
+    def index(self) -> int:
+        """Posición original de la fila en el archivo cargado"""
+        return self._registros.index[self._pos]
+
+    def get(self, column: str, default: str = '') -> str:
+        """
+        Obtiene el valor de una columna, como dict.get
+
+        Args:
+            column (str): Nombre de la columna
+            default (str): Valor si la columna no existe
+
+        Returns:
+            str: Valor de la celda
+        """
+        values = self._registros.columns.get(column)
+        if values is None:
+            return default
+        return values[self._pos]
+
+    def __getitem__(self, column: str) -> str:
+        return self._registros.columns[column][self._pos]
+
+    def keys(self) -> List[str]:
+        return list(self._registros.columns)
+
+    def to_dict(self) -> Dict[str, str]:
+        """Materializa la fila como diccionario"""
+        return {name: values[self._pos] for name, values in self._registros.columns.items()}
+
+    def __repr__(self):
+        return f"FilaRegistro({self.to_dict()!r})"
+
+
+class RegistrosColumnares:
+    """
+    Contenedor columnar de registros de texto
+
+    Cada columna se guarda como una tupla de strings y las posiciones
+    originales de las filas en un array compacto. Es la estructura única
+    usada para vista previa, impresión y tabla de datos.
+    """
+
+    def __init__(self, columns: Dict[str, Sequence[str]], index: Optional[Sequence[int]] = None):
+        """
+        Args:
+            columns (Dict): Nombre de columna -> valores (todos del mismo largo)
+            index (Sequence[int], optional): Posición original de cada fila
+        """
+        self.columns = {name: tuple(values) for name, values in columns.items()}
+
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Todas las columnas deben tener el mismo número de filas")
+        self._length = lengths.pop() if lengths else 0
+
+        self.index = array('q', index if index is not None else range(self._length))
+        if len(self.index) != self._length:
+            raise ValueError("El índice no coincide con el número de filas")
+
+        self._dataframe = None
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, column_names: Sequence[str]) -> 'RegistrosColumnares':
+        """
+        Construye los registros a partir de columnas de un DataFrame
+
+        Los valores se convierten a texto de forma vectorizada (los números
+        enteros sin '.0', los vacíos como ''). Se descartan las filas en que
+        todas las columnas quedan vacías.
+
+        Args:
+            df (pd.DataFrame): Datos cargados
+            column_names (Sequence[str]): Columnas a extraer
+
+        Returns:
+            RegistrosColumnares: Registros extraídos
+        """
+        column_names = list(dict.fromkeys(name for name in column_names if name in df.columns))
+        if not column_names:
+            return cls({})
+
+        texts = {name: _series_to_text(df[name]) for name in column_names}
+
+        # Solo conservar filas con al menos un valor
+        keep = None
+        for text in texts.values():
+            non_empty = text != ''
+            keep = non_empty if keep is None else (keep | non_empty)
+        keep = keep.to_numpy()
+
+        # El índice conserva la fila original del archivo (antes de descartar filas vacías)
+        positions = keep.nonzero()[0]
+        if pd.api.types.is_integer_dtype(df.index):
+            positions = df.index.to_numpy()[positions]
+        return cls(
+            {name: text.to_numpy()[keep].tolist() for name, text in texts.items()},
+            positions.tolist()
+        )
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    def __getitem__(self, pos: int) -> FilaRegistro:
+        if pos < 0:
+            pos += self._length
+        if not 0 <= pos < self._length:
+            raise IndexError("Fila fuera de rango")
+        return FilaRegistro(self, pos)
+
+    def __iter__(self) -> Iterator[FilaRegistro]:
+        for pos in range(self._length):
+            yield FilaRegistro(self, pos)
+
+    def column(self, name: Optional[str]) -> Sequence[str]:
+        """
+        Obtiene todos los valores de una columna
+
+        Args:
+            name (str): Nombre de la columna (None o inexistente = vacía)
+
+        Returns:
+            Sequence[str]: Valores de la columna
+        """
+        values = self.columns.get(name) if name else None
+        if values is None:
+            return ('',) * self._length
+        return values
+
+    def take(self, positions: Sequence[int]) -> 'RegistrosColumnares':
+        """
+        Crea un subconjunto con las filas indicadas
+
+        Args:
+            positions (Sequence[int]): Posiciones (0-based) a conservar
+
+        Returns:
+            RegistrosColumnares: Nuevo contenedor con las filas seleccionadas
+        """
+        return RegistrosColumnares(
+            {name: [values[pos] for pos in positions] for name, values in self.columns.items()},
+            [self.index[pos] for pos in positions]
+        )
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        DataFrame para mostrar en tabla (se construye una sola vez)
+
+        El índice muestra el número de fila del archivo empezando en 1.
+
+        Returns:
+            pd.DataFrame: Vista tabular de los registros
+        """
+        if self._dataframe is None:
+            rows = pd.Index(self.index, name='fila') + 1
+            self._dataframe = pd.DataFrame(self.columns, index=rows)
+        return self._dataframe
+
+
+def _series_to_text(series: pd.Series) -> pd.Series:
+    """
+    Convierte una columna a texto, removiendo '.0' de los enteros
+
+    Args:
+        series (pd.Series): Columna original
+
+    Returns:
+        pd.Series: Columna de strings ('' para vacíos)
+    """
+    missing = series.isna()
+
+    if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        text = series.astype(str)
+    elif pd.api.types.is_float_dtype(series):
+        text = series.astype(str)
+        whole = ~missing & (series % 1 == 0) & (series.abs() < 2 ** 53)
+        if whole.any():
+            text[whole] = series[whole].astype('int64').astype(str)
+    else:
+        # Columnas mixtas (texto y números en la misma columna)
+        text = pd.Series('', index=series.index, dtype=object)
+        text[~missing] = series[~missing].map(_value_to_text)
+        return text
+
+    text[missing] = ''
+    return text
+
+
+def _value_to_text(val) -> str:
+    """Conversión valor a valor para columnas de tipo mixto"""
+    if isinstance(val, (int, float)):
+        return str(int(val)) if val == int(val) else str(val)
+    return str(val)
@@ -0,0 +1,216 @@
+"""
+Réplica local en SQLite de las órdenes recientes de Nexlab
+Permite búsquedas sin depender de la latencia (o disponibilidad) de SQL Server
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ordenes (
+    numero_orden    TEXT PRIMARY KEY,
+    fecha_creacion  TEXT NOT NULL,
+    estado          TEXT,
+    nombres         TEXT,
+    apellido1       TEXT,
+    apellido2       TEXT,
+    sexo            TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_ordenes_fecha ON ordenes (fecha_creacion, numero_orden);
+CREATE TABLE IF NOT EXISTS meta (
+    clave   TEXT PRIMARY KEY,
+    valor   TEXT
+);
+"""
+
+_COLUMNS = ('numero_orden', 'fecha_creacion', 'estado', 'nombres', 'apellido1', 'apellido2', 'sexo')
+
+
+class ReplicaOrdenes:
+    """Réplica de lectura de Ordenes+Historias en un archivo SQLite indexado"""
+
+    def __init__(self, path: str, retention_days: int = 3):
+        """
+        Args:
+            path (str): Ruta del archivo SQLite
+            retention_days (int): Días de órdenes a conservar
+        """
+        self.path = path
+        self.retention_days = retention_days
+        self.last_sync = None
+        self.last_error = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Una conexión por hilo: sqlite3 no comparte conexiones entre hilos
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def buscar(self, numero_orden: str) -> Optional[Dict]:
+        """
+        Busca una orden en la réplica
+
+        Args:
+            numero_orden (str): Número de orden
+
+        Returns:
+            dict: Datos de la orden (mismo formato que buscar_orden) o None
+        """
+        row = self._conn().execute(
+            'SELECT * FROM ordenes WHERE numero_orden = ?', (str(numero_orden),)
+        ).fetchone()
+        return self._row_to_orden(row) if row else None
+
+    def buscar_varias(self, numeros: List[str]) -> Dict[str, Dict]:
+        """
+        Busca varias órdenes en la réplica
+
+        Returns:
+            dict: {numero: datos} solo para las órdenes presentes
+        """
+        encontradas = {}
+        conn = self._conn()
+        for inicio in range(0, len(numeros), 500):
+            chunk = numeros[inicio:inicio + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            for row in conn.execute(f'SELECT * FROM ordenes WHERE numero_orden IN ({placeholders})', chunk):
+                encontradas[row['numero_orden']] = self._row_to_orden(row)
+        return encontradas
+
+    @staticmethod
+    def _row_to_orden(row) -> Dict:
+        orden = {column: row[column] for column in _COLUMNS}
+        orden['fecha_creacion'] = datetime.fromisoformat(orden['fecha_creacion'])
+        for column in ('nombres', 'apellido1', 'apellido2', 'sexo'):
+            orden[column] = orden[column] or ''
+        return orden
+
+    def watermark(self):
+        """
+        Última posición sincronizada (fecha, número de orden)
+
+        Returns:
+            tuple: (datetime, str); al iniciar vacía, el inicio del período de retención
+        """
+        conn = self._conn()
+        fecha = conn.execute("SELECT valor FROM meta WHERE clave = 'wm_fecha'").fetchone()
+        numero = conn.execute("SELECT valor FROM meta WHERE clave = 'wm_numero'").fetchone()
+        if fecha is None:
+            return datetime.now() - timedelta(days=self.retention_days), ''
+        return datetime.fromisoformat(fecha[0]), numero[0] if numero else ''
+
+    def apply_rows(self, rows: Iterable[Dict]) -> int:
+        """
+        Inserta o actualiza un lote de órdenes y avanza la marca de agua
+
+        Las filas deben venir ordenadas por (fecha_creacion, numero_orden).
+
+        Args:
+            rows (Iterable[dict]): Órdenes con las claves de buscar_orden
+
+        Returns:
+            int: Filas aplicadas
+        """
+        values = [
+            (
+                str(row['numero_orden']).strip(),
+                row['fecha_creacion'].isoformat(sep=' '),
+                None if row['estado'] is None else str(row['estado']),
+                row['nombres'], row['apellido1'], row['apellido2'], row['sexo'],
+            )
+            for row in rows
+        ]
+        if not values:
+            return 0
+
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO ordenes ({', '.join(_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                values
+            )
+            last = values[-1]
+            conn.executemany(
+                'INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)',
+                [('wm_fecha', last[1]), ('wm_numero', last[0])]
+            )
+        return len(values)
+
+    def purge(self) -> int:
+        """Elimina órdenes más antiguas que el período de retención"""
+        limite = (datetime.now() - timedelta(days=self.retention_days)).isoformat(sep=' ')
+        conn = self._conn()
+        with conn:
+            return conn.execute('DELETE FROM ordenes WHERE fecha_creacion < ?', (limite,)).rowcount
+
+    def status(self) -> Dict:
+        """
+        Estado de la réplica para mostrar en la interfaz
+
+        Returns:
+            dict: Órdenes replicadas, retraso en segundos, marca de agua y último error
+        """
+        total = self._conn().execute('SELECT COUNT(*) FROM ordenes').fetchone()[0]
+        wm_fecha, wm_numero = self.watermark()
+        return {
+            'ordenes': total,
+            'retraso_s': round(time.time() - self.last_sync, 1) if self.last_sync else None,
+            'marca_agua': f"{wm_fecha:%d/%m/%Y %H:%M:%S} #{wm_numero}" if wm_numero else None,
+            'ultimo_error': self.last_error,
+        }
+
+    def is_fresh(self, max_lag: float) -> bool:
+        """True si la última sincronización exitosa fue hace menos de max_lag segundos"""
+        return self.last_sync is not None and time.time() - self.last_sync <= max_lag
+
+    def start_sync(self, sync_fn: Callable[['ReplicaOrdenes'], int], interval: float = 30.0) -> None:
+        """
+        Inicia la sincronización periódica en segundo plano (una sola vez por réplica)
+
+        Args:
+            sync_fn (Callable): Recibe la réplica y trae las órdenes nuevas;
+                                retorna filas aplicadas o lanza excepción
+            interval (float): Segundos entre sincronizaciones
+        """
+        if self._thread and self._thread.is_alive():
+            return
+
+        def loop():
+            cycles = 0
+            while not self._stop.is_set():
+                try:
+                    sync_fn(self)
+                    self.last_sync = time.time()
+                    self.last_error = None
+                    cycles += 1
+                    if cycles % 120 == 0:
+                        self.purge()
+                    wait = interval
+                except Exception as e:
+                    self.last_error = str(e)
+                    # Reintentar antes para no dejar la réplica desactualizada
+                    wait = min(interval, 10.0)
+                self._stop.wait(wait)
+
+        self._thread = threading.Thread(target=loop, name='replica-ordenes', daemon=True)
+        self._thread.start()
+
+    def stop_sync(self) -> None:
+        """Detiene la sincronización en segundo plano"""
+        self._stop.set()
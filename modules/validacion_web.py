@@ -0,0 +1,212 @@
+"""
+Validación y normalización de códigos GRAU importados
+Detecta valores inválidos y duplicados antes de generar imágenes o ZPL
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from modules.registros_web import RegistrosColumnares
+
+# Reglas por formato: (patrón de caracteres, largo mínimo, largo máximo)
+# Los largos corresponden al código final (ya con el sufijo, ej: 1622485.01)
+FORMAT_RULES = {
+    'CODE128': (r'[\x20-\x7E]+', 1, 48),
+    'CODE39': (r'[0-9A-Z\-. $/+%]+', 1, 30),
+    'EAN13': (r'[0-9]+', 12, 13),
+    'EAN8': (r'[0-9]+', 7, 8),
+    'UPC_A': (r'[0-9]+', 11, 12),
+    'ITF': (r'[0-9]+', 2, 30),
+}
+
+# Formatos que solo admiten mayúsculas: se convierten antes de validar.
+# En el resto (ej: CODE128) mayúsculas y minúsculas son códigos distintos y se respetan
+UPPERCASE_FORMATS = {'CODE39'}
+
+# Formatos con dígito verificador: largo completo (con dígito)
+CHECK_DIGIT_LENGTHS = {
+    'EAN13': 13,
+    'EAN8': 8,
+    'UPC_A': 12,
+}
+
+
+class ReporteValidacion:
+    """Resultado de validar los registros importados"""
+
+    def __init__(self, records: RegistrosColumnares, rejected: List[Dict], total: int):
+        self.records = records
+        self.rejected = rejected
+        self.total = total
+
+    @property
+    def valid_count(self) -> int:
+        return len(self.records)
+
+    @property
+    def rejected_count(self) -> int:
+        return len(self.rejected)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Tabla de filas rechazadas para mostrar en la interfaz"""
+        return pd.DataFrame(self.rejected, columns=['fila', 'valor', 'codigo', 'motivo'])
+
+
+class ValidadorCodigos:
+    """Clase para validar y normalizar códigos antes de renderizar"""
+
+    def normalize(self, values: Sequence[str], barcode_format: str = None) -> pd.Series:
+        """
+        Normaliza valores GRAU: sin espacios, sin '.0' final y en mayúsculas si el formato lo exige
+
+        Args:
+            values (Sequence[str]): Valores originales
+            barcode_format (str, optional): Formato de código de barras (UPPERCASE_FORMATS)
+
+        Returns:
+            pd.Series: Valores normalizados
+        """
+        series = pd.Series(values, dtype=object).fillna('').astype(str)
+        series = series.str.replace(r'\s+', '', regex=True)
+        if barcode_format in UPPERCASE_FORMATS:
+            series = series.str.upper()
+        # "1622485.0" aparece cuando el número pasó por un float en CSV
+        return series.str.replace(r'^(\d+)\.0$', r'\1', regex=True)
+
+    def check_codes(self, codes: pd.Series, barcode_format: str) -> pd.Series:
+        """
+        Verifica caracteres, largo y dígito verificador de cada código
+
+        Args:
+            codes (pd.Series): Códigos finales a codificar
+            barcode_format (str): Formato de código de barras
+
+        Returns:
+            pd.Series: Motivo de rechazo por código ('' si es válido)
+        """
+        reasons = pd.Series('', index=codes.index, dtype=object)
+        rule = FORMAT_RULES.get(barcode_format)
+        if rule is None:
+            return reasons
+
+        pattern, min_len, max_len = rule
+        lengths = codes.str.len()
+
+        bad_chars = ~codes.str.fullmatch(pattern).fillna(False).astype(bool)
+        reasons[bad_chars] = f"Caracteres no permitidos en {barcode_format}"
+
+        bad_len = ~bad_chars & ((lengths < min_len) | (lengths > max_len))
+        reasons[bad_len] = f"Largo inválido para {barcode_format} ({min_len}-{max_len})"
+
+        full_length = CHECK_DIGIT_LENGTHS.get(barcode_format)
+        if full_length:
+            with_check = (reasons == '') & (lengths == full_length)
+            if with_check.any():
+                wrong = ~_check_digit_ok(codes[with_check])
+                reasons[wrong[wrong].index] = "Dígito verificador incorrecto"
+
+        if barcode_format == 'ITF':
+            odd = (reasons == '') & (lengths % 2 == 1)
+            reasons[odd] = "ITF requiere un número par de dígitos"
+
+        return reasons
+
+    def validate_records(self, records: RegistrosColumnares, grau_column: str,
+                         barcode_format: str, code_template: str = '{}.01',
+                         header_row: int = 0) -> ReporteValidacion:
+        """
+        Valida los registros importados y descarta los inválidos y duplicados
+
+        Args:
+            records (RegistrosColumnares): Registros de get_data_with_config
+            grau_column (str): Columna con el número GRAU
+            barcode_format (str): Formato de código de barras
+            code_template (str): Plantilla del código final
+            header_row (int): Fila de encabezados (0-based), para informar la fila de la planilla
+
+        Returns:
+            ReporteValidacion: Registros válidos (con GRAU normalizado) y rechazados
+        """
+        total = len(records)
+        if not total or not grau_column or grau_column not in records.columns:
+            return ReporteValidacion(records, [], total)
+
+        original = records.column(grau_column)
+        graus = self.normalize(original, barcode_format)
+        codes = graus.map(lambda grau: code_template.replace('{}', grau))
+
+        reasons = self.check_codes(codes, barcode_format)
+        reasons[graus == ''] = "GRAU vacío"
+
+        # Duplicados: se conserva la primera aparición
+        duplicated = (reasons == '') & codes.duplicated(keep='first')
+        if duplicated.any():
+            first_pos = pd.Series(np.arange(total), index=codes.index).groupby(codes).transform('first')
+            for pos in duplicated[duplicated].index:
+                reasons[pos] = f"Duplicado de la fila {fila_planilla(records.index[first_pos[pos]], header_row)}"
+
+        rejected = [
+            {'fila': fila_planilla(records.index[pos], header_row), 'valor': original[pos], 'codigo': codes[pos],
+             'motivo': reason}
+            for pos, reason in reasons[reasons != ''].items()
+        ]
+
+        keep = (reasons == '').to_numpy().nonzero()[0].tolist()
+        columns = {name: [values[pos] for pos in keep] for name, values in records.columns.items()}
+        columns[grau_column] = graus.iloc[keep].tolist()
+        valid = RegistrosColumnares(columns, [records.index[pos] for pos in keep])
+
+        return ReporteValidacion(valid, rejected, total)
+
+
+def fila_planilla(index: int, header_row: int = 0) -> int:
+    """
+    Número de fila que el usuario ve en la planilla para un registro
+
+    Args:
+        index (int): Posición del registro entre los datos (0 = primera fila bajo el encabezado)
+        header_row (int): Fila de encabezados (0-based)
+
+    Returns:
+        int: Fila de la planilla (1-based, contando el encabezado y las filas anteriores)
+    """
+    return int(index) + header_row + 2
+
+
+def clave_etiqueta(origen: str, index: int, config: Dict[str, str], barcode_format: str) -> str:
+    """
+    Clave estable de la etiqueta de un registro (vista previa y selección)
+
+    Args:
+        origen (str): Archivo, hoja y fila de encabezado de los datos
+        index (int): Posición original del registro en la planilla (records.index)
+        config (dict): Columnas de nombre y GRAU usadas para leer el registro
+        barcode_format (str): Formato de código de barras
+
+    Returns:
+        str: Clave que solo se repite para la misma fila leída con el mismo mapeo y formato
+    """
+    return f"fila-{origen}-{config.get('nombre')}-{config.get('grau')}-{barcode_format}-{int(index)}"
+
+
+def _check_digit_ok(codes: pd.Series) -> pd.Series:
+    """
+    Compara el dígito verificador EAN/UPC de códigos de igual largo
+
+    Args:
+        codes (pd.Series): Códigos numéricos de largo fijo
+
+    Returns:
+        pd.Series: True donde el dígito verificador es correcto
+    """
+    length = len(codes.iloc[0])
+    digits = (np.frombuffer(''.join(codes).encode('ascii'), dtype=np.uint8) - 48).reshape(-1, length)
+
+    # Pesos 3,1,3,... contados desde el dígito anterior al verificador
+    data_len = length - 1
+    weights = np.where((data_len - 1 - np.arange(data_len)) % 2 == 0, 3, 1)
+    expected = (10 - (digits[:, :data_len] @ weights) % 10) % 10
+
+    return pd.Series(expected == digits[:, data_len], index=codes.index)
+
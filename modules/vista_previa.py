@@ -0,0 +1,89 @@
+"""
+Generación de la vista previa en segundo plano
+Las etiquetas se generan en un hilo del pool y quedan disponibles en orden a
+medida que se completan: la página muestra las primeras mientras se generan
+las demás, y el trabajo se puede cancelar en cualquier momento
+"""
+import threading
+from typing import Callable, Dict, List
+
+
+class TrabajoVistaPrevia:
+    """Genera las imágenes de una lista de etiquetas sin bloquear la página"""
+
+    def __init__(self, labels: List[Dict], render: Callable[[Dict], str], campo: str = 'svg', executor=None):
+        """
+        Args:
+            labels (list): Etiquetas en orden; las que ya tienen `campo` no se vuelven a generar
+            render (Callable): Recibe una etiqueta y retorna su imagen
+            campo (str): Clave donde se guarda la imagen en cada etiqueta
+            executor (Executor, optional): Pool donde correr el trabajo (None = hilo propio)
+        """
+        self.total = len(labels)
+        self.generadas = 0
+        self.error = None
+        self.terminado = False
+        self._labels = labels
+        self._render = render
+        self._campo = campo
+        self._listas = 0
+        self._cancelado = threading.Event()
+        self._cambio = threading.Condition()
+        if executor is not None:
+            executor.submit(self._run)
+        else:
+            threading.Thread(target=self._run, name='vista-previa', daemon=True).start()
+
+    def _run(self):
+        try:
+            for label in self._labels:
+                if self._cancelado.is_set():
+                    break
+                if label.get(self._campo) is None:
+                    label[self._campo] = self._render(label)
+                    self.generadas += 1
+                with self._cambio:
+                    self._listas += 1
+                    self._cambio.notify_all()
+        except Exception as e:
+            self.error = f"Código {label.get('code')}: {str(e)}"
+        finally:
+            with self._cambio:
+                self.terminado = True
+                self._cambio.notify_all()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelado.is_set()
+
+    @property
+    def listas(self) -> int:
+        """Etiquetas ya generadas (las primeras de la lista)"""
+        return self._listas
+
+    def etiquetas(self) -> List[Dict]:
+        """
+        Etiquetas listas hasta el momento, en el orden original
+
+        Returns:
+            list: Copia del prefijo ya generado
+        """
+        return self._labels[:self._listas]
+
+    def esperar(self, cantidad: int, timeout: float) -> bool:
+        """
+        Espera a que haya al menos `cantidad` etiquetas listas (o a que termine el trabajo)
+
+        Args:
+            cantidad (int): Etiquetas necesarias (ej: la primera página)
+            timeout (float): Segundos máximos de espera
+
+        Returns:
+            bool: True si se alcanzó la cantidad o el trabajo terminó
+        """
+        with self._cambio:
+            return self._cambio.wait_for(lambda: self.terminado or self._listas >= cantidad, timeout)
+
+    def cancelar(self) -> None:
+        """Detiene el trabajo después de la etiqueta en curso"""
+        self._cancelado.set()
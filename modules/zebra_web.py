@@ -2,21 +2,32 @@
 Módulo para conexión con impresoras Zebra desde la versión web
 Adaptación del módulo original para Streamlit
 """
-import win32print
-import win32ui
-import win32con
+try:
+    import win32print
+    import win32ui
+    import win32con
+except ImportError:
+    # Sin pywin32 (ej: Linux): se puede generar ZPL pero no imprimir
+    win32print = win32ui = win32con = None
 from PIL import Image, ImageWin
 import io
 
+from modules.barcode_web import BarcodeWebGenerator
+from modules.diseno_etiqueta import generar_zpl, valores_etiqueta
+
 class ZebraWebPrinter:
     """Clase para manejar impresoras Zebra desde la web"""
     
     def __init__(self):
         self.printer_name = None
+        # Cuenta los módulos del código para elegir el ^BY con el que entra en la etiqueta
+        self.barcodes = BarcodeWebGenerator()
         
     def get_available_printers(self):
         """Obtiene lista de impresoras disponibles en el sistema"""
         printers = []
+        if win32print is None:
+            return printers
         try:
             # Obtener impresoras locales
             printer_info_local = win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL)
@@ -49,65 +60,20 @@ class ZebraWebPrinter:
             barcode_value (str): Valor del código de barras
             barcode_type (str): Tipo de código
             nombre (str): Nombre opcional
-            grau (str): Grau opcional
+            grau (str): Grau opcional (solo se imprime si el diseño lo incluye)
             sexo (str): Sexo del paciente (opcional, para órdenes Nexlab)
             
         Returns:
             str: Código ZPL
         """
-        from datetime import datetime
-        
-        # Mapeo de formatos a códigos ZPL
-        zpl_formats = {
-            'CODE128': '^BC',
-            'CODE39': '^B3',
-            'EAN13': '^BE',
-            'EAN8': '^B8',
-            'UPC_A': '^BU',
-            'ITF': '^BI'
-        }
-        
-        zpl_barcode = zpl_formats.get(barcode_type, '^BC')
-        
-        # Configuración para etiquetas 52mm x 33mm (203 DPI)
-        label_width_dots = 415
-        label_height_dots = 264
-        
-        # Código de barras más grande
-        barcode_height = 80  # Aumentado de 50 a 80
-        barcode_x = 30
-        barcode_y = 50
-        
-        # Obtener fecha actual
-        fecha_actual = datetime.now().strftime("%d/%m/%Y")
-        
-        # Construir ZPL
-        zpl = f"""^XA
-^PW{label_width_dots}
-^LL{label_height_dots}
-^FO280,10^A0N,24,24^FD{fecha_actual}^FS
-^FO{barcode_x},{barcode_y}
-{zpl_barcode}N,{barcode_height},N,N,N,A
-^FD{barcode_value}^FS
-"""
-        
-        # Agregar número grande debajo del código de barras
-        numero_y = barcode_y + barcode_height + 10
-        zpl += f"^FO{barcode_x},{numero_y}^A0N,35,35^FD{barcode_value}^FS\n"
-        
-        # Agregar nombre debajo del número si existe (tamaño más pequeño para que no se corte)
-        if nombre:
-            nombre_y = numero_y + 45
-            zpl += f"^FO{barcode_x},{nombre_y}^A0N,20,18^FD{nombre}^FS\n"
-            
-            # Agregar sexo debajo del nombre si existe
-            if sexo:
-                sexo_y = nombre_y + 25
-                zpl += f"^FO{barcode_x},{sexo_y}^A0N,18,16^FD{sexo}^FS\n"
-        
-        zpl += "^XZ"
-        
-        return zpl
+        # Plantilla compilada una vez por formato a partir de DISENO_ETIQUETA; el ajuste de la
+        # etiqueta (ancho de barra y de letra) es el mismo que aplican la vista previa, el PNG y el PDF
+        try:
+            modulos, _ = self.barcodes.get_bar_runs(barcode_type, barcode_value)
+        except Exception:
+            # Formato o valor que python-barcode no codifica: la Zebra decide con el ^BY del diseño
+            modulos = None
+        return generar_zpl(barcode_type, valores_etiqueta(barcode_value, nombre, sexo, grau), modulos)
     
     def print_barcode(self, barcode_value, barcode_type='CODE128'):
         """
@@ -192,11 +158,26 @@ class ZebraWebPrinter:
         Args:
             zpl_code (str): Código ZPL a imprimir
             
+        Returns:
+            bool: True si se imprimió correctamente
+        """
+        return self.send_raw(zpl_code.encode())
+    
+    def send_raw(self, data):
+        """
+        Envía bytes ZPL ya codificados como un solo trabajo de impresión
+        
+        Args:
+            data (bytes): ZPL de una o varias etiquetas
+            
         Returns:
             bool: True si se imprimió correctamente
         """
         if not self.printer_name:
             raise Exception("No hay impresora seleccionada")
+        if win32print is None:
+            print("Error enviando a impresora: pywin32 no está instalado")
+            return False
         
         try:
             # Enviar a impresora
@@ -205,7 +186,7 @@ class ZebraWebPrinter:
                 hJob = win32print.StartDocPrinter(hPrinter, 1, ("Barcode Label", None, "RAW"))
                 try:
                     win32print.StartPagePrinter(hPrinter)
-                    win32print.WritePrinter(hPrinter, zpl_code.encode())
+                    win32print.WritePrinter(hPrinter, data)
                     win32print.EndPagePrinter(hPrinter)
                 finally:
                     win32print.EndDocPrinter(hPrinter)
@@ -225,7 +206,7 @@ class ZebraWebPrinter:
         Returns:
             bool: True si la conexión es exitosa
         """
-        if not self.printer_name:
+        if not self.printer_name or win32print is None:
             return False
         
         try:
@@ -0,0 +1,50 @@
+"""
+Servicio HTTP local de etiquetas para otros sistemas del hospital
+
+Ejecutar: python servicio_etiquetas.py --puerto 8600 --impresora "ZDesigner GK420t"
+
+Ejemplos:
+    curl http://localhost:8600/salud
+    curl "http://localhost:8600/png?code=1622485.01&nombre=JUAN%20PEREZ" -o etiqueta.png
+    curl -X POST http://localhost:8600/zpl -d '{"etiquetas": [{"code": "1622485.01", "nombre": "JUAN PEREZ", "sexo": "M"}]}'
+    curl -X POST http://localhost:8600/imprimir -d '{"code": "1622485.01", "nombre": "JUAN PEREZ", "copias": 2}'
+"""
+import argparse
+import sys
+
+from modules.barcode_web import BarcodeWebGenerator
+from modules.http_etiquetas import ServicioEtiquetas, ServidorEtiquetas
+from modules.zebra_web import ZebraWebPrinter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de generación e impresión de etiquetas")
+    parser.add_argument('--host', default='127.0.0.1', help="Interfaz de escucha (0.0.0.0 = toda la red)")
+    parser.add_argument('--puerto', type=int, default=8600, help="Puerto HTTP")
+    parser.add_argument('--impresora', help="Impresora Zebra para /imprimir (sin ella solo se generan etiquetas)")
+    parser.add_argument('--trabajadores', type=int, default=8, help="Hilos que atienden conexiones")
+    parser.add_argument('--cola', type=int, default=32, help="Conexiones en espera antes de responder 503")
+    parser.add_argument('--verbose', action='store_true', help="Mostrar cada solicitud")
+    args = parser.parse_args()
+
+    printer = ZebraWebPrinter()
+    if args.impresora:
+        printer.set_printer(args.impresora)
+        if not printer.test_connection():
+            print(f"⚠️ No se pudo abrir la impresora: {args.impresora} (los trabajos fallarán)")
+
+    servicio = ServicioEtiquetas(BarcodeWebGenerator(), printer)
+    server = ServidorEtiquetas((args.host, args.puerto), servicio, args.trabajadores, args.cola, args.verbose)
+    host, port = server.server_address[:2]
+    print(f"Servicio de etiquetas en http://{host}:{port} (Ctrl+C para detener)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nDeteniendo...")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -60,6 +60,41 @@ def test_barcode_generation():
         )
         print(f"  ✅ Código con texto generado: {img_with_text.size[0]}x{img_with_text.size[1]} px")
         
+        # SVG compacto de la vista previa: una barra por tramo y textos escapados
+        svg = generator.generate_barcode_with_text_svg('CODE128', '123456', 'Pérez & <Hijo>', 'A+', 'M')
+        _, tramos = generator.get_bar_runs('CODE128', '123456')
+        path = svg.split(' d="')[1].split('"')[0]
+        if path.count('z') != len(tramos) or 'Pérez &amp; &lt;Hijo&gt;' not in svg:
+            print("  ❌ SVG de la etiqueta incorrecto")
+            return False
+        print(f"  ✅ SVG generado: {len(svg.encode('utf-8'))} bytes")
+        
+        # Vista previa y Zebra salen del mismo diseño: los mismos textos en ambos
+        from modules.zebra_web import ZebraWebPrinter
+        zpl = ZebraWebPrinter().generate_zpl('123456', 'CODE128', 'Pérez & <Hijo>', 'A+', 'M')
+        if svg.count('<text') != zpl.count('^A0N'):
+            print("  ❌ La vista previa no coincide con el diseño de la Zebra")
+            return False
+        print(f"  ✅ Diseño común: {zpl.count('^A0N')} textos en SVG y ZPL")
+        
+        # Código y nombre que no entran: la Zebra y la vista previa los ajustan igual
+        import re
+        from modules.diseno_etiqueta import FUENTE_0_CONDENSADA, ancho_texto
+        nombre = 'MARIA DE LOS ANGELES GONZALEZ RODRIGUEZ X'
+        zpl = ZebraWebPrinter().generate_zpl('1622485.01', 'CODE39', nombre, None, 'F')
+        svg = generator.generate_barcode_with_text_svg('CODE39', '1622485.01', nombre, None, 'F')
+        modulos, tramos = generator.get_bar_runs('CODE39', '1622485.01')
+        modulo = int(re.search(r'\^BY(\d+)', zpl).group(1))
+        letra = int(re.search(r'\^A0N,20,(\d+)\^FD' + nombre, zpl).group(1))
+        largo = re.search(r'textLength="(\d+)"', svg)
+        primera = float(re.search(r'h([\d.]+)v', svg).group(1))
+        impreso = ancho_texto(nombre, letra) * FUENTE_0_CONDENSADA
+        if (modulo * modulos > 355 or primera != tramos[0][1] * modulo or letra >= 18 or not largo
+                or int(largo.group(1)) != round(impreso) or 'textLength' in svg.split('</text>')[0]):
+            print("  ❌ La vista previa no ajusta la etiqueta como la Zebra")
+            return False
+        print(f"  ✅ Ajuste común: ^BY{modulo} y letra {letra} en ZPL y SVG")
+        
         return True
         
     except Exception as e:
@@ -89,6 +124,183 @@ def test_printer_detection():
         print(f"  ❌ Error detectando impresoras: {e}")
         return False
 
+def test_excel_reader():
+    """Prueba la lectura de CSV y la extracción columnar de registros"""
+    print("\n📑 Probando lectura de archivos CSV...")
+    
+    try:
+        import tempfile
+        from modules.excel_web import ExcelWebReader
+        
+        contenido = "GRAU;APELLIDOS Y NOMBRES\n01622485;PEÑA ROJAS JOSÉ\n;\n1622486;GARCIA PEREZ JUAN\n"
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = os.path.join(carpeta, 'datos.csv')
+            with open(ruta, 'w', encoding='cp1252') as f:
+                f.write(contenido)
+            
+            reader = ExcelWebReader()
+            if not reader.load_excel_with_header(ruta, 0):
+                print("  ❌ No se pudo cargar el CSV")
+                return False
+            
+            data = reader.get_data_with_config({'nombre': 'APELLIDOS Y NOMBRES', 'grau': 'GRAU'})
+        
+        assert len(data) == 2, f"Se esperaban 2 registros, hay {len(data)}"
+        assert data.column('GRAU') == ('01622485', '1622486')
+        assert data[0].get('APELLIDOS Y NOMBRES') == 'PEÑA ROJAS JOSÉ'
+        print(f"  ✅ CSV leído: {len(data)} registros, columnas {reader.get_available_columns()}")
+        
+        # Los rechazos informan la fila de la planilla (la fila vacía también cuenta)
+        from modules.validacion_web import ValidadorCodigos
+        report = ValidadorCodigos().validate_records(data, 'GRAU', 'EAN8')
+        assert [rechazo['fila'] for rechazo in report.rejected] == [2, 4], report.rejected
+        
+        # CODE128 distingue mayúsculas: el código no se modifica
+        from modules.registros_web import RegistrosColumnares
+        report = ValidadorCodigos().validate_records(RegistrosColumnares({'GRAU': ['ab12', 'AB12']}), 'GRAU', 'CODE128')
+        assert report.records.column('GRAU') == ('ab12', 'AB12'), report.records.column('GRAU')
+        print("  ✅ Validación: filas de la planilla y mayúsculas respetadas")
+        
+        # La clave de la etiqueta sigue a la fila original: cambiar la columna GRAU cambia qué filas
+        # se rechazan, pero la selección no pasa a la etiqueta de otro paciente
+        from modules.validacion_web import clave_etiqueta
+        registros = RegistrosColumnares({
+            'NOMBRE': ['PEÑA', 'GARCIA', 'LOPEZ'],
+            'GRAU': ['1622485', '', '1622486'],
+            'OTRO': ['', '1622490', '1622491'],
+        })
+        nombres_por_clave = []
+        for grau_col in ('GRAU', 'OTRO'):
+            config = {'nombre': 'NOMBRE', 'grau': grau_col}
+            validos = ValidadorCodigos().validate_records(registros, grau_col, 'CODE128').records
+            nombres_por_clave.append({
+                clave_etiqueta('origen', validos.index[pos], config, 'CODE128'): validos.column('NOMBRE')[pos]
+                for pos in range(len(validos))
+            })
+        antes, despues = nombres_por_clave
+        seleccion = {clave for clave, nombre in antes.items() if nombre == 'PEÑA'}
+        assert seleccion == {clave_etiqueta('origen', 0, {'nombre': 'NOMBRE', 'grau': 'GRAU'}, 'CODE128')}
+        assert not seleccion & despues.keys(), "La selección quedó en la etiqueta de otro paciente"
+        print("  ✅ Vista previa: la selección sigue a la fila original al cambiar el mapeo")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Error leyendo CSV: {e}")
+        return False
+
+def test_nexlab_simulado():
+    """Prueba la búsqueda de órdenes contra la base Nexlab simulada en SQLite"""
+    print("\n🔎 Probando búsqueda de órdenes (Nexlab simulado)...")
+    
+    try:
+        import tempfile
+        from modules.nexlab_sqlite import BackendSQLite, PRIMERA_ORDEN, generar_base
+        from modules.ordenes_nexlab import OrdenesNexlab
+        
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = os.path.join(carpeta, 'nexlab.db')
+            generar_base(ruta, 1000)
+            nexlab = OrdenesNexlab(backend=BackendSQLite(ruta))
+            
+            exito, orden = nexlab.buscar_orden(str(PRIMERA_ORDEN + 10), forzar=True)
+            assert exito, orden
+            assert orden['numero_orden'] == str(PRIMERA_ORDEN + 10)
+            
+            exito, ordenes = nexlab.buscar_ordenes(f"{PRIMERA_ORDEN + 998}-{PRIMERA_ORDEN + 1001}", forzar=True)
+            assert exito, ordenes
+            encontradas = [numero for numero, datos in ordenes.items() if datos]
+            assert len(encontradas) == 2, f"Se esperaban 2 órdenes, hay {len(encontradas)}"
+            
+            exito, recientes = nexlab.listar_ordenes_recientes(5)
+            assert exito and recientes[0]['numero_orden'] == str(PRIMERA_ORDEN + 999)
+            nexlab.desconectar()
+        
+        print(f"  ✅ Búsquedas correctas: orden {orden['numero_orden']}, lote de {len(ordenes)}")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Error en búsqueda simulada: {e}")
+        return False
+
+def test_vista_previa_progresiva():
+    """Prueba la generación de la vista previa en segundo plano con cancelación"""
+    print("\n🖼️  Probando vista previa progresiva...")
+    
+    try:
+        import time
+        from modules.vista_previa import TrabajoVistaPrevia
+        
+        def render(label):
+            time.sleep(0.01)
+            return f"<svg>{label['code']}</svg>"
+        
+        labels = [{'code': str(i)} for i in range(200)]
+        labels[0]['svg'] = '<svg>reutilizada</svg>'
+        trabajo = TrabajoVistaPrevia(labels, render)
+        assert trabajo.esperar(10, timeout=5), "La primera página no estuvo lista"
+        primeras = trabajo.etiquetas()
+        assert len(primeras) >= 10 and [label['code'] for label in primeras] == [str(i) for i in range(len(primeras))]
+        trabajo.cancelar()
+        trabajo.esperar(len(labels), timeout=5)
+        assert trabajo.terminado and trabajo.listas < len(labels)
+        assert labels[0]['svg'] == '<svg>reutilizada</svg>' and trabajo.generadas == trabajo.listas - 1
+        
+        print(f"  ✅ Primera página lista, cancelada con {trabajo.listas} de {len(labels)} etiquetas")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Error en vista previa progresiva: {e}")
+        return False
+
+def test_servicio_http():
+    """Prueba el servicio HTTP de etiquetas en localhost"""
+    print("\n🌐 Probando servicio HTTP de etiquetas...")
+    
+    try:
+        import http.client
+        import json
+        import threading
+        from modules.barcode_web import BarcodeWebGenerator
+        from modules.http_etiquetas import ServicioEtiquetas, ServidorEtiquetas
+        from modules.zebra_web import ZebraWebPrinter
+        
+        servidor = ServidorEtiquetas(('127.0.0.1', 0), ServicioEtiquetas(BarcodeWebGenerator(), ZebraWebPrinter()),
+                                     trabajadores=2)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        try:
+            # Una sola conexión keep-alive para todas las solicitudes
+            conexion = http.client.HTTPConnection('127.0.0.1', servidor.server_address[1], timeout=10)
+            conexion.request('GET', '/salud')
+            respuesta = conexion.getresponse()
+            assert respuesta.status == 200 and json.loads(respuesta.read())['estado'] == 'ok'
+            
+            lote = {'etiquetas': [{'code': '1622485.01', 'nombre': 'JUAN PEREZ', 'sexo': 'M'},
+                                  {'code': '1622486.01'}], 'copias': 2}
+            conexion.request('POST', '/zpl', json.dumps(lote))
+            respuesta = conexion.getresponse()
+            zpl = respuesta.read().decode()
+            assert respuesta.status == 200 and zpl.count('^XA') == 4, zpl
+            
+            conexion.request('GET', '/png?code=1622485.01&nombre=JUAN%20PEREZ')
+            respuesta = conexion.getresponse()
+            assert respuesta.status == 200 and respuesta.read().startswith(b'\x89PNG')
+            
+            conexion.request('POST', '/imprimir', json.dumps({'code': '1'}))
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            assert respuesta.status == 503, "Sin impresora /imprimir debe responder 503"
+            conexion.close()
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+        
+        print("  ✅ Servicio HTTP respondió /salud, /zpl y /png")
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ Error en servicio HTTP: {e}")
+        return False
+
 def test_dependencies():
     """Prueba que todas las dependencias estén instaladas"""
     print("\n📦 Verificando dependencias...")
@@ -130,6 +342,18 @@ def main():
     # Probar generación de códigos
     results.append(("Generación de Códigos", test_barcode_generation()))
     
+    # Probar lectura de archivos
+    results.append(("Lectura de Archivos", test_excel_reader()))
+    
+    # Probar búsqueda de órdenes sin SQL Server
+    results.append(("Búsqueda de Órdenes", test_nexlab_simulado()))
+    
+    # Probar vista previa en segundo plano
+    results.append(("Vista Previa Progresiva", test_vista_previa_progresiva()))
+    
+    # Probar servicio HTTP de etiquetas
+    results.append(("Servicio HTTP", test_servicio_http()))
+    
     # Probar detección de impresoras
     results.append(("Detección de Impresoras", test_printer_detection()))
     
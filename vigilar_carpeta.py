@@ -0,0 +1,62 @@
+"""
+Servicio de carpeta vigilada: imprime automáticamente los archivos Excel/CSV
+que se dejan en una carpeta, usando el mapeo de columnas guardado en la app.
+
+Ejecutar: python vigilar_carpeta.py CARPETA --impresora "ZDesigner GK420t"
+"""
+import argparse
+import os
+import sys
+
+from modules.carpeta_vigilada import CarpetaVigilada, load_mapping
+from modules.zebra_web import ZebraWebPrinter
+
+DEFAULT_MAPPING = os.path.join("web_app", "temp", "mapeo_carpeta.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Impresión desatendida desde carpeta vigilada")
+    parser.add_argument('carpeta', help="Carpeta donde se dejan los archivos")
+    parser.add_argument('--impresora', required=True, help="Nombre de la impresora Zebra")
+    parser.add_argument('--mapeo', default=DEFAULT_MAPPING, help="Archivo JSON con el mapeo de columnas")
+    parser.add_argument('--lote', type=int, default=50, help="Etiquetas por trabajo de impresión")
+    parser.add_argument('--intervalo', type=float, default=2.0, help="Segundos entre revisiones")
+    parser.add_argument('--una-vez', action='store_true', help="Procesar lo pendiente y salir")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.carpeta):
+        print(f"❌ No existe la carpeta: {args.carpeta}")
+        return 1
+
+    try:
+        mapping = load_mapping(args.mapeo)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error cargando mapeo {args.mapeo}: {str(e)}")
+        print("Guarda un mapeo desde la aplicación (modo Excel) o crea el JSON manualmente")
+        return 1
+
+    printer = ZebraWebPrinter()
+    printer.set_printer(args.impresora)
+    if not printer.test_connection():
+        print(f"❌ No se pudo abrir la impresora: {args.impresora}")
+        return 1
+
+    servicio = CarpetaVigilada(args.carpeta, printer, mapping, args.lote, args.intervalo)
+    print(f"Vigilando {args.carpeta} (Ctrl+C para detener)")
+
+    if args.una_vez:
+        # Dos revisiones: la primera registra los archivos, la segunda confirma que están completos
+        servicio.scan()
+        servicio.run_once()
+        return 0
+
+    try:
+        servicio.run()
+    except KeyboardInterrupt:
+        servicio.stop()
+        print("Servicio detenido")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())